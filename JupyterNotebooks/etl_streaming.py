@@ -0,0 +1,436 @@
+'''
+ETL por streaming de los tres dumps de Steam al Parquet de la API, sin cargar ningún archivo completo.
+
+Hace lo mismo que los notebooks 01_ETL_* y 02_Feature_Enginner, pero leyendo los archivos línea por
+línea y procesando los registros anidados ('items' y 'reviews') por lotes de a lo sumo --filas-lote
+filas ya desanidadas, de modo que la memoria máxima depende del tamaño del lote y no del archivo
+(tampoco de la cantidad de géneros: las filas repartidas por género que esperan ser escritas son a lo
+sumo --filas-lote en total):
+
+    1. output_steam_games.json        -> steam_games_limpo.parquet
+    2. australian_user_reviews.json   -> user_reviews_limpo.parquet (con sentiment_analysis)
+    3. australian_users_items.json    -> user_items_limpo.parquet
+    4. items + reseñas + juegos       -> data_export_api_gzip.parquet
+
+El archivo de la API se escribe ordenado por género y año de lanzamiento, con grupos de filas que no
+mezclan géneros: así las estadísticas mínimo/máximo de cada grupo permiten saltear los grupos que no
+corresponden a una consulta por género o año. Para ordenar sin cargar todo, las filas se reparten
+primero en archivos temporales por género y después cada género se ordena por tramos de años que
+entran en un lote.
+
+Uso (desde JupyterNotebooks/):
+    python etl_streaming.py --datos ../data --filas-lote 100000 --filas-grupo 50000
+'''
+# Importaciones
+import argparse
+import ast
+import json
+import os
+import re
+import tempfile
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+import sentimiento
+import utils
+
+
+# Esquemas de salida (explícitos para que todos los lotes escriban los mismos tipos)
+esquema_juegos = pa.schema([
+    ('id', pa.int64()), ('genres', pa.string()), ('price', pa.float64()), ('early_access', pa.bool_()),
+    ('release_anio', pa.string()), ('publisher', pa.string()), ('app_name', pa.string()),
+    ('title', pa.string()), ('developer', pa.string()),
+])
+esquema_resenas = pa.schema([
+    ('user_id', pa.string()), ('user_url', pa.string()), ('reviews_item_id', pa.string()),
+    ('reviews_helpful', pa.string()), ('reviews_recommend', pa.bool_()), ('reviews_review', pa.string()),
+    ('reviews_date', pa.string()), ('sentiment_analysis', pa.int8()),
+])
+esquema_items = pa.schema([
+    ('item_id', pa.string()), ('item_name', pa.string()), ('playtime_forever', pa.int64()),
+    ('steam_id', pa.string()), ('items_count', pa.int64()), ('user_id', pa.string()), ('user_url', pa.string()),
+])
+esquema_api = pa.schema([
+    ('release_anio', pa.int64()), ('genres', pa.string()), ('playtime_forever', pa.float64()),
+    ('user_id', pa.string()), ('item_id', pa.int64()), ('item_name', pa.string()),
+    ('sentiment_analysis', pa.int64()), ('reviews_recommend', pa.bool_()), ('reviews_anio', pa.int64()),
+])
+
+# Columnas de texto de steam_games que se completan con 'Sin dato disponible'
+columnas_completar = ['publisher', 'app_name', 'title', 'developer']
+
+
+def leer_registros(path, interpretar=json.loads):
+    '''
+    Lee un archivo de un registro por línea sin cargarlo completo.
+
+    Parameters:
+        path (str): Ruta del archivo.
+        interpretar (callable): json.loads para JSON, ast.literal_eval para los dumps con sintaxis de Python.
+    '''
+    with open(path, 'r', encoding='utf-8') as f:
+        for linea in f:
+            if linea.strip():
+                yield interpretar(linea)
+
+
+def primera_aparicion(registros, clave):
+    '''
+    Descarta los registros cuya clave ya apareció (los usuarios repetidos de australian_user_reviews).
+    '''
+    vistos = set()
+    for registro in registros:
+        if registro.get(clave) in vistos:
+            continue
+        vistos.add(registro.get(clave))
+        yield registro
+
+
+_usuario = re.compile(r"""['"]user_id['"]: (['"])(.*?)\1""")
+
+
+def usuarios_repetidos(path):
+    '''
+    Devuelve los user_id que aparecen en más de un registro del archivo, leyendo sólo esa clave de
+    cada línea (sin interpretar el registro completo salvo que no tenga la forma esperada).
+    '''
+    conteos = Counter()
+    with open(path, 'r', encoding='utf-8') as f:
+        for linea in f:
+            if not linea.strip():
+                continue
+            encontrado = _usuario.search(linea)
+            conteos[encontrado.group(2) if encontrado else ast.literal_eval(linea).get('user_id')] += 1
+    return {usuario for usuario, veces in conteos.items() if veces > 1}
+
+
+class FilasRepetidas:
+    '''
+    Descarta las filas exactamente iguales a otra ya vista en el archivo, como el drop_duplicates()
+    de 01_ETL_User_Items, sin guardar todas las filas: una fila sólo puede repetir otra de un registro
+    anterior si es del mismo usuario, así que se recuerdan (por su hash) únicamente las filas de los
+    usuarios que aparecen en más de un registro. Las repetidas dentro de un lote se descartan con
+    drop_duplicates (un registro nunca se reparte entre dos lotes).
+    '''
+
+    def __init__(self, repetidos):
+        self.repetidos = repetidos
+        self._vistas = set()
+
+    def filtrar(self, df):
+        df = df.drop_duplicates()
+        de_repetidos = df['user_id'].isin(self.repetidos).to_numpy()
+        if not de_repetidos.any():
+            return df
+
+        conservar = np.ones(len(df), dtype=bool)
+        for i, fila in zip(np.flatnonzero(de_repetidos), df[de_repetidos].itertuples(index=False, name=None)):
+            clave = hash(fila)
+            if clave in self._vistas:
+                conservar[i] = False
+            else:
+                self._vistas.add(clave)
+        return df[conservar]
+
+
+def lotes_desanidados(registros, columna, meta, filas_lote, prefijo=''):
+    '''
+    Desanida la lista 'columna' de cada registro (una fila por elemento, con las columnas 'meta' del
+    registro) y devuelve DataFrames de a lo sumo 'filas_lote' filas, salvo que un solo registro tenga más.
+    '''
+    filas = []
+    for registro in registros:
+        elementos = registro.get(columna) or []
+        if filas and len(filas) + len(elementos) > filas_lote:
+            yield pd.DataFrame(filas)
+            filas = []
+        valores_meta = {m: registro.get(m) for m in meta}
+        filas.extend({**valores_meta, **{prefijo + k: v for k, v in elemento.items()}} for elemento in elementos)
+    if filas:
+        yield pd.DataFrame(filas)
+
+
+def lotes_planos(registros, filas_lote):
+    '''
+    Agrupa registros sin listas anidadas en DataFrames de 'filas_lote' filas.
+    '''
+    filas = []
+    for registro in registros:
+        filas.append(registro)
+        if len(filas) == filas_lote:
+            yield pd.DataFrame(filas)
+            filas = []
+    if filas:
+        yield pd.DataFrame(filas)
+
+
+def a_tabla(df, esquema):
+    '''
+    Convierte un lote a pyarrow.Table con el esquema dado (las columnas faltantes quedan nulas).
+    '''
+    df = df.reindex(columns=esquema.names)
+    return pa.Table.from_pandas(df, schema=esquema, preserve_index=False)
+
+
+class EscritorParquet:
+    '''
+    Escribe tablas en un archivo Parquet en grupos de filas de 'filas_grupo', acumulando las tablas chicas.
+
+    cortar() escribe lo acumulado aunque no complete un grupo, para que un grupo no mezcle particiones.
+    '''
+
+    def __init__(self, path, esquema, filas_grupo, compresion='snappy'):
+        self.filas_grupo = filas_grupo
+        self.filas = 0
+        self.grupos = 0
+        self._pendientes = []
+        self._filas_pendientes = 0
+        self._escritor = pq.ParquetWriter(path, esquema, compression=compresion)
+
+    @property
+    def filas_pendientes(self):
+        return self._filas_pendientes
+
+    def escribir(self, tabla):
+        self._pendientes.append(tabla)
+        self._filas_pendientes += tabla.num_rows
+        if self._filas_pendientes >= self.filas_grupo:
+            acumulada = pa.concat_tables(self._pendientes).combine_chunks()
+            completos = acumulada.num_rows - acumulada.num_rows % self.filas_grupo
+            self._escribir(acumulada.slice(0, completos))
+            resto = acumulada.slice(completos)
+            self._pendientes, self._filas_pendientes = ([resto], resto.num_rows) if resto.num_rows else ([], 0)
+
+    def cortar(self):
+        if self._filas_pendientes:
+            self._escribir(pa.concat_tables(self._pendientes))
+        self._pendientes, self._filas_pendientes = [], 0
+
+    def _escribir(self, tabla):
+        self._escritor.write_table(tabla, row_group_size=self.filas_grupo)
+        self.filas += tabla.num_rows
+        self.grupos += -(-tabla.num_rows // self.filas_grupo)
+
+    def cerrar(self):
+        self.cortar()
+        self._escritor.close()
+
+
+def procesar_juegos(origen, destino, filas_lote, filas_grupo):
+    '''
+    Limpia output_steam_games.json (como 01_ETL_SteamGames) y devuelve la tabla de juegos que usa
+    la API: una fila por juego y género con 'item_id', 'genres' y 'release_anio' numérico.
+    '''
+    escritor = EscritorParquet(destino, esquema_juegos, filas_grupo)
+    partes_api = []
+    vistos = set()
+
+    for df in lotes_planos(leer_registros(origen), filas_lote):
+        df = df.dropna(how='all')
+
+        # Sin 'id' el juego no se puede unir con los items; de los repetidos queda el primero
+        df['id'] = pd.to_numeric(df['id'], errors='coerce')
+        df = df.dropna(subset=['id'])
+        df['id'] = df['id'].astype('int64')
+        df = df[~df['id'].isin(list(vistos)) & ~df['id'].duplicated()]
+        vistos.update(df['id'].tolist())
+
+        df['release_anio'] = utils.extract_anio_release_series(df['release_date'])
+        df['price'] = utils.replace_float_series(df['price'])
+        df[columnas_completar] = df.reindex(columns=columnas_completar).fillna('Sin dato disponible')
+        df = df.explode('genres').dropna(subset=['genres'])
+        escritor.escribir(a_tabla(df, esquema_juegos))
+
+        api = pd.DataFrame({
+            'item_id': df['id'],
+            'genres': df['genres'].str.title(),
+            'release_anio': pd.to_numeric(df['release_anio'], errors='coerce'),
+        }).dropna()
+        partes_api.append(api.astype({'release_anio': 'int64'}))
+
+    escritor.cerrar()
+    print(f'{destino}: {escritor.filas} filas')
+    return pd.concat(partes_api, ignore_index=True)
+
+
+def procesar_resenas(origen, destino, filas_lote, filas_grupo, workers):
+    '''
+    Limpia australian_user_reviews.json (como 01_ETL_User_Reviews), agrega sentiment_analysis y
+    devuelve, por usuario, los datos de su primera reseña (como 02_Feature_Enginner).
+    '''
+    escritor = EscritorParquet(destino, esquema_resenas, filas_grupo)
+    partes_api = []
+    usuarios = set()
+    registros = primera_aparicion(leer_registros(origen, ast.literal_eval), 'user_id')
+
+    with sentimiento.PuntuadorSentimiento(workers=workers, tamanio_lote=filas_lote) as puntuador:
+        for df in lotes_desanidados(registros, 'reviews', ['user_id', 'user_url'], filas_lote, prefijo='reviews_'):
+            df = df.replace('', None)
+            df['reviews_date'] = utils.date_converter_series(df['reviews_posted'])
+            df = df.dropna(subset=['reviews_review'])
+            df['sentiment_analysis'] = puntuador.puntuar_lote(df['reviews_review'].tolist())
+            escritor.escribir(a_tabla(df, esquema_resenas))
+
+            primeras = df[~df['user_id'].duplicated() & ~df['user_id'].isin(list(usuarios))]
+            usuarios.update(primeras['user_id'].tolist())
+            partes_api.append(pd.DataFrame({
+                'user_id': primeras['user_id'],
+                'sentiment_analysis': primeras['sentiment_analysis'].astype('int64'),
+                'reviews_recommend': primeras['reviews_recommend'].astype(bool),
+                'reviews_anio': pd.to_datetime(primeras['reviews_date'], errors='coerce').dt.year,
+            }).dropna())
+
+    escritor.cerrar()
+    print(f'{destino}: {escritor.filas} filas')
+    resenas = pd.concat(partes_api, ignore_index=True)
+    return resenas.astype({'reviews_anio': 'int64'})
+
+
+class ParticionGeneros:
+    '''
+    Reparte las filas de la API en archivos temporales por género y cuenta las filas por género y año,
+    para después escribirlas ordenadas sin cargar todo el archivo.
+
+    Cada género acumula filas hasta completar un grupo de 'filas_grupo', pero entre todos los géneros
+    se acumulan a lo sumo 'filas_lote' filas: si una parte nueva lo supera, antes se escriben las
+    acumuladas de todos los géneros (en grupos más chicos del archivo temporal). 'max_pendientes'
+    guarda el máximo de filas acumuladas.
+    '''
+
+    def __init__(self, directorio, filas_grupo, filas_lote):
+        self.directorio = directorio
+        self.filas_grupo = filas_grupo
+        self.filas_lote = filas_lote
+        self.max_pendientes = 0
+        self._escritores = {}
+        self._conteos = {}
+
+    def _pendientes(self):
+        return sum(escritor.filas_pendientes for _, escritor in self._escritores.values())
+
+    def escribir(self, df):
+        for genero, parte in df.groupby('genres', sort=False):
+            if genero not in self._escritores:
+                path = os.path.join(self.directorio, f'genero_{len(self._escritores)}.parquet')
+                self._escritores[genero] = (path, EscritorParquet(path, esquema_api, self.filas_grupo))
+            tabla = a_tabla(parte, esquema_api)
+            if self._pendientes() + tabla.num_rows > self.filas_lote:
+                for _, escritor in self._escritores.values():
+                    escritor.cortar()
+            self._escritores[genero][1].escribir(tabla)
+            self.max_pendientes = max(self.max_pendientes, self._pendientes())
+            for anio, filas in parte['release_anio'].value_counts().items():
+                self._conteos[(genero, anio)] = self._conteos.get((genero, anio), 0) + filas
+
+    def tramos(self, genero, filas_lote):
+        '''
+        Agrupa los años del género en tramos consecutivos de a lo sumo 'filas_lote' filas
+        (un año con más filas queda solo en su tramo).
+        '''
+        anios = sorted((anio, filas) for (g, anio), filas in self._conteos.items() if g == genero)
+        tramos, actual, filas_actual = [], [], 0
+        for anio, filas in anios:
+            if actual and filas_actual + filas > filas_lote:
+                tramos.append(actual)
+                actual, filas_actual = [], 0
+            actual.append(anio)
+            filas_actual += filas
+        if actual:
+            tramos.append(actual)
+        return tramos
+
+    def escribir_ordenado(self, destino, filas_lote):
+        for _, escritor in self._escritores.values():
+            escritor.cerrar()
+
+        salida = EscritorParquet(destino, esquema_api, self.filas_grupo, compresion='gzip')
+        for genero in sorted(self._escritores):
+            path, _ = self._escritores[genero]
+            archivo = pq.ParquetFile(path)
+
+            for tramo in self.tramos(genero, filas_lote):
+                anios = pa.array(tramo, type=pa.int64())
+                partes = []
+                for lote in archivo.iter_batches(batch_size=self.filas_grupo):
+                    parte = pa.Table.from_batches([lote])
+                    parte = parte.filter(pc.is_in(parte['release_anio'], value_set=anios))
+                    if len(tramo) == 1:
+                        # Un solo año: no hace falta ordenar, se escribe a medida que se lee
+                        salida.escribir(parte)
+                    else:
+                        partes.append(parte)
+                if partes:
+                    salida.escribir(pa.concat_tables(partes).sort_by('release_anio'))
+
+            # Los grupos de filas no mezclan géneros
+            salida.cortar()
+
+        salida.cerrar()
+        return salida
+
+
+def procesar_items(origen, destino, juegos, resenas, particion, filas_lote, filas_grupo):
+    '''
+    Limpia australian_users_items.json (como 01_ETL_User_Items) y une cada lote con las reseñas
+    y los juegos (como 02_Feature_Enginner), repartiendo el resultado por género.
+
+    Como en el notebook, se descartan las filas repetidas (con playtime_2weeks, antes de quitar esa
+    columna), no los usuarios repetidos: un usuario con dos registros distintos conserva los dos.
+    '''
+    escritor = EscritorParquet(destino, esquema_items, filas_grupo)
+    repetidas = FilasRepetidas(usuarios_repetidos(origen))
+    meta = ['steam_id', 'items_count', 'user_id', 'user_url']
+
+    for df in lotes_desanidados(leer_registros(origen, ast.literal_eval), 'items', meta, filas_lote):
+        df = repetidas.filtrar(df).drop(columns=['playtime_2weeks'], errors='ignore')
+        escritor.escribir(a_tabla(df, esquema_items))
+
+        api = pd.DataFrame({
+            'user_id': df['user_id'],
+            'item_id': pd.to_numeric(df['item_id'], errors='coerce'),
+            'item_name': df['item_name'].str.title(),
+            'playtime_forever': pd.to_numeric(df['playtime_forever'], errors='coerce').astype('float64'),
+        }).dropna()
+        api = api.merge(resenas, on='user_id', how='inner').merge(juegos, on='item_id', how='inner')
+        particion.escribir(api.astype({'item_id': 'int64'}))
+
+    escritor.cerrar()
+    print(f'{destino}: {escritor.filas} filas')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--datos', default='../data', help='Directorio con los JSON y de salida de los Parquet')
+    parser.add_argument('--destino', default=None, help='Parquet de la API (por defecto <datos>/data_export_api_gzip.parquet)')
+    parser.add_argument('--filas-lote', type=int, default=100_000, help='Filas desanidadas por lote (acota la memoria)')
+    parser.add_argument('--filas-grupo', type=int, default=50_000, help='Filas por grupo de filas de los Parquet')
+    parser.add_argument('--workers', type=int, default=None, help='Procesos del análisis de sentimiento (0 = sin pool)')
+    args = parser.parse_args()
+
+    datos = args.datos
+    destino = args.destino or os.path.join(datos, 'data_export_api_gzip.parquet')
+
+    juegos = procesar_juegos(os.path.join(datos, 'output_steam_games.json'),
+                             os.path.join(datos, 'steam_games_limpo.parquet'), args.filas_lote, args.filas_grupo)
+    resenas = procesar_resenas(os.path.join(datos, 'australian_user_reviews.json'),
+                               os.path.join(datos, 'user_reviews_limpo.parquet'),
+                               args.filas_lote, args.filas_grupo, args.workers)
+
+    with tempfile.TemporaryDirectory(dir=datos) as temporal:
+        particion = ParticionGeneros(temporal, args.filas_grupo, args.filas_lote)
+        procesar_items(os.path.join(datos, 'australian_users_items.json'),
+                       os.path.join(datos, 'user_items_limpo.parquet'),
+                       juegos, resenas, particion, args.filas_lote, args.filas_grupo)
+        salida = particion.escribir_ordenado(destino, args.filas_lote)
+
+    print(f'{destino}: {salida.filas} filas en {salida.grupos} grupos, ordenado por género y año')
+    print(f'Filas por género en memoria como máximo: {particion.max_pendientes}')
+
+
+if __name__ == '__main__':
+    main()
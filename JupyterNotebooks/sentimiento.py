@@ -0,0 +1,203 @@
+'''
+Análisis de sentimiento por lotes para las reseñas de australian_user_reviews.
+
+Reemplaza el df['reviews_review'].apply(utils.sentiment_analysis) del notebook de Feature
+Engineering: las reseñas se procesan por lotes, los textos nuevos se reparten entre un pool de
+procesos y los resultados se memorizan por el hash del texto normalizado, porque las reseñas
+repetidas y vacías son frecuentes. La clasificación es la de utils.sentiment_analysis
+(0 negativo, 1 neutral o sin texto, 2 positivo, con umbrales de polaridad ±0.2).
+
+Uso (desde JupyterNotebooks/):
+    python sentimiento.py ../data/user_reviews_limpo.parquet ../data/user_reviews_sentimiento.parquet --workers 4
+'''
+# Importaciones
+import argparse
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import utils
+
+
+# Valor de las reseñas sin texto (igual que sentiment_analysis(None))
+sentimiento_sin_texto = 1
+
+_espacios = re.compile(r'\s+')
+
+
+def normalizar_texto(texto):
+    '''
+    Normaliza una reseña para la memorización: recorta los extremos y une los espacios repetidos.
+
+    TextBlob separa las palabras por espacios, así que el texto normalizado tiene la misma polaridad
+    que el original. Los valores nulos (None o NaN) devuelven None.
+    '''
+    if texto is None or (isinstance(texto, float) and np.isnan(texto)):
+        return None
+    return _espacios.sub(' ', str(texto)).strip()
+
+
+def clave_texto(texto):
+    '''
+    Devuelve la clave de memorización (hash de 16 bytes) de un texto ya normalizado.
+    '''
+    return hashlib.blake2b(texto.encode('utf-8'), digest_size=16).digest()
+
+
+def _puntuar_textos(textos):
+    '''
+    Clasifica una lista de textos normalizados con utils.sentiment_analysis (se ejecuta en los procesos del pool).
+    '''
+    return [utils.sentiment_analysis(texto) for texto in textos]
+
+
+class PuntuadorSentimiento:
+    '''
+    Clasifica reseñas por lotes con memorización y un pool de procesos.
+
+    Se usa como context manager para que el pool se cree una sola vez:
+
+        with PuntuadorSentimiento(workers=4) as puntuador:
+            df['sentiment_analysis'] = puntuador.puntuar(df['reviews_review'])
+
+    Parameters:
+        workers (int or None): Procesos del pool; None usa os.cpu_count() y 0 clasifica en el mismo proceso.
+        tamanio_lote (int): Reseñas que se leen por lote (y filas por grupo al escribir Parquet).
+        tamanio_tarea (int): Textos nuevos que se envían juntos a cada proceso.
+        max_memorizados (int): Textos que se memorizan como máximo; al superarlo se descartan los
+            usados hace más tiempo (LRU), para que la memoria no crezca con el corpus.
+    '''
+
+    def __init__(self, workers=None, tamanio_lote=10_000, tamanio_tarea=500, max_memorizados=200_000):
+        self.workers = os.cpu_count() if workers is None else workers
+        self.tamanio_lote = tamanio_lote
+        self.tamanio_tarea = tamanio_tarea
+        self.max_memorizados = max_memorizados
+        self.memo = OrderedDict()
+        self.estadisticas = {'resenas': 0, 'sin_texto': 0, 'memorizadas': 0, 'puntuadas': 0}
+        self._pool = None
+
+    def __enter__(self):
+        if self.workers > 0:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self
+
+    def __exit__(self, *excepcion):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _puntuar_nuevos(self, textos):
+        if self._pool is None:
+            return _puntuar_textos(textos)
+        tareas = [textos[i:i + self.tamanio_tarea] for i in range(0, len(textos), self.tamanio_tarea)]
+        return [valor for parte in self._pool.map(_puntuar_textos, tareas) for valor in parte]
+
+    def puntuar_lote(self, textos):
+        '''
+        Clasifica una lista de reseñas y devuelve un arreglo int8 con un valor por reseña.
+        '''
+        resultado = np.full(len(textos), sentimiento_sin_texto, dtype=np.int8)
+        pendientes = {}  # clave -> (texto normalizado, filas)
+
+        for fila, texto in enumerate(textos):
+            texto = normalizar_texto(texto)
+            if not texto:
+                # Sin texto la polaridad es 0: neutral, sin llamar a TextBlob
+                self.estadisticas['sin_texto'] += 1
+                continue
+            clave = clave_texto(texto)
+            valor = self.memo.get(clave)
+            if valor is not None:
+                self.memo.move_to_end(clave)
+                resultado[fila] = valor
+                self.estadisticas['memorizadas'] += 1
+            elif clave in pendientes:
+                pendientes[clave][1].append(fila)
+                self.estadisticas['memorizadas'] += 1
+            else:
+                pendientes[clave] = (texto, [fila])
+
+        if pendientes:
+            valores = self._puntuar_nuevos([texto for texto, _ in pendientes.values()])
+            for (clave, (_, filas)), valor in zip(pendientes.items(), valores):
+                self.memo[clave] = valor
+                resultado[filas] = valor
+            while len(self.memo) > self.max_memorizados:
+                self.memo.popitem(last=False)
+            self.estadisticas['puntuadas'] += len(pendientes)
+
+        self.estadisticas['resenas'] += len(textos)
+        return resultado
+
+    def lotes(self, textos):
+        '''
+        Recorre un iterable de reseñas por lotes de 'tamanio_lote' y devuelve la clasificación de cada lote.
+        '''
+        lote = []
+        for texto in textos:
+            lote.append(texto)
+            if len(lote) == self.tamanio_lote:
+                yield self.puntuar_lote(lote)
+                lote = []
+        if lote:
+            yield self.puntuar_lote(lote)
+
+    def puntuar(self, textos):
+        '''
+        Clasifica todas las reseñas de un iterable y devuelve un arreglo int8 en el mismo orden.
+        '''
+        partes = list(self.lotes(textos))
+        return np.concatenate(partes) if partes else np.empty(0, dtype=np.int8)
+
+    def escribir_parquet(self, textos, destino, columna='sentiment_analysis'):
+        '''
+        Clasifica las reseñas y escribe el resultado en un archivo Parquet a medida que avanza,
+        un grupo de filas por lote, sin juntar todos los resultados en memoria.
+
+        El archivo tiene las columnas 'fila' (posición de la reseña en el iterable) y 'columna'.
+
+        Returns:
+            int: Cantidad de reseñas escritas.
+        '''
+        esquema = pa.schema([('fila', pa.int64()), (columna, pa.int8())])
+        escritas = 0
+        with pq.ParquetWriter(destino, esquema) as escritor:
+            for valores in self.lotes(textos):
+                filas = np.arange(escritas, escritas + len(valores), dtype=np.int64)
+                escritor.write_table(pa.table({'fila': filas, columna: valores}, schema=esquema))
+                escritas += len(valores)
+        return escritas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('origen', help='Parquet con las reseñas (por ejemplo ../data/user_reviews_limpo.parquet)')
+    parser.add_argument('destino', help='Parquet de salida con las columnas fila y sentiment_analysis')
+    parser.add_argument('--columna', default='reviews_review', help='Columna con el texto de las reseñas')
+    parser.add_argument('--workers', type=int, default=None, help='Procesos del pool (0 = sin pool)')
+    parser.add_argument('--lote', type=int, default=10_000, help='Reseñas por lote')
+    parser.add_argument('--memorizados', type=int, default=200_000, help='Textos memorizados como máximo')
+    args = parser.parse_args()
+
+    archivo = pq.ParquetFile(args.origen)
+    textos = (texto for lote in archivo.iter_batches(batch_size=args.lote, columns=[args.columna])
+              for texto in lote.column(0).to_pylist())
+
+    with PuntuadorSentimiento(workers=args.workers, tamanio_lote=args.lote,
+                              max_memorizados=args.memorizados) as puntuador:
+        escritas = puntuador.escribir_parquet(textos, args.destino)
+
+    print(f'{escritas} reseñas clasificadas en {args.destino}: {puntuador.estadisticas}')
+    print(pd.read_parquet(args.destino)['sentiment_analysis'].value_counts().sort_index().to_string())
+
+
+if __name__ == '__main__':
+    main()
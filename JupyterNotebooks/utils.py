@@ -40,6 +40,7 @@ def types_data_df(df):
         
     return df_info
 
+import numpy as np
 import pandas as pd
 import re
 
@@ -112,6 +113,92 @@ def date_converter(cadena_fecha):
         return 'Formato inválido'
 
 
+# Versiones vectorizadas: reciben la columna completa (pandas.Series) y devuelven lo mismo que
+# aplicar la función escalar fila por fila con .apply, sin un llamado de Python por fila.
+
+# Textos que float() acepta aunque pd.to_numeric no (espacios, guiones bajos, 'nan', 'inf', dígitos Unicode)
+_patron_float = r'^\s*[+-]?(?:nan|inf|infinity|[\d_]*\.?[\d_]*(?:e[+-]?[\d_]+)?)\s*$'
+
+
+def extract_anio_release_series(fechas):
+    '''
+    Versión vectorizada de extract_anio_release.
+
+    Parameters:
+        fechas (pandas.Series): Fechas en formato 'yyyy-mm-dd'.
+
+    Returns:
+        pandas.Series: 'yyyy' si la fecha es válida, 'Dato no disponible' si el formato es incorrecto
+        y None si la fecha es nula.
+    '''
+    anios = fechas.astype(str).str.extract(r'^(\d{4})-\d{2}-\d{2}$', expand=False).astype(object)
+    resultado = anios.where(anios.notna(), 'Dato no disponible')
+    resultado[fechas.isna().to_numpy()] = None
+    return resultado
+
+
+def replace_float_series(valores):
+    '''
+    Versión vectorizada de replace_float.
+
+    Convierte con pd.to_numeric(errors='coerce'). Los valores que no convierte y que float() podría
+    aceptar (por ejemplo ' 1_000 ' o 'nan') se resuelven uno por uno con replace_float.
+
+    Parameters:
+        valores (pandas.Series): Valores a convertir.
+
+    Returns:
+        pandas.Series: El valor numérico (float) si la conversión es exitosa, o 0.0 si es nulo o falla.
+    '''
+    numeros = pd.to_numeric(valores, errors='coerce').to_numpy(dtype='float64', na_value=np.nan, copy=True)
+    nulos = valores.isna().to_numpy()
+
+    pendientes = np.flatnonzero(np.isnan(numeros) & ~nulos)
+    if len(pendientes):
+        restantes = valores.iloc[pendientes]
+        no_texto = (restantes.map(type) != str).to_numpy()
+        dudosos = no_texto | restantes.astype(str).str.match(_patron_float, case=False).to_numpy(dtype=bool)
+        numeros[pendientes] = 0.0
+        numeros[pendientes[dudosos]] = restantes[dudosos].map(replace_float).to_numpy(dtype='float64')
+
+    numeros[nulos] = 0.0
+    return pd.Series(numeros, index=valores.index, name=valores.name)
+
+
+def date_converter_series(cadenas):
+    '''
+    Versión vectorizada de date_converter.
+
+    Extrae la fecha con str.extract y la convierte con to_datetime usando los formatos explícitos
+    'Month d, yyyy' y 'Mon d, yyyy'. Las fechas que no coinciden con ninguno (por ejemplo 'Sept 5, 2014')
+    se convierten una por una como en date_converter.
+
+    Parameters:
+        cadenas (pandas.Series): Cadenas str (por ejemplo 'Posted November 5, 2011.').
+
+    Returns:
+        pandas.Series: Fecha en formato "YYYY-MM-DD", 'Fecha inválida' si no se pudo convertir,
+        'Formato inválido' si la cadena no cumple el formato esperado y None si la cadena es nula
+        (date_converter no acepta nulos).
+    '''
+    extraidas = cadenas.str.extract(r'(\w+\s\d{1,2},\s\d{4})', expand=False)
+
+    fechas = pd.to_datetime(extraidas, format='%B %d, %Y', errors='coerce')
+    faltan = fechas.isna() & extraidas.notna()
+    if faltan.any():
+        fechas[faltan] = pd.to_datetime(extraidas[faltan], format='%b %d, %Y', errors='coerce')
+
+    resultado = fechas.dt.strftime('%Y-%m-%d').astype(object)
+    resultado[extraidas.isna().to_numpy()] = 'Formato inválido'
+
+    faltan = (fechas.isna() & extraidas.notna()).to_numpy()
+    if faltan.any():
+        resultado[faltan] = extraidas[faltan].map(date_converter)
+
+    resultado[cadenas.isna().to_numpy()] = None
+    return resultado
+
+
 ###### FUNCIONES FEATURE ENGINNER
 
 def sentiment_analysis(review):
@@ -0,0 +1,390 @@
+# Importaciones
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+import filtros
+
+
+# Columnas que necesitan las consultas que se responden desde los agregados
+columnas_agregados = ['genres', 'release_anio', 'playtime_forever', 'reviews_anio', 'item_name',
+                      'reviews_recommend', 'sentiment_analysis']
+
+# Claves de cada tabla de agregados
+claves_playtime = ['genres', 'release_anio']
+claves_resenas = ['reviews_anio', 'item_name', 'reviews_recommend', 'sentiment_analysis']
+claves_sentimiento = ['release_anio', 'sentiment_analysis']
+
+# Tipos de las claves por las que filtran las consultas
+tipos_claves = {'genres': str, 'release_anio': int, 'reviews_anio': int, 'reviews_recommend': bool,
+                'sentiment_analysis': int}
+
+
+class Agregados:
+    '''
+    Tablas de agregados calculadas sobre todas las filas del archivo de datos.
+
+    Attributes:
+        playtime (pandas.Series): Suma de playtime_forever por (genres, release_anio).
+        resenas (pandas.Series): Cantidad de filas por (reviews_anio, item_name, reviews_recommend, sentiment_analysis).
+        sentimiento (pandas.Series): Cantidad de filas por (release_anio, sentiment_analysis).
+        filas (int): Cantidad de filas leídas para construir los agregados.
+
+    Las consultas por año leen un tramo contiguo de las tablas de reseñas y de sentimiento
+    guardadas en arreglos ordenados (ver OrdenResenas y OrdenSentimiento); las de género filtran
+    la tabla de horas (como DataFrame plano) con filtros.TablaFiltrable.
+    '''
+
+    def __init__(self, playtime, resenas, sentimiento, filas):
+        self.playtime = playtime
+        self.resenas = resenas
+        self.sentimiento = sentimiento
+        self.filas = filas
+        self._playtime = _filtrable(playtime, 'playtime_forever')
+        self._resenas = OrdenResenas(resenas)
+        self._sentimiento = OrdenSentimiento(sentimiento)
+
+    def anio_mas_jugado(self, genero):
+        '''
+        Devuelve el año de lanzamiento con más horas jugadas para el género dado, o None si el género no existe.
+        '''
+        por_anio = self._playtime.filtrar(genres=genero)
+        if por_anio.empty:
+            return None
+        # Las filas están ordenadas por año: ante empates queda el primer año, como con idxmax
+        return int(por_anio['release_anio'].iat[por_anio['playtime_forever'].to_numpy().argmax()])
+
+    def top_resenas(self, anio, recomendado, sentimientos, cantidad=3):
+        '''
+        Devuelve los nombres de los juegos con más reseñas para el año de reseña dado, filtrando por
+        recomendación y por los valores de sentimiento indicados.
+
+        Parameters:
+            anio (int): Año de la reseña (reviews_anio).
+            recomendado (bool): Valor de reviews_recommend que se cuenta.
+            sentimientos (list): Valores de sentiment_analysis que se cuentan.
+            cantidad (int): Cantidad de juegos a devolver.
+
+        Returns:
+            list: Nombres de los juegos, de mayor a menor cantidad de reseñas.
+        '''
+        return self._resenas.top(anio, recomendado, sentimientos, cantidad)
+
+    def sentimiento_por_anio(self, anio):
+        '''
+        Devuelve un diccionario {valor de sentiment_analysis: cantidad} para el año de lanzamiento dado.
+        '''
+        return self._sentimiento.del_anio(anio)
+
+
+class OrdenResenas:
+    '''
+    Tabla de reseñas ordenada por (reviews_anio, reviews_recommend, sentiment_analysis, item_name),
+    guardada en arreglos de NumPy.
+
+    Cada combinación (año, recomendación, sentimiento) ocupa un tramo contiguo de los arreglos,
+    que se encuentra con np.searchsorted sobre 'claves' (las tres claves combinadas en un entero,
+    ordenado igual que la tabla). Los valores de sentimiento consecutivos quedan en tramos
+    consecutivos, así que [1, 2] se lee como un solo tramo, sin máscaras ni copias, y el top se
+    elige con np.partition sobre las reseñas por juego del tramo en lugar de ordenarlas todas.
+
+    Attributes:
+        juegos (numpy.ndarray): Nombres de los juegos, ordenados alfabéticamente.
+        sentimientos (numpy.ndarray): Valores de sentiment_analysis presentes, ordenados.
+        claves (numpy.ndarray): Clave combinada de cada fila, ordenada.
+        codigos (numpy.ndarray): Posición en 'juegos' del juego de cada fila.
+        cantidades (numpy.ndarray): Cantidad de reseñas de cada fila.
+    '''
+
+    def __init__(self, resenas):
+        anios = resenas.index.get_level_values('reviews_anio').to_numpy(dtype=np.int64)
+        recomendados = resenas.index.get_level_values('reviews_recommend').to_numpy(dtype=bool)
+        self.sentimientos, sentimientos = np.unique(
+            resenas.index.get_level_values('sentiment_analysis').to_numpy(dtype=np.int64), return_inverse=True)
+        juegos, codigos = np.unique(resenas.index.get_level_values('item_name').to_numpy(dtype=object),
+                                    return_inverse=True)
+        # Texto de ancho fijo en lugar de objetos de Python: las consultas no modifican los contadores
+        # de referencias de los nombres (las páginas siguen compartidas entre procesos, ver servidor.py)
+        self.juegos = juegos.astype(str)
+
+        claves = self._combinar(anios, recomendados, sentimientos)
+        orden = np.lexsort((codigos, claves))
+        self.claves = claves[orden]
+        self.codigos = codigos[orden].astype(np.int32)
+        self.cantidades = resenas.to_numpy(dtype=np.int64)[orden]
+
+    def _combinar(self, anios, recomendados, sentimientos):
+        return (anios * 2 + recomendados) * max(len(self.sentimientos), 1) + sentimientos
+
+    def tramos(self, anio, recomendado, sentimientos):
+        '''
+        Devuelve los tramos [desde, hasta) de las filas del año, la recomendación y los sentimientos dados.
+        '''
+        posiciones = np.searchsorted(self.sentimientos, sentimientos)
+        presentes = [p for p, valor in zip(posiciones, sentimientos)
+                     if p < len(self.sentimientos) and self.sentimientos[p] == valor]
+        buscadas = self._combinar(int(anio), bool(recomendado), np.unique(np.asarray(presentes, dtype=np.int64)))
+        desde = np.searchsorted(self.claves, buscadas, side='left')
+        hasta = np.searchsorted(self.claves, buscadas, side='right')
+
+        # Se juntan los tramos que quedan uno a continuación del otro
+        tramos = []
+        for d, h in zip(desde.tolist(), hasta.tolist()):
+            if tramos and tramos[-1][1] == d:
+                tramos[-1] = (tramos[-1][0], h)
+            elif h > d:
+                tramos.append((d, h))
+        return tramos
+
+    def top(self, anio, recomendado, sentimientos, cantidad=3):
+        '''
+        Devuelve los nombres de los juegos con más reseñas en los tramos del año, la recomendación
+        y los sentimientos dados.
+        '''
+        tramos = self.tramos(anio, recomendado, sentimientos)
+        if not tramos:
+            return []
+        if len(tramos) == 1:
+            codigos = self.codigos[tramos[0][0]:tramos[0][1]]
+            cantidades = self.cantidades[tramos[0][0]:tramos[0][1]]
+        else:
+            codigos = np.concatenate([self.codigos[d:h] for d, h in tramos])
+            cantidades = np.concatenate([self.cantidades[d:h] for d, h in tramos])
+
+        # Reseñas por juego, indexadas por posición en el orden alfabético
+        por_juego = np.bincount(codigos, weights=cantidades)
+        presentes = np.count_nonzero(por_juego)
+        if presentes <= cantidad:
+            candidatos = np.flatnonzero(por_juego)
+        else:
+            # Los juegos con al menos tantas reseñas como el puesto 'cantidad' (incluye los empates)
+            corte = np.partition(por_juego, len(por_juego) - cantidad)[len(por_juego) - cantidad]
+            candidatos = np.flatnonzero(por_juego >= corte)
+
+        # De mayor a menor cantidad; ante empates queda primero el nombre que va antes alfabéticamente
+        elegidos = candidatos[np.lexsort((candidatos, -por_juego[candidatos]))[:cantidad]]
+        return self.juegos[elegidos].tolist()
+
+
+class OrdenSentimiento:
+    '''
+    Tabla de sentimiento ordenada por (release_anio, sentiment_analysis), guardada en arreglos
+    de NumPy: las filas de un año son el tramo que devuelve np.searchsorted sobre 'anios'.
+    '''
+
+    def __init__(self, sentimiento):
+        anios = sentimiento.index.get_level_values('release_anio').to_numpy(dtype=np.int64)
+        valores = sentimiento.index.get_level_values('sentiment_analysis').to_numpy(dtype=np.int64)
+        orden = np.lexsort((valores, anios))
+        self.anios = anios[orden]
+        self.valores = valores[orden]
+        self.cantidades = sentimiento.to_numpy(dtype=np.int64)[orden]
+
+    def del_anio(self, anio):
+        desde, hasta = np.searchsorted(self.anios, [anio, anio + 1])
+        return dict(zip(self.valores[desde:hasta].tolist(), self.cantidades[desde:hasta].tolist()))
+
+
+def _filtrable(tabla, nombre):
+    '''
+    Devuelve la tabla de agregados como DataFrame plano (claves y valor 'nombre' como columnas) con sus filtros.
+    '''
+    df = tabla.rename(nombre).reset_index()
+    return filtros.TablaFiltrable(df, {clave: tipos_claves[clave] for clave in tabla.index.names if clave in tipos_claves})
+
+
+def _vacio(claves, dtype):
+    '''
+    Devuelve una tabla de agregados sin filas con las claves dadas.
+    '''
+    return pd.Series([], dtype=dtype, index=pd.MultiIndex.from_arrays([[]] * len(claves), names=claves))
+
+
+def _compactar(parciales, claves):
+    '''
+    Junta los agregados parciales de varios lotes en uno solo, sumando por clave.
+    '''
+    return pd.concat(parciales).groupby(level=claves).sum()
+
+
+def _agrupar(lote, claves, columna=None):
+    '''
+    Agrega un lote por las claves dadas (suma de 'columna' o cantidad de filas si es None).
+
+    Los niveles categóricos del resultado se pasan a object para que los parciales de lotes
+    con categorías distintas se puedan juntar.
+    '''
+    grupos = lote.groupby(claves, observed=True, sort=False)
+    parcial = grupos.size() if columna is None else grupos[columna].sum()
+    niveles = [nivel.astype(object) if isinstance(nivel, pd.CategoricalIndex) else nivel for nivel in parcial.index.levels]
+    return parcial.set_axis(parcial.index.set_levels(niveles))
+
+
+class AcumuladorAgregados:
+    '''
+    Acumula las tablas de agregados lote por lote. La memoria usada depende de la cantidad de
+    grupos de cada tabla y no de la cantidad de filas recibidas.
+
+    Parameters:
+        compactar_cada (int): Cada cuántos lotes se juntan los agregados parciales.
+    '''
+
+    def __init__(self, compactar_cada=32):
+        self.compactar_cada = compactar_cada
+        self.filas = 0
+        self._lotes = 0
+        self._parciales = {'playtime': [], 'resenas': [], 'sentimiento': []}
+
+    def agregar(self, lote):
+        '''
+        Suma un lote (pandas.DataFrame con las columnas de 'columnas_agregados') a los agregados.
+        '''
+        self.filas += len(lote)
+        self._lotes += 1
+
+        self._parciales['playtime'].append(_agrupar(lote, claves_playtime, 'playtime_forever'))
+        self._parciales['resenas'].append(_agrupar(lote, claves_resenas))
+        self._parciales['sentimiento'].append(_agrupar(lote, claves_sentimiento))
+
+        if self._lotes % self.compactar_cada == 0:
+            self._parciales = {
+                'playtime': [_compactar(self._parciales['playtime'], claves_playtime)],
+                'resenas': [_compactar(self._parciales['resenas'], claves_resenas)],
+                'sentimiento': [_compactar(self._parciales['sentimiento'], claves_sentimiento)],
+            }
+
+    def resultado(self):
+        '''
+        Devuelve las tablas de agregados de todos los lotes recibidos.
+        '''
+        if self.filas == 0:
+            return Agregados(_vacio(claves_playtime, 'float64'), _vacio(claves_resenas, 'int64').rename('count'),
+                             _vacio(claves_sentimiento, 'int64'), 0)
+
+        playtime = _compactar(self._parciales['playtime'], claves_playtime).sort_index()
+        resenas = _compactar(self._parciales['resenas'], claves_resenas).rename('count').sort_index()
+        sentimiento = _compactar(self._parciales['sentimiento'], claves_sentimiento).sort_index()
+
+        return Agregados(playtime, resenas, sentimiento, self.filas)
+
+
+def construir_agregados(path, batch_size=65536, compactar_cada=32):
+    '''
+    Recorre todos los grupos de filas del archivo Parquet por lotes y acumula sólo los agregados
+    que necesitan las consultas.
+
+    Parameters:
+        path (str): Ruta del archivo Parquet.
+        batch_size (int): Cantidad de filas por lote leído.
+        compactar_cada (int): Cada cuántos lotes se juntan los agregados parciales.
+
+    Returns:
+        Agregados: Las tablas de agregados sobre el archivo completo.
+    '''
+    parquet_file = pq.ParquetFile(path)
+    acumulador = AcumuladorAgregados(compactar_cada)
+
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columnas_agregados):
+        acumulador.agregar(batch.to_pandas())
+
+    return acumulador.resultado()
+
+
+class TablaUsuariosGenero:
+    '''
+    Resultado precalculado de UserForGenre para todos los géneros, guardado en arreglos.
+
+    Para el género en la posición i de 'generos', los tramos [limites_usuario[i], limites_usuario[i + 1])
+    de anios_usuario/horas_usuario tienen el desglose por año del usuario con más horas y los tramos
+    [limites[i], limites[i + 1]) de anios/horas tienen las horas acumuladas por año de todo el género.
+
+    Attributes:
+        generos (pandas.Index): Géneros con datos.
+        usuario_top (numpy.ndarray): user_id con más horas jugadas de cada género.
+        anios_usuario, horas_usuario, limites_usuario (numpy.ndarray): Desglose por año del usuario top.
+        anios, horas, limites (numpy.ndarray): Horas acumuladas por año de cada género.
+    '''
+
+    def __init__(self, generos, usuario_top, anios_usuario, horas_usuario, limites_usuario, anios, horas, limites):
+        self.generos = generos
+        self.usuario_top = usuario_top
+        self.anios_usuario = anios_usuario
+        self.horas_usuario = horas_usuario
+        self.limites_usuario = limites_usuario
+        self.anios = anios
+        self.horas = horas
+        self.limites = limites
+
+    def __contains__(self, genero):
+        return genero in self.generos
+
+    def resultado(self, genero):
+        '''
+        Devuelve el resultado guardado para el género, o None si el género no tiene datos.
+
+        Returns:
+            tuple: (user_id, años del usuario, horas del usuario, años del género, horas del género),
+            con los años y horas como arreglos de NumPy ordenados por año.
+        '''
+        if genero not in self.generos:
+            return None
+        i = self.generos.get_loc(genero)
+        desde_u, hasta_u = self.limites_usuario[i], self.limites_usuario[i + 1]
+        desde, hasta = self.limites[i], self.limites[i + 1]
+        return (self.usuario_top[i], self.anios_usuario[desde_u:hasta_u], self.horas_usuario[desde_u:hasta_u],
+                self.anios[desde:hasta], self.horas[desde:hasta])
+
+
+def construir_usuarios_genero(df):
+    '''
+    Calcula en una sola pasada agrupada, para cada género, el usuario con más horas jugadas
+    (con su desglose por año) y las horas acumuladas por año.
+
+    Se consideran las filas con release_anio válido (>= 100) y las horas son playtime_forever / 60,
+    igual que en la consulta UserForGenre. Ante empates en horas se elige el user_id que va primero
+    alfabéticamente.
+
+    Parameters:
+        df (pandas.DataFrame): DataFrame con las columnas 'genres', 'user_id', 'release_anio' y 'playtime_forever'.
+
+    Returns:
+        TablaUsuariosGenero: Los resultados de todos los géneros.
+    '''
+    anio = pd.to_numeric(df['release_anio'], errors='coerce')
+    validas = (anio >= 100).fillna(False).to_numpy(dtype=bool)
+
+    datos = pd.DataFrame({
+        'genres': df['genres'].to_numpy()[validas],
+        'user_id': df['user_id'].to_numpy()[validas],
+        'anio': anio.to_numpy()[validas].astype('int64'),
+        'horas': df['playtime_forever'].to_numpy()[validas] / 60,
+    })
+
+    # Horas por (género, usuario, año): la única agrupación sobre las filas
+    por_usuario_anio = datos.groupby(['genres', 'user_id', 'anio'], observed=True)['horas'].sum().reset_index()
+
+    # Usuario top de cada género: mayor total; ante empates, el primero alfabéticamente
+    por_usuario = por_usuario_anio.groupby(['genres', 'user_id'], observed=True)['horas'].sum().reset_index()
+    por_usuario = por_usuario.sort_values(['genres', 'horas', 'user_id'], ascending=[True, False, True], kind='stable')
+    top = por_usuario.drop_duplicates(subset='genres').set_index('genres')['user_id']
+
+    # Desglose por año del usuario top de cada género
+    desglose = por_usuario_anio.merge(top.reset_index(), on=['genres', 'user_id']).sort_values(['genres', 'anio'])
+
+    # Horas acumuladas por año de cada género
+    por_anio = por_usuario_anio.groupby(['genres', 'anio'], observed=True)['horas'].sum().reset_index()
+
+    generos = pd.Index(top.index.astype(str))
+    limites_usuario = np.searchsorted(desglose['genres'].astype(str).to_numpy(), generos.to_numpy(), side='left')
+    limites = np.searchsorted(por_anio['genres'].astype(str).to_numpy(), generos.to_numpy(), side='left')
+
+    return TablaUsuariosGenero(
+        generos,
+        top.to_numpy(dtype=object),
+        desglose['anio'].to_numpy(dtype=np.int32),
+        desglose['horas'].to_numpy(dtype=np.float64),
+        np.append(limites_usuario, len(desglose)),
+        por_anio['anio'].to_numpy(dtype=np.int32),
+        por_anio['horas'].to_numpy(dtype=np.float64),
+        np.append(limites, len(por_anio)),
+    )
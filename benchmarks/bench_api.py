@@ -0,0 +1,252 @@
+'''
+Benchmark de todos los endpoints de la API (main.py) sobre datos sintéticos a varias escalas.
+
+Para cada escala (1x = las 4.069.444 filas de data_export_api_gzip.parquet) genera por lotes un
+Parquet con el esquema de la API (benchmarks/datos_sinteticos.py: géneros con la frecuencia del
+catálogo, años concentrados en los recientes, juegos y usuarios con distribución de Zipf) y lo
+mide en un proceso aparte, para que la memoria de una escala no se mezcle con la de otra:
+
+- arranque: importar main.py y cargar los datos hasta que todos los componentes estén listos;
+- memoria: RSS al terminar la carga y máximo (VmHWM) del proceso;
+- por endpoint: latencia p50/p95/p99 y consultas por segundo, con las consultas hechas a la app
+  ASGI en el mismo proceso (httpx.ASGITransport, sin red ni servidor).
+
+Por defecto la cache de respuestas se desactiva para medir el cálculo de cada consulta (--cache
+para medirla como en producción). La configuración de la API se toma de las variables de entorno
+(SAMPLE_PERCENT, MODO_CONSULTAS, BUSQUEDA_VECINOS, ...) y se guarda junto a los resultados:
+
+    python benchmarks/bench_api.py --guardar base.json
+    SAMPLE_PERCENT=50 python benchmarks/bench_api.py --comparar base.json
+
+--comparar muestra la variación de cada medida contra el archivo y termina con código 1 si alguna
+empeora más que --tolerancia. Con --datos los archivos generados se guardan para las corridas
+siguientes (con la misma semilla son idénticos).
+
+Uso:
+    python benchmarks/bench_api.py --escalas 1 10 100
+    python benchmarks/bench_api.py --filas-base 40000 --escalas 1 10 100 --consultas 100
+'''
+# Importaciones
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, raiz)
+
+from datos_sinteticos import escribir_datos, filas_originales, generos_frecuencia
+
+
+# Variables de entorno de la API que cambian los resultados
+variables_api = ['SAMPLE_PERCENT', 'MODO_CONSULTAS', 'BUSQUEDA_VECINOS', 'IVF_LISTAS', 'IVF_SONDEOS',
+                 'CPU_WORKERS', 'CACHE_MAX_ENTRADAS', 'SNAPSHOT_PATH']
+
+# Medidas que se comparan con la base y si mayor es mejor
+medidas_arranque = {'arranque_s': False, 'rss_mib': False, 'rss_max_mib': False}
+medidas_endpoint = {'p50_ms': False, 'p95_ms': False, 'p99_ms': False, 'qps': True}
+
+
+def tamanio_catalogo(filas):
+    '''
+    Juegos y usuarios para una cantidad de filas: los usuarios crecen con las filas (unos 25.000 en
+    la escala 1x) y los juegos con su raíz cuadrada (unos 10.000 en la escala 1x).
+    '''
+    proporcion = filas / filas_originales
+    return max(1_000, round(10_000 * math.sqrt(proporcion))), max(1_000, round(25_000 * proporcion))
+
+
+def memoria_proceso():
+    '''
+    Devuelve (RSS, RSS máximo) del proceso actual en MiB, desde /proc/self/status.
+    '''
+    valores = {}
+    with open('/proc/self/status') as f:
+        for linea in f:
+            if linea.startswith(('VmRSS:', 'VmHWM:')):
+                clave, kb = linea.split()[:2]
+                valores[clave[:-1]] = int(kb) / 1024
+    return valores['VmRSS'], valores['VmHWM']
+
+
+async def medir_endpoint(cliente, urls, consultas, metodo='GET', cuerpos=None):
+    '''
+    Hace 'consultas' consultas recorriendo las URLs y devuelve las medidas de latencia y throughput.
+    '''
+    latencias, errores = [], 0
+    inicio_total = time.perf_counter()
+    for i in range(consultas):
+        inicio = time.perf_counter()
+        if metodo == 'GET':
+            respuesta = await cliente.get(urls[i % len(urls)])
+        else:
+            respuesta = await cliente.post(urls[i % len(urls)], json=cuerpos[i % len(cuerpos)])
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        # 404 es una respuesta válida (género o año sin datos)
+        errores += respuesta.status_code not in (200, 404)
+    segundos = time.perf_counter() - inicio_total
+    p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+    return {'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99, 'qps': consultas / segundos, 'errores': errores}
+
+
+async def medir_api(path, consultas, semilla):
+    '''
+    Corre en el proceso hijo: carga la API sobre 'path' y mide el arranque, la memoria y los endpoints.
+    '''
+    import httpx
+
+    inicio = time.perf_counter()
+    import main as api
+
+    # Datos sintéticos, sin snapshot, tabla de vecinos ni modelo usuario-juego precalculados
+    api.parquet_gzip_file_path = path
+    api.snapshot_file_path = f'{path}.sin_snapshot'
+    api.topk_file_path = f'{path}.sin_topk.npz'
+    api.colaborativo_path = f'{path}.sin_colaborativo'
+
+    async with api.app.router.lifespan_context(api.app):
+        while not api.datos_api.estado.listo():
+            if api.datos_api.estado.error is not None:
+                raise RuntimeError(api.datos_api.estado.error)
+            await asyncio.sleep(0.01)
+        arranque = time.perf_counter() - inicio
+        rss, rss_max = memoria_proceso()
+
+        rng = np.random.default_rng(semilla)
+        generos = list(generos_frecuencia)
+        item_ids = rng.choice(api.datos_api.tabla_vecinos.item_ids, 200).tolist()
+        user_ids = rng.choice(api.datos_api.modelo_colaborativo.user_ids, 200).tolist()
+        endpoints = {
+            'PlayTimeGenre': [f'/PlayTimeGenre/{g}' for g in generos],
+            'UserForGenre': [f'/UserForGenre/{g}' for g in generos],
+            'UsersRecommend': [f'/UsersRecommend/{a}' for a in range(2010, 2016)],
+            'UsersNotRecommend': [f'/UsersNotRecommend/{a}' for a in range(2010, 2016)],
+            'sentiment_analysis': [f'/sentiment_analysis/{a}' for a in range(2000, 2019)],
+            'recomendacion_juego': [f'/recomendacion_juego/{i}' for i in item_ids],
+            'recomendacion_usuario': [f'/recomendacion_usuario/{u}' for u in user_ids],
+        }
+
+        transporte = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transporte, base_url='http://bench') as cliente:
+            resultados = {nombre: await medir_endpoint(cliente, urls, consultas) for nombre, urls in endpoints.items()}
+
+    return {'arranque_s': arranque, 'rss_mib': rss, 'rss_max_mib': rss_max, 'endpoints': resultados}
+
+
+def medir_escala(path, consultas, semilla, cache):
+    '''
+    Mide una escala en un proceso aparte y devuelve sus resultados.
+    '''
+    entorno = dict(os.environ)
+    if not cache:
+        entorno['CACHE_MAX_ENTRADAS'] = '0'
+    salida = subprocess.run([sys.executable, os.path.abspath(__file__), '--hijo', path, '--consultas', str(consultas),
+                             '--semilla', str(semilla)],
+                            cwd=raiz, env=entorno, capture_output=True, text=True)
+    if salida.returncode != 0:
+        raise RuntimeError(f'La medición de {path} terminó con error:\n{salida.stderr}')
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def imprimir(escala, filas, resultado):
+    print(f"\nescala {escala:g}x: {filas} filas, arranque {resultado['arranque_s']:.2f} s, "
+          f"RSS {resultado['rss_mib']:.0f} MiB (máximo {resultado['rss_max_mib']:.0f} MiB)")
+    print(f"  {'endpoint':<22} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'consultas/s':>12} {'errores':>8}")
+    for nombre, medidas in resultado['endpoints'].items():
+        print(f"  {nombre:<22} {medidas['p50_ms']:>8.2f} {medidas['p95_ms']:>8.2f} {medidas['p99_ms']:>8.2f} "
+              f"{medidas['qps']:>12.0f} {medidas['errores']:>8}")
+
+
+def comparar(base, actual, tolerancia):
+    '''
+    Imprime la variación de cada medida contra la base y devuelve la lista de las que empeoraron
+    más que la tolerancia (como fracción, por ejemplo 0.2 = 20%).
+    '''
+    empeoradas = []
+    print(f"\nComparación contra la base ({base['fecha']}, config {base['config']})")
+    print(f"  {'escala':<7} {'medida':<36} {'base':>10} {'actual':>10} {'variación':>10}")
+    for escala, resultado in actual['escalas'].items():
+        if escala not in base['escalas']:
+            continue
+        referencia = base['escalas'][escala]
+        pares = [(nombre, referencia[nombre], resultado[nombre], mayor) for nombre, mayor in medidas_arranque.items()]
+        for endpoint, medidas in resultado['endpoints'].items():
+            if endpoint in referencia['endpoints']:
+                pares += [(f'{endpoint} {nombre}', referencia['endpoints'][endpoint][nombre], medidas[nombre], mayor)
+                          for nombre, mayor in medidas_endpoint.items()]
+        for nombre, antes, ahora, mayor_es_mejor in pares:
+            variacion = (ahora - antes) / antes if antes else 0.0
+            peor = -variacion if mayor_es_mejor else variacion
+            marca = ' <-' if peor > tolerancia else ''
+            if marca:
+                empeoradas.append(f'{escala}x {nombre}')
+            print(f'  {escala + "x":<7} {nombre:<36} {antes:>10.2f} {ahora:>10.2f} {variacion:>+9.0%}{marca}')
+    return empeoradas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=float, nargs='+', default=[1, 10, 100], help='Múltiplos de las filas base')
+    parser.add_argument('--filas-base', type=int, default=filas_originales, help='Filas de la escala 1x')
+    parser.add_argument('--consultas', type=int, default=200, help='Consultas por endpoint')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--cache', action='store_true', help='Medir con la cache de respuestas activa')
+    parser.add_argument('--datos', help='Directorio donde guardar (y reutilizar) los archivos generados')
+    parser.add_argument('--guardar', help='Guardar los resultados como base en este archivo JSON')
+    parser.add_argument('--comparar', help='Comparar contra una base guardada con --guardar')
+    parser.add_argument('--tolerancia', type=float, default=0.2, help='Empeoramiento admitido al comparar (0.2 = 20%%)')
+    parser.add_argument('--hijo', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        print(json.dumps(asyncio.run(medir_api(args.hijo, args.consultas, args.semilla))))
+        return
+
+    config = {variable: os.environ[variable] for variable in variables_api if variable in os.environ}
+    config['cache'] = args.cache
+    resultados = {'fecha': time.strftime('%Y-%m-%d %H:%M:%S'), 'python': platform.python_version(),
+                  'cpus': os.cpu_count(), 'config': config, 'consultas': args.consultas, 'escalas': {}}
+
+    with tempfile.TemporaryDirectory() as temporal:
+        directorio = args.datos or temporal
+        os.makedirs(directorio, exist_ok=True)
+        for escala in args.escalas:
+            filas = round(args.filas_base * escala)
+            juegos, usuarios = tamanio_catalogo(filas)
+            path = os.path.join(directorio, f'api_{filas}_{args.semilla}.parquet')
+            if not os.path.exists(path):
+                inicio = time.perf_counter()
+                escribir_datos(f'{path}.tmp', filas, juegos, usuarios, semilla=args.semilla)
+                os.replace(f'{path}.tmp', path)
+                print(f'{path}: {filas} filas, {juegos} juegos, {usuarios} usuarios '
+                      f'generados en {time.perf_counter() - inicio:.1f} s')
+
+            resultado = medir_escala(path, args.consultas, args.semilla, args.cache)
+            resultado['filas'] = filas
+            resultados['escalas'][f'{escala:g}'] = resultado
+            imprimir(escala, filas, resultado)
+
+    if args.guardar:
+        with open(args.guardar, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+        print(f'\nResultados guardados en {args.guardar}')
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            base = json.load(f)
+        empeoradas = comparar(base, resultados, args.tolerancia)
+        if empeoradas:
+            print(f"\nEmpeoraron más de {args.tolerancia:.0%}: {', '.join(empeoradas)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
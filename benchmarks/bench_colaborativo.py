@@ -0,0 +1,102 @@
+'''
+Mide el modelo usuario-juego de /recomendacion_usuario (colaborativo.py) sobre datos sintéticos
+de varios tamaños:
+
+- entrenamiento offline: armado de la matriz dispersa usuarios x juegos y SVD truncada;
+- carga: abrir el modelo guardado con los arreglos mapeados en memoria (lo que hace la API al iniciar);
+- consultas: latencia p50/p99 de recomendar() (producto matriz-vector + argpartition) comparada
+  con ordenar todos los puntajes con argsort.
+
+Verifica que ambos devuelvan los mismos juegos y que ninguno sea de los que el usuario ya tiene.
+
+Uso:
+    python benchmarks/bench_colaborativo.py --filas 1000000 4000000 --factores 64
+'''
+# Importaciones
+import argparse
+import functools
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import colaborativo
+from datos_sinteticos import generar_datos
+
+
+def recomendar_ordenando(modelo, user_id, cantidad=5):
+    '''
+    Igual que ModeloColaborativo.recomendar, pero ordenando todos los puntajes.
+    '''
+    puntajes = modelo.factores_juegos @ modelo.factores_usuarios[modelo._posiciones[user_id]]
+    puntajes[modelo.poseidos(user_id)] = -np.inf
+    orden = np.argsort(-puntajes, kind='stable')[:cantidad]
+    return [int(modelo.item_ids[i]) for i in orden if puntajes[i] > -np.inf]
+
+
+def medir(funcion, argumentos):
+    tiempos = []
+    for argumento in argumentos:
+        inicio = time.perf_counter()
+        funcion(argumento)
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+    return np.percentile(tiempos, 50), np.percentile(tiempos, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[1_000_000, 4_000_000])
+    parser.add_argument('--juegos', type=int, default=30_000)
+    parser.add_argument('--usuarios', type=int, default=100_000)
+    parser.add_argument('--factores', type=int, default=colaborativo.factores_por_defecto)
+    parser.add_argument('--consultas', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f'{args.juegos} juegos, {args.usuarios} usuarios, {args.factores} factores\n')
+    print(f"{'filas':>9} {'pares':>9} {'matriz':>8} {'svd':>8} {'carga':>8} {'modelo':>8} "
+          f"{'argpartition p50':>17} {'p99':>7} {'argsort p50':>12} {'p99':>7}")
+
+    for filas in args.filas:
+        df = generar_datos(filas, juegos=args.juegos, usuarios=args.usuarios)
+
+        inicio = time.perf_counter()
+        user_ids, item_ids, nombres, matriz = colaborativo.matriz_usuarios_juegos(df)
+        segundos_matriz = time.perf_counter() - inicio
+        del df
+
+        inicio = time.perf_counter()
+        entrenado = colaborativo.entrenar_matriz(user_ids, item_ids, nombres, matriz, factores=args.factores)
+        segundos_svd = time.perf_counter() - inicio
+
+        with tempfile.TemporaryDirectory() as directorio:
+            path = os.path.join(directorio, 'modelo')
+            entrenado.guardar(path)
+            del entrenado
+
+            inicio = time.perf_counter()
+            modelo = colaborativo.cargar_modelo(path)
+            segundos_carga = time.perf_counter() - inicio
+            bytes_modelo = sum(os.path.getsize(os.path.join(path, archivo)) for archivo in os.listdir(path))
+
+            usuarios = np.random.default_rng(0).choice(modelo.user_ids, args.consultas).tolist()
+            for user_id in usuarios[:200]:
+                recomendados = [item_id for item_id, _, _ in modelo.recomendar(user_id)]
+                assert recomendados == recomendar_ordenando(modelo, user_id), user_id
+                assert not set(recomendados) & set(modelo.item_ids[modelo.poseidos(user_id)].tolist()), user_id
+
+            p50, p99 = medir(modelo.recomendar, usuarios)
+            o50, o99 = medir(functools.partial(recomendar_ordenando, modelo), usuarios)
+            del modelo
+
+        print(f'{filas:>9} {matriz.nnz:>9} {segundos_matriz:>7.1f}s {segundos_svd:>7.1f}s {segundos_carga * 1000:>6.1f}ms '
+              f'{bytes_modelo / 2**20:>5.1f}MiB {p50:>15.0f}us {p99:>5.0f}us {o50:>10.0f}us {o99:>5.0f}us')
+
+    print('\nMismos juegos con argpartition y con argsort, sin juegos que el usuario ya tiene')
+
+
+if __name__ == '__main__':
+    main()
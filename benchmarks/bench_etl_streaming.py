@@ -0,0 +1,192 @@
+'''
+Genera dumps sintéticos con el formato de los originales de Steam (output_steam_games.json en JSON y
+australian_user_reviews.json / australian_users_items.json con sintaxis de Python, un registro por
+línea), corre JupyterNotebooks/etl_streaming.py con distintos tamaños de lote y reporta el tiempo y la
+memoria máxima (RSS) de cada corrida.
+
+También verifica que el Parquet de la API tenga las mismas filas que el proceso en memoria de los
+notebooks (cargar todo, desanidar, unir), que cada grupo de filas tenga un solo género y que las filas
+repartidas por género que esperan ser escritas nunca superen las filas por lote.
+
+Uso:
+    python benchmarks/bench_etl_streaming.py --usuarios 20000 --lotes 20000 100000 1000000
+'''
+# Importaciones
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from datos_sinteticos import generos_frecuencia, palabras
+
+
+resenas_ejemplo = ['Great game, really fun with friends', 'Terrible, waste of money', 'It is ok',
+                   'Best game ever!!', 'boring and buggy', 'Amazing story and graphics', '']
+meses = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October',
+         'November', 'December']
+
+
+def generar_dumps(directorio, usuarios, juegos=5_000, items_por_usuario=50, semilla=0):
+    '''
+    Escribe los tres dumps sintéticos en 'directorio'. Incluye usuarios repetidos, juegos sin id,
+    fechas sin año y precios no numéricos, como los archivos originales; en los items, algunos
+    usuarios repetidos tienen registros distintos (el notebook conserva las filas de ambos).
+    '''
+    rng = np.random.default_rng(semilla)
+    generos = list(generos_frecuencia)
+    probabilidades = np.array(list(generos_frecuencia.values()), dtype=float)
+    probabilidades /= probabilidades.sum()
+
+    nombres = [' '.join(rng.choice(palabras, rng.integers(1, 4))) for _ in range(juegos)]
+    with open(os.path.join(directorio, 'output_steam_games.json'), 'w', encoding='utf-8') as f:
+        for _ in range(juegos // 10):
+            f.write(json.dumps({'publisher': None, 'genres': None, 'app_name': None, 'id': None}) + '\n')
+        for i in range(juegos):
+            fecha = f'{rng.integers(1995, 2018)}-{rng.integers(1, 13):02d}-{rng.integers(1, 29):02d}'
+            juego = {
+                'publisher': 'Estudio' if rng.random() < 0.8 else None,
+                'genres': list(rng.choice(generos, rng.integers(1, 4), replace=False, p=probabilidades)),
+                'app_name': nombres[i], 'title': nombres[i], 'url': 'http://store.steampowered.com/app/',
+                'release_date': fecha if rng.random() < 0.95 else 'Soon..',
+                'tags': ['Indie'], 'reviews_url': '', 'specs': ['Single-player'],
+                'price': str(round(rng.random() * 60, 2)) if rng.random() < 0.8 else 'Free to Play',
+                'early_access': False, 'id': str(10 + i), 'developer': 'Estudio',
+            }
+            f.write(json.dumps(juego) + '\n')
+
+    with open(os.path.join(directorio, 'australian_user_reviews.json'), 'w', encoding='utf-8') as f:
+        for u in range(usuarios):
+            resenas = []
+            for _ in range(rng.integers(0, 4)):
+                anio = f', {rng.integers(2010, 2016)}' if rng.random() < 0.85 else ''
+                resenas.append({'funny': '', 'posted': f'Posted {rng.choice(meses)} {rng.integers(1, 29)}{anio}.',
+                                'last_edited': '', 'item_id': str(10 + rng.integers(juegos)),
+                                'helpful': 'No ratings yet', 'recommend': bool(rng.random() < 0.8),
+                                'review': str(rng.choice(resenas_ejemplo))})
+            linea = repr({'user_id': f'user{u}', 'user_url': f'http://steamcommunity.com/id/user{u}', 'reviews': resenas})
+            f.write(linea + '\n')
+            if rng.random() < 0.01:
+                f.write(linea + '\n')
+
+    with open(os.path.join(directorio, 'australian_users_items.json'), 'w', encoding='utf-8') as f:
+        for u in range(usuarios):
+            ids = rng.integers(juegos + 50, size=rng.poisson(items_por_usuario))
+            items = [{'item_id': str(10 + i), 'item_name': nombres[i] if i < juegos else 'Desconocido',
+                      'playtime_forever': int(rng.integers(0, 5000)), 'playtime_2weeks': 0} for i in ids]
+            linea = repr({'user_id': f'user{u}', 'items_count': len(items), 'steam_id': str(7656 + u),
+                          'user_url': f'http://steamcommunity.com/id/user{u}', 'items': items})
+            f.write(linea + '\n')
+            if rng.random() < 0.01:
+                f.write(linea + '\n')
+            elif rng.random() < 0.01:
+                # Mismo usuario con otro registro: comparte algunas filas y cambia otras
+                otros = items[:len(items) // 2] + [{**item, 'playtime_2weeks': 1} for item in items[len(items) // 2:]]
+                f.write(repr({'user_id': f'user{u}', 'items_count': len(otros), 'steam_id': str(7656 + u),
+                              'user_url': f'http://steamcommunity.com/id/user{u}', 'items': otros}) + '\n')
+
+
+def correr_etl(directorio, destino, filas_lote):
+    '''
+    Corre el ETL en un proceso aparte y devuelve (segundos, RSS máximo en MB, máximo de filas por
+    género en memoria) de ese proceso.
+    '''
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen([sys.executable, 'etl_streaming.py', '--datos', directorio, '--destino', destino,
+                                '--filas-lote', str(filas_lote), '--workers', '0'],
+                               cwd=os.path.join(raiz, 'JupyterNotebooks'), stdout=subprocess.PIPE, text=True)
+    salida = proceso.stdout.read()
+    _, estado, uso = os.wait4(proceso.pid, 0)
+    if os.waitstatus_to_exitcode(estado) != 0:
+        raise RuntimeError(f'El ETL terminó con error (filas_lote={filas_lote})')
+    pendientes = int(re.search(r'Filas por género en memoria como máximo: (\d+)', salida).group(1))
+    return time.perf_counter() - inicio, uso.ru_maxrss / 1024, pendientes
+
+
+def referencia_en_memoria(directorio):
+    '''
+    Versión en memoria del ETL (lo que hacen los notebooks) sobre los dumps sintéticos, para comparar.
+    '''
+    sys.path.insert(0, os.path.join(raiz, 'JupyterNotebooks'))
+    import etl_streaming
+    import utils
+
+    juegos = pd.read_json(os.path.join(directorio, 'output_steam_games.json'), lines=True).dropna(how='all')
+    juegos['id'] = pd.to_numeric(juegos['id'], errors='coerce')
+    juegos = juegos.dropna(subset=['id']).drop_duplicates(subset='id')
+    juegos['release_anio'] = pd.to_numeric(juegos['release_date'].apply(utils.extract_anio_release), errors='coerce')
+    juegos = juegos.explode('genres').dropna(subset=['genres', 'release_anio'])
+    juegos = pd.DataFrame({'item_id': juegos['id'].astype('int64'), 'genres': juegos['genres'].str.title(),
+                           'release_anio': juegos['release_anio'].astype('int64')})
+
+    def leer(nombre):
+        return list(etl_streaming.leer_registros(os.path.join(directorio, nombre), etl_streaming.ast.literal_eval))
+
+    # 01_ETL_User_Reviews descarta los usuarios repetidos; 01_ETL_User_Items, las filas repetidas
+    resenas = pd.DataFrame(leer('australian_user_reviews.json')).drop_duplicates(subset='user_id', keep='first')
+    resenas = pd.json_normalize(resenas.to_dict('records'), record_path='reviews',
+                                meta=['user_id'], record_prefix='reviews_').replace('', None)
+    resenas = resenas.dropna(subset=['reviews_review'])
+    resenas['sentiment_analysis'] = resenas['reviews_review'].apply(utils.sentiment_analysis)
+    resenas['reviews_anio'] = pd.to_datetime(resenas['reviews_posted'].apply(utils.date_converter), errors='coerce').dt.year
+    resenas = resenas.drop_duplicates(subset='user_id')[['user_id', 'sentiment_analysis', 'reviews_recommend', 'reviews_anio']]
+
+    items = pd.json_normalize(leer('australian_users_items.json'), record_path='items',
+                              meta=['steam_id', 'items_count', 'user_id', 'user_url'])
+    items = items.drop_duplicates(keep='first').drop(columns='playtime_2weeks')
+    items['item_id'] = pd.to_numeric(items['item_id'])
+    items['item_name'] = items['item_name'].str.title()
+
+    df = items.merge(resenas, on='user_id').merge(juegos, on='item_id').dropna()
+    return df.astype({'reviews_anio': 'int64', 'playtime_forever': 'float64', 'sentiment_analysis': 'int64'})
+
+
+def ordenar(df):
+    columnas = ['genres', 'release_anio', 'user_id', 'item_id', 'item_name', 'playtime_forever',
+                'sentiment_analysis', 'reviews_recommend', 'reviews_anio']
+    return df[columnas].sort_values(columnas).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--usuarios', type=int, default=20_000)
+    parser.add_argument('--items-por-usuario', type=int, default=50)
+    parser.add_argument('--lotes', type=int, nargs='+', default=[20_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        generar_dumps(directorio, args.usuarios, items_por_usuario=args.items_por_usuario)
+        megas = sum(os.path.getsize(os.path.join(directorio, f)) for f in os.listdir(directorio)) / 2**20
+        print(f'Dumps sintéticos: {args.usuarios} usuarios, {megas:.0f} MB\n')
+
+        print(f"{'filas por lote':>14} {'segundos':>9} {'RSS máx (MB)':>13} {'grupos':>7} {'filas por género en memoria':>28}")
+        destino = os.path.join(directorio, 'api.parquet')
+        for filas_lote in args.lotes:
+            segundos, rss, pendientes = correr_etl(directorio, destino, filas_lote)
+            archivo = pq.ParquetFile(destino)
+            print(f'{filas_lote:>14} {segundos:>9.1f} {rss:>13.0f} {archivo.num_row_groups:>7} {pendientes:>28}')
+            assert pendientes <= filas_lote, (pendientes, filas_lote)
+
+        # Cada grupo de filas tiene un solo género (mínimo == máximo)
+        columna = archivo.schema_arrow.get_field_index('genres')
+        for i in range(archivo.num_row_groups):
+            estadisticas = archivo.metadata.row_group(i).column(columna).statistics
+            assert estadisticas.min == estadisticas.max, f'El grupo {i} mezcla géneros'
+
+        streaming = ordenar(pd.read_parquet(destino))
+        esperado = ordenar(referencia_en_memoria(directorio))
+        pd.testing.assert_frame_equal(streaming, esperado, check_dtype=False)
+        print(f'\nMismas {len(streaming)} filas que el proceso en memoria; un género por grupo de filas')
+
+
+if __name__ == '__main__':
+    main()
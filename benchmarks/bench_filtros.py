@@ -0,0 +1,96 @@
+'''
+Compara los filtros de filtros.TablaFiltrable (máscaras precalculadas por valor, combinadas con
+operaciones de bits) contra DataFrame.query con la expresión armada con f-strings, para los casos
+por año y por género:
+
+- por año: la tabla de reseñas de agregados.py filtrada por reviews_anio, reviews_recommend y
+  sentiment_analysis (UsersRecommend / UsersNotRecommend) y la de sentimiento por release_anio
+  (sentiment_analysis);
+- por género: la tabla de horas por (genres, release_anio) (PlayTimeGenre) y la muestra de filas
+  con la columna genres categórica (UserForGenre).
+
+Verifica que ambos devuelvan las mismas filas y muestra qué pasa con un género que tiene comillas.
+
+Uso:
+    python benchmarks/bench_filtros.py --filas 1000000 --repeticiones 200
+'''
+# Importaciones
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agregados
+import filtros
+from datos_sinteticos import generar_datos
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+    return np.percentile(tiempos, 50), np.percentile(tiempos, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--repeticiones', type=int, default=200)
+    args = parser.parse_args()
+
+    df = generar_datos(args.filas)
+    acumulador = agregados.AcumuladorAgregados()
+    acumulador.agregar(df[agregados.columnas_agregados])
+    tablas = acumulador.resultado()
+    resenas = agregados._filtrable(tablas.resenas, 'count')
+    sentimiento = agregados._filtrable(tablas.sentimiento, 'count')
+
+    muestra = df[['genres', 'release_anio', 'playtime_forever', 'user_id']].astype({'genres': 'category'})
+    filtrable_muestra = filtros.TablaFiltrable(muestra, {'genres': str})
+
+    casos = [
+        ('reseñas por año', resenas,
+         lambda t: t.df.query(f"reviews_anio == {2013} and reviews_recommend == {True} and sentiment_analysis in {[1, 2]}"),
+         lambda t: t.filtrar(reviews_anio=2013, reviews_recommend=True, sentiment_analysis=[1, 2])),
+        ('sentimiento por año', sentimiento,
+         lambda t: t.df.query(f"release_anio == {2015}"),
+         lambda t: t.filtrar(release_anio=2015)),
+        ('horas por género', tablas._playtime,
+         lambda t: t.df.query(f"genres == '{'Action'}'"),
+         lambda t: t.filtrar(genres='Action')),
+        ('muestra por género', filtrable_muestra,
+         lambda t: t.df.query(f"genres == '{'Rpg'}'"),
+         lambda t: t.filtrar(genres='Rpg')),
+    ]
+
+    print(f'{args.filas} filas de datos\n')
+    print(f"{'caso':<20} {'filas tabla':>11} {'filas':>8} {'query p50':>10} {'query p99':>10} "
+          f"{'filtro p50':>10} {'filtro p99':>10} {'mejora':>7}")
+    for nombre, tabla, con_query, con_filtro in casos:
+        esperado, obtenido = con_query(tabla), con_filtro(tabla)
+        pd.testing.assert_frame_equal(esperado, obtenido)
+
+        q50, q99 = medir(lambda: con_query(tabla), args.repeticiones)
+        f50, f99 = medir(lambda: con_filtro(tabla), args.repeticiones)
+        print(f'{nombre:<20} {len(tabla.df):>11} {len(obtenido):>8} {q50:>8.0f}us {q99:>8.0f}us '
+              f'{f50:>8.0f}us {f99:>8.0f}us {q50 / f50:>6.1f}x')
+
+    # Un género con comillas rompe (o modifica) la expresión de query; el filtro lo compara como texto
+    genero = "Action' or genres != '"
+    try:
+        filas_query = len(tablas._playtime.df.query(f"genres == '{genero}'"))
+    except Exception as e:
+        filas_query = f'error ({type(e).__name__})'
+    print(f'\nGénero {genero!r}: query -> {filas_query} filas, filtro -> {len(tablas._playtime.filtrar(genres=genero))} filas')
+    print('Mismas filas con query y con los filtros')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+'''
+Mide la lectura bajo demanda de lectura.py: para cada consulta de la API (por género, por año de
+lanzamiento y por año de reseña) reporta los grupos de filas leídos y salteados y el tiempo de
+lectura, sobre el archivo tal como está y sobre una copia ordenada por género y año de lanzamiento
+(el orden que escribe JupyterNotebooks/etl_streaming.py).
+
+También verifica que los agregados calculados sobre las filas leídas respondan lo mismo que los
+agregados del archivo completo.
+
+Uso:
+    python benchmarks/bench_lectura.py data/data_export_api_gzip.parquet --filas-grupo 5000
+'''
+# Importaciones
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agregados
+import lectura
+
+
+def copia_ordenada(origen, destino, filas_grupo):
+    '''
+    Escribe una copia del archivo ordenada por género y año de lanzamiento.
+    '''
+    tabla = pq.read_table(origen).sort_by([('genres', 'ascending'), ('release_anio', 'ascending')])
+    pq.write_table(tabla, destino, row_group_size=filas_grupo, compression='gzip')
+
+
+def consultas(path):
+    '''
+    Devuelve los filtros de todas las consultas posibles del archivo: un género o un año por consulta.
+    '''
+    tabla = pq.read_table(path, columns=['genres', 'release_anio', 'reviews_anio'])
+    filtros = [('PlayTimeGenre', {'genres': g}) for g in sorted(set(tabla['genres'].to_pylist()))]
+    filtros += [('sentiment_analysis', {'release_anio': a}) for a in sorted(set(tabla['release_anio'].to_pylist()))]
+    filtros += [('UsersRecommend', {'reviews_anio': a}) for a in sorted(set(tabla['reviews_anio'].to_pylist()))]
+    return filtros
+
+
+def respuesta(agregados_consulta, endpoint, filtro):
+    valor = next(iter(filtro.values()))
+    if endpoint == 'PlayTimeGenre':
+        return agregados_consulta.anio_mas_jugado(valor)
+    if endpoint == 'sentiment_analysis':
+        return agregados_consulta.sentimiento_por_anio(valor)
+    return agregados_consulta.top_resenas(valor, recomendado=True, sentimientos=[1, 2])
+
+
+def medir(path, filtros, completos):
+    lector = lectura.LectorParquet(path)
+    por_endpoint = {}
+    for endpoint, filtro in filtros:
+        inicio = time.perf_counter()
+        df, reporte = lector.leer(filtro, agregados.columnas_agregados)
+        segundos = time.perf_counter() - inicio
+
+        acumulador = agregados.AcumuladorAgregados()
+        acumulador.agregar(df)
+        esperado = respuesta(completos, endpoint, filtro)
+        assert respuesta(acumulador.resultado(), endpoint, filtro) == esperado, f'{endpoint} {filtro}: respuesta distinta'
+
+        por_endpoint.setdefault(endpoint, []).append((reporte['grupos_leidos'], reporte['grupos_salteados'], segundos))
+
+    for endpoint, medidas in por_endpoint.items():
+        leidos, salteados, segundos = (np.array(columna) for columna in zip(*medidas))
+        print(f'  {endpoint:<20} {len(medidas):>9} {leidos.mean():>13.1f} {salteados.mean():>15.1f} '
+              f'{1000 * segundos.mean():>10.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('origen', nargs='?', default='data/data_export_api_gzip.parquet')
+    parser.add_argument('--filas-grupo', type=int, default=5_000, help='Filas por grupo de la copia ordenada')
+    args = parser.parse_args()
+
+    completos = agregados.construir_agregados(args.origen)
+    filtros = consultas(args.origen)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ordenado = os.path.join(directorio, 'ordenado.parquet')
+        copia_ordenada(args.origen, ordenado, args.filas_grupo)
+
+        for nombre, path in [('archivo original', args.origen), ('ordenado por género y año', ordenado)]:
+            grupos = pq.ParquetFile(path).num_row_groups
+            print(f'\n{nombre}: {grupos} grupos de filas')
+            print(f"  {'consulta':<20} {'consultas':>9} {'grupos leídos':>13} {'grupos salteados':>15} {'ms lectura':>10}")
+            medir(path, filtros, completos)
+
+    print('\nRespuestas iguales a las de los agregados del archivo completo')
+
+
+if __name__ == '__main__':
+    main()
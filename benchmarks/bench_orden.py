@@ -0,0 +1,88 @@
+'''
+Compara las consultas por año (UsersRecommend, UsersNotRecommend y sentiment_analysis) con las
+tablas de agregados filtradas por máscaras (filtros.TablaFiltrable, más groupby y orden estable)
+y con los arreglos ordenados de agregados.OrdenResenas / OrdenSentimiento (tramo contiguo con
+np.searchsorted y nlargest).
+
+Verifica que ambos devuelvan lo mismo para todos los años de los datos (y uno que no está).
+
+Uso:
+    python benchmarks/bench_orden.py --filas 1000000 --repeticiones 200
+'''
+# Importaciones
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agregados
+from datos_sinteticos import generar_datos
+
+
+def medir(funcion, argumentos, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        for argumento in argumentos:
+            inicio = time.perf_counter()
+            funcion(argumento)
+            tiempos.append((time.perf_counter() - inicio) * 1e6)
+    return np.percentile(tiempos, 50), np.percentile(tiempos, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--repeticiones', type=int, default=200)
+    args = parser.parse_args()
+
+    df = generar_datos(args.filas)
+    acumulador = agregados.AcumuladorAgregados()
+    acumulador.agregar(df[agregados.columnas_agregados])
+    tablas = acumulador.resultado()
+    resenas = agregados._filtrable(tablas.resenas, 'count')
+    sentimiento = agregados._filtrable(tablas.sentimiento, 'count')
+
+    def top_con_mascaras(anio, recomendado, sentimientos):
+        del_anio = resenas.filtrar(['item_name', 'count'], reviews_anio=anio, reviews_recommend=recomendado,
+                                   sentiment_analysis=sentimientos)
+        por_juego = del_anio.groupby('item_name')['count'].sum()
+        return por_juego.sort_values(ascending=False, kind='stable').head(3).index.tolist()
+
+    def sentimiento_con_mascaras(anio):
+        del_anio = sentimiento.filtrar(release_anio=anio)
+        return {int(v): int(c) for v, c in zip(del_anio['sentiment_analysis'], del_anio['count'])}
+
+    anios_resena = sorted(int(a) for a in df['reviews_anio'].dropna().unique()) + [1900]
+    anios_lanzamiento = sorted(int(a) for a in df['release_anio'].dropna().unique()) + [1900]
+
+    casos = [
+        ('UsersRecommend', anios_resena,
+         lambda anio: top_con_mascaras(anio, True, [1, 2]),
+         lambda anio: tablas.top_resenas(anio, recomendado=True, sentimientos=[1, 2])),
+        ('UsersNotRecommend', anios_resena,
+         lambda anio: top_con_mascaras(anio, False, [0]),
+         lambda anio: tablas.top_resenas(anio, recomendado=False, sentimientos=[0])),
+        ('sentiment_analysis', anios_lanzamiento, sentimiento_con_mascaras, tablas.sentimiento_por_anio),
+    ]
+
+    print(f'{args.filas} filas de datos, {len(tablas.resenas)} filas en la tabla de reseñas\n')
+    print(f"{'consulta':<20} {'años':>5} {'máscaras p50':>13} {'máscaras p99':>13} "
+          f"{'orden p50':>10} {'orden p99':>10} {'mejora':>7}")
+    for nombre, anios, con_mascaras, con_orden in casos:
+        for anio in anios:
+            assert con_mascaras(anio) == con_orden(anio), (nombre, anio)
+
+        m50, m99 = medir(con_mascaras, anios, args.repeticiones)
+        o50, o99 = medir(con_orden, anios, args.repeticiones)
+        print(f'{nombre:<20} {len(anios):>5} {m50:>11.0f}us {m99:>11.0f}us {o50:>8.0f}us {o99:>8.0f}us '
+              f'{m50 / o50:>6.1f}x')
+
+    print('\nMismos resultados con máscaras y con los arreglos ordenados')
+
+
+if __name__ == '__main__':
+    main()
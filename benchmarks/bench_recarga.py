@@ -0,0 +1,122 @@
+'''
+Compara el reinicio de la API con la recarga en caliente (POST /admin/recargar, ver recarga.py).
+
+Genera un archivo Parquet sintético, levanta la API con uvicorn en un hilo y hace consultas sin
+parar en dos momentos:
+- inicio en frío: desde que arranca el servidor hasta que /ready devuelve 200 (lo que pasa en
+  cada actualización de datos si hay que reiniciar);
+- recarga: se reemplaza el archivo por otra versión y se pide la recarga; la API sigue
+  respondiendo con la versión anterior hasta que la nueva está completa.
+
+Para cada momento reporta la duración, las consultas que no devolvieron 200 y la latencia p50/p99,
+y al final verifica que la versión anterior se haya liberado de la memoria.
+
+Uso:
+    python benchmarks/bench_recarga.py --filas 1000000
+'''
+# Importaciones
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+import numpy as np
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datos_sinteticos import generar_datos
+
+
+def escribir_version(path, filas, semilla):
+    '''
+    Escribe una versión de los datos en un archivo temporal y la pone en 'path' de una vez.
+    '''
+    temporal = f'{path}.tmp'
+    generar_datos(filas, semilla=semilla).to_parquet(temporal, compression='gzip', row_group_size=100_000)
+    os.replace(temporal, path)
+
+
+async def consultar(base_url, urls, hasta, resultados):
+    '''
+    Hace consultas en ronda hasta que hasta() devuelve True y guarda (estado, ms) de cada una.
+    '''
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as cliente:
+        i = 0
+        while not hasta():
+            inicio = time.perf_counter()
+            try:
+                estado = (await cliente.get(urls[i % len(urls)])).status_code
+            except httpx.TransportError:
+                estado = None
+            resultados.append((estado, (time.perf_counter() - inicio) * 1000))
+            i += 1
+            await asyncio.sleep(0.005)
+
+
+def reportar(nombre, segundos, resultados):
+    estados = [estado for estado, _ in resultados]
+    latencias = [ms for estado, ms in resultados if estado == 200] or [float('nan')]
+    p50, p99 = np.percentile(latencias, [50, 99])
+    print(f'{nombre:<16} {segundos:>9.2f} {len(resultados):>9} {sum(e != 200 for e in estados):>9} '
+          f'{p50:>8.2f}ms {p99:>8.2f}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--puerto', type=int, default=8766)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        parquet = os.path.join(directorio, 'datos.parquet')
+        escribir_version(parquet, args.filas, semilla=0)
+
+        os.environ['ADMIN_TOKEN'] = 'bench'
+        import main as api
+
+        # Datos sintéticos, sin snapshot, tabla de vecinos ni modelo usuario-juego precalculados
+        api.parquet_gzip_file_path = parquet
+        api.snapshot_file_path = os.path.join(directorio, 'sin_snapshot.arrow')
+        api.topk_file_path = os.path.join(directorio, 'sin_topk.npz')
+        api.colaborativo_path = os.path.join(directorio, 'sin_colaborativo')
+
+        base_url = f'http://127.0.0.1:{args.puerto}'
+        urls = [f'/UsersRecommend/{a}' for a in range(2010, 2016)] + [f'/PlayTimeGenre/{g}' for g in ['Action', 'Indie', 'Rpg']]
+        listo = lambda: api.datos_api.estado.listo()
+
+        print(f'{args.filas} filas\n')
+        print(f"{'momento':<16} {'segundos':>9} {'consultas':>9} {'no 200':>9} {'p50':>10} {'p99':>10}")
+
+        servidor = uvicorn.Server(uvicorn.Config(api.app, port=args.puerto, log_level='warning'))
+        inicio = time.perf_counter()
+        threading.Thread(target=servidor.run, daemon=True).start()
+        resultados = []
+        asyncio.run(consultar(base_url, urls, listo, resultados))
+        reportar('inicio en frío', time.perf_counter() - inicio, resultados)
+
+        version_anterior = api.datos_api.version
+        escribir_version(parquet, args.filas, semilla=1)
+        inicio = time.perf_counter()
+        respuesta = httpx.post(f'{base_url}/admin/recargar', headers={'X-Admin-Token': 'bench'})
+        assert respuesta.status_code == 202, respuesta.text
+        resultados = []
+        asyncio.run(consultar(base_url, urls, lambda: not api.recargador.estadisticas()['en_curso'], resultados))
+        reportar('recarga', time.perf_counter() - inicio, resultados)
+
+        estadisticas = httpx.get(f'{base_url}/recarga/stats').json()
+        assert estadisticas['recargas'] == 1 and estadisticas['version'] != version_anterior, estadisticas
+        gc.collect()
+        print(f"\nVersión {version_anterior} -> {estadisticas['version']}; "
+              f"versiones en memoria después de la recarga: {len(api.versiones_vivas)}")
+
+        servidor.should_exit = True
+
+
+if __name__ == '__main__':
+    main()
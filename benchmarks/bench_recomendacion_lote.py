@@ -0,0 +1,48 @@
+'''
+Mide el rendimiento de TablaVecinos.recomendar_lote (juegos por segundo) según el tamaño del lote,
+sobre un catálogo sintético.
+
+Uso:
+    python benchmarks/bench_recomendacion_lote.py --juegos 20000 --lotes 1 10 100 1000
+'''
+# Importaciones
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recomendador
+from datos_sinteticos import generar_datos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--juegos', type=int, default=20_000)
+    parser.add_argument('--lotes', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    df = generar_datos(filas=args.juegos * 5, juegos=args.juegos)
+    inicio = time.perf_counter()
+    tabla = recomendador.construir_topk(df)
+    print(f'{len(tabla)} juegos, tabla construida en {time.perf_counter() - inicio:.1f} s\n')
+
+    rng = np.random.default_rng(0)
+    print(f"{'lote':>6} {'ms por lote':>12} {'juegos/s':>10}")
+    for tamanio in args.lotes:
+        tiempos = []
+        for _ in range(args.repeticiones):
+            ids = rng.choice(tabla.item_ids, tamanio).tolist()
+            inicio = time.perf_counter()
+            tabla.recomendar_lote(ids)
+            tiempos.append(time.perf_counter() - inicio)
+        mediana = float(np.median(tiempos))
+        print(f'{tamanio:>6} {mediana * 1000:>12.2f} {tamanio / mediana:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+'''
+Mide las reseñas por segundo del análisis de sentimiento por lotes (JupyterNotebooks/sentimiento.py)
+según la cantidad de procesos, contra el apply fila por fila de utils.sentiment_analysis, y verifica
+que ambas clasificaciones sean iguales.
+
+Las reseñas son sintéticas, con una fracción de repetidas, vacías y nulas como en australian_user_reviews.
+
+Uso:
+    python benchmarks/bench_sentimiento.py --resenas 50000 --workers 0 1 2 4
+'''
+# Importaciones
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'JupyterNotebooks'))
+
+import sentimiento
+import utils
+
+
+palabras = ['great', 'game', 'bad', 'awesome', 'boring', 'fun', 'terrible', 'good', 'worst', 'best',
+            'not', 'very', 'really', 'love', 'hate', 'graphics', 'story', 'buggy', 'amazing', 'ok',
+            'friends', 'hours', 'money', 'waste', 'recommend', 'play', 'it', 'this', 'is', 'the']
+
+
+def resenas_sinteticas(cantidad, repetidas=0.3, vacias=0.05, nulas=0.01, semilla=0):
+    '''
+    Genera reseñas al azar: 'repetidas' copian una reseña anterior (a veces con otros espacios),
+    'vacias' son cadenas vacías o de espacios y 'nulas' son None.
+    '''
+    rng = np.random.default_rng(semilla)
+    resenas = []
+    for i in range(cantidad):
+        azar = rng.random()
+        if azar < nulas:
+            resenas.append(None)
+        elif azar < nulas + vacias:
+            resenas.append(rng.choice(['', ' ', '\n']))
+        elif azar < nulas + vacias + repetidas and resenas:
+            anterior = resenas[rng.integers(len(resenas))]
+            if anterior and rng.random() < 0.5:
+                anterior = '  ' + anterior.replace(' ', '   ') + '\n'
+            resenas.append(anterior)
+        else:
+            texto = ' '.join(rng.choice(palabras, rng.integers(3, 40)))
+            resenas.append(texto + rng.choice(['', '!', '.', ' :)', '\n10/10']))
+    return resenas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--resenas', type=int, default=50_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4])
+    parser.add_argument('--lote', type=int, default=10_000)
+    args = parser.parse_args()
+
+    resenas = pd.Series(resenas_sinteticas(args.resenas), dtype=object)
+
+    inicio = time.perf_counter()
+    esperado = resenas.apply(utils.sentiment_analysis).to_numpy()
+    base = time.perf_counter() - inicio
+    print(f"{'método':<22} {'segundos':>9} {'reseñas/s':>10} {'iguales':>8}")
+    print(f"{'apply fila por fila':<22} {base:>9.2f} {len(resenas) / base:>10.0f} {'-':>8}")
+
+    for workers in args.workers:
+        inicio = time.perf_counter()
+        with sentimiento.PuntuadorSentimiento(workers=workers, tamanio_lote=args.lote) as puntuador:
+            obtenido = puntuador.puntuar(resenas)
+        segundos = time.perf_counter() - inicio
+        iguales = bool(np.array_equal(obtenido, esperado))
+        print(f"{f'lotes, {workers} procesos':<22} {segundos:>9.2f} {len(resenas) / segundos:>10.0f} {str(iguales):>8}")
+
+    print(f'\nÚltima corrida: {puntuador.estadisticas}')
+
+
+if __name__ == '__main__':
+    main()
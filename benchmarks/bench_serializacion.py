@@ -0,0 +1,132 @@
+'''
+Compara, por endpoint, el tiempo de armar y serializar la respuesta como lo hacía FastAPI (el
+endpoint devuelve un diccionario que pasa por jsonable_encoder y JSONResponse.render) con los
+bytes JSON que arman ahora los endpoints (respuestas.py), sobre datos sintéticos:
+
+- antes: jsonable_encoder + render del diccionario (en UserForGenre, también armar la lista de
+  horas por año con un diccionario por año); con la cache esto se repetía en cada acierto;
+- después: serializar el contenido una vez (en UserForGenre, la lista sale de los arreglos);
+- acierto: armar la respuesta a partir de los bytes guardados en la cache (endpoints con cache).
+
+Verifica que los bytes sean los mismos.
+
+Uso:
+    python benchmarks/bench_serializacion.py --filas 1000000 --repeticiones 200
+'''
+# Importaciones
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agregados
+import main as api
+import recomendador
+import respuestas
+from datos_sinteticos import generar_datos, generos_frecuencia
+
+
+def medir(funcion, argumentos, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        for argumento in argumentos:
+            inicio = time.perf_counter()
+            funcion(argumento)
+            tiempos.append((time.perf_counter() - inicio) * 1e6)
+    return np.percentile(tiempos, 50)
+
+
+def antes(contenido):
+    return api.RespuestaJSON(jsonable_encoder(contenido)).body
+
+
+def usuario_genero_antes(genero, resultado_genero):
+    '''
+    Respuesta de UserForGenre armada como diccionario, con un diccionario por año.
+    '''
+    usuario_max_horas, anios_usuario, horas_usuario, anios, horas = resultado_genero
+    return {
+        "Usuario con más horas jugadas para " + genero: {"user_id": usuario_max_horas, "Año": int(anios_usuario[0]), "playtime_forever": float(horas_usuario[0])},
+        "Horas jugadas": [{"Año": anio, "Horas": horas_anio} for anio, horas_anio in zip(anios.tolist(), horas.tolist())]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--repeticiones', type=int, default=200)
+    args = parser.parse_args()
+
+    df = generar_datos(args.filas)
+    acumulador = agregados.AcumuladorAgregados()
+    acumulador.agregar(df[agregados.columnas_agregados])
+    tablas = acumulador.resultado()
+    usuarios_genero = agregados.construir_usuarios_genero(df)
+    tabla_vecinos = recomendador.construir_topk(df)
+
+    generos = [genero for genero in generos_frecuencia if genero in usuarios_genero]
+    anios = list(range(2010, 2016))
+    item_ids = np.random.default_rng(0).choice(tabla_vecinos.item_ids, 200).tolist()
+    sentimientos = {2: "Positive", 1: "Neutral", 0: "Negative"}
+    resultados_genero = {genero: usuarios_genero.resultado(genero) for genero in generos}
+
+    # Endpoints con cache de respuestas (los demás no tienen aciertos)
+    con_cache = {'PlayTimeGenre', 'UserForGenre', 'UsersRecommend', 'sentiment_analysis'}
+
+    # (endpoint, argumentos, contenido como diccionario, bytes armados por el endpoint)
+    casos = [
+        ('PlayTimeGenre', generos,
+         lambda g: {"Año de lanzamiento con más horas jugadas para el Género " + g: tablas.anio_mas_jugado(g)},
+         None),
+        ('UserForGenre', generos,
+         lambda g: usuario_genero_antes(g, resultados_genero[g]),
+         lambda g: api.cuerpo_usuario_genero(g, resultados_genero[g])),
+        ('UsersRecommend', anios,
+         lambda a: {f"Puesto {i+1}": juego for i, juego in enumerate(tablas.top_resenas(a, True, [1, 2]))},
+         None),
+        ('sentiment_analysis', anios,
+         lambda a: {sentimientos[k]: v for k, v in tablas.sentimiento_por_anio(a).items()},
+         None),
+        ('recomendacion_juego', item_ids,
+         lambda i: api.respuesta_recomendaciones(tabla_vecinos.recomendar(i), 5),
+         None),
+        ('recomendacion_juego/batch', [item_ids * 5],
+         lambda ids: {"resultados": [{"item_id": i, **api.respuesta_recomendaciones(r, 5)}
+                                     for i, r in zip(ids, tabla_vecinos.recomendar_lote(ids))]},
+         None),
+    ]
+
+    print(f'{args.filas} filas de datos, p50 por respuesta\n')
+    print(f"{'endpoint':<26} {'bytes':>7} {'antes':>9} {'después':>9} {'acierto':>9} {'mejora':>7}")
+    for nombre, argumentos, contenido, cuerpo in casos:
+        contenidos = {repr(a): contenido(a) for a in argumentos}
+        if cuerpo is None:
+            # El endpoint arma el mismo diccionario y lo serializa una vez
+            t_antes = medir(lambda a: antes(contenidos[repr(a)]), argumentos, args.repeticiones)
+            cuerpo = lambda a: api.serializar(contenidos[repr(a)])
+        else:
+            # El endpoint arma los bytes desde los arreglos: antes se armaba también el diccionario
+            t_antes = medir(lambda a: antes(contenido(a)), argumentos, args.repeticiones)
+        t_despues = medir(cuerpo, argumentos, args.repeticiones)
+
+        cuerpos = {repr(a): cuerpo(a) for a in argumentos}
+        for clave in contenidos:
+            assert antes(contenidos[clave]) == cuerpos[clave], (nombre, clave)
+
+        acierto = '-'
+        if nombre in con_cache:
+            acierto = f"{medir(lambda a: respuestas.RespuestaPrecodificada(cuerpos[repr(a)]), argumentos, args.repeticiones):.1f}us"
+
+        largo = int(np.mean([len(c) for c in cuerpos.values()]))
+        print(f'{nombre:<26} {largo:>7} {t_antes:>7.1f}us {t_despues:>7.1f}us {acierto:>9} {t_antes / t_despues:>6.1f}x')
+
+    print('\nMismos bytes antes y después')
+
+
+if __name__ == '__main__':
+    main()
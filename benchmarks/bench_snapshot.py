@@ -0,0 +1,103 @@
+'''
+Compara la carga de los datos de la API desde el Parquet con gzip contra el snapshot Arrow IPC
+(snapshot.py), sin comprimir y con LZ4.
+
+Para cada formato levanta N procesos que cargan las columnas de la muestra como pandas.DataFrame
+(como la API) y recorren todos los valores, y reporta el tiempo de carga y la memoria de cada proceso
+leída de /proc/<pid>/smaps_rollup: RSS, PSS (memoria compartida repartida entre los procesos que la
+usan) y USS (memoria privada del proceso). Con el snapshot sin comprimir las columnas quedan en la
+cache de páginas y se comparten, así que el total de USS casi no crece con N.
+
+Uso:
+    python benchmarks/bench_snapshot.py --filas 2000000 --procesos 4
+'''
+# Importaciones
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, raiz)
+
+import snapshot
+from datos_sinteticos import generar_datos
+
+
+# Proceso que carga los datos como la API, avisa cuánto tardó y espera a que se lean sus medidas
+codigo_proceso = '''
+import sys, time
+sys.path.insert(0, {raiz!r})
+import carga, snapshot
+inicio = time.perf_counter()
+columnas = ['genres', 'release_anio', 'playtime_forever', 'user_id', 'item_id', 'item_name']
+if {formato!r} == 'ninguno':
+    df = {{}}
+elif {formato!r} == 'parquet':
+    df = carga.cargar_parquet({path!r}, columnas=columnas)
+else:
+    df = carga.tabla_a_pandas(snapshot.abrir_snapshot({path!r}).select(columnas))
+segundos = time.perf_counter() - inicio
+for columna in df:
+    valores = df[columna].cat.codes if df[columna].dtype == 'category' else df[columna]
+    valores.to_numpy().sum()
+print(segundos, flush=True)
+sys.stdin.read()
+'''
+
+
+def memoria(pid):
+    '''
+    Devuelve (RSS, PSS, USS) en MiB del proceso, desde /proc/<pid>/smaps_rollup.
+    '''
+    valores = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for linea in f:
+            partes = linea.split()
+            if len(partes) >= 2 and partes[0].endswith(':') and partes[1].isdigit():
+                valores[partes[0][:-1]] = int(partes[1]) / 1024
+    return valores['Rss'], valores['Pss'], valores['Private_Clean'] + valores['Private_Dirty']
+
+
+def medir(nombre, formato, path, procesos):
+    hijos = [subprocess.Popen([sys.executable, '-c', codigo_proceso.format(raiz=raiz, formato=formato, path=path)],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+             for _ in range(procesos)]
+    tiempos = [float(hijo.stdout.readline()) for hijo in hijos]
+    medidas = [memoria(hijo.pid) for hijo in hijos]
+    for hijo in hijos:
+        hijo.communicate('')
+
+    rss, pss, uss = (sum(m[i] for m in medidas) for i in range(3))
+    print(f'{nombre:<16} {1000 * max(tiempos):>10.1f} {rss:>10.0f} {pss:>10.0f} {uss:>10.0f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=2_000_000)
+    parser.add_argument('--procesos', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        parquet = os.path.join(directorio, 'datos.parquet')
+        generar_datos(args.filas).to_parquet(parquet, compression='gzip', row_group_size=100_000)
+
+        # 'sin datos' mide lo que ocupa cada proceso sólo con las importaciones
+        formatos = [('sin datos', None), ('parquet', parquet)]
+        for nombre, compresion in snapshot.compresiones.items():
+            destino = os.path.join(directorio, f'datos_{nombre}.arrow')
+            snapshot.construir_snapshot(parquet, destino, compresion)
+            formatos.append((f'snapshot {nombre}', destino))
+
+        print(f'{args.filas} filas, {args.procesos} procesos (memoria sumada de todos los procesos, MiB)\n')
+        print(f"{'formato':<16} {'carga (ms)':>10} {'RSS':>10} {'PSS':>10} {'USS':>10}")
+        for formato, path in formatos:
+            tipo = 'ninguno' if path is None else 'parquet' if formato == 'parquet' else 'snapshot'
+            medir(formato, tipo, path, args.procesos)
+            time.sleep(0.5)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+'''
+Compara la latencia de UserForGenre calculada como en la versión original (filtro por género con
+apply y prueba de subcadena por fila, agrupaciones por usuario y año en cada consulta) contra el
+resultado precalculado al cargar los datos (agregados.construir_usuarios_genero), que reemplaza
+también al índice invertido por género: la consulta sólo toma tramos de arreglos.
+
+Verifica que ambos den el mismo usuario, año y horas.
+
+Uso:
+    python benchmarks/bench_usuarios_genero.py --filas 500000 --repeticiones 50
+'''
+# Importaciones
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agregados
+from datos_sinteticos import generar_datos
+
+
+def usuario_genero_apply(df, genero):
+    '''
+    UserForGenre como en la versión original: devuelve (user_id, año, horas del usuario en ese año,
+    años, horas acumuladas por año).
+    '''
+    juegos_genero = df[['genres', 'release_anio', 'playtime_forever', 'user_id']].copy()
+    juegos_genero = juegos_genero[juegos_genero['genres'].apply(lambda x: genero in x)]
+
+    juegos_genero['playtime_forever'] = juegos_genero['playtime_forever'] / 60
+    juegos_genero['release_anio'] = pd.to_numeric(juegos_genero['release_anio'], errors='coerce')
+    juegos_genero = juegos_genero[juegos_genero['release_anio'] >= 100]
+    juegos_genero['Año'] = juegos_genero['release_anio']
+
+    horas_por_usuario = juegos_genero.groupby(['user_id', 'Año'])['playtime_forever'].sum().reset_index()
+    usuario = horas_por_usuario.groupby('user_id')['playtime_forever'].sum().idxmax()
+    usuario = horas_por_usuario[horas_por_usuario['user_id'] == usuario]
+    acumulacion = horas_por_usuario.groupby(['Año'])['playtime_forever'].sum()
+
+    return (usuario.iloc[0]['user_id'], int(usuario.iloc[0]['Año']), usuario.iloc[0]['playtime_forever'],
+            acumulacion.index.to_numpy(), acumulacion.to_numpy())
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return np.percentile(tiempos, 50), np.percentile(tiempos, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=500_000)
+    parser.add_argument('--repeticiones', type=int, default=50)
+    parser.add_argument('--generos', nargs='+', default=['Action', 'Rpg', 'Accounting'])
+    args = parser.parse_args()
+
+    df = generar_datos(args.filas)
+
+    inicio = time.perf_counter()
+    usuarios_genero = agregados.construir_usuarios_genero(df)
+    print(f'{args.filas} filas, resultados de {len(usuarios_genero.generos)} géneros precalculados en '
+          f'{(time.perf_counter() - inicio) * 1000:.0f} ms\n')
+
+    print(f"{'género':<12} {'apply p50':>10} {'apply p99':>10} {'precalculado p50':>17} {'p99':>9}")
+    for genero in args.generos:
+        esperado = usuario_genero_apply(df, genero)
+        usuario, anios_usuario, horas_usuario, anios, horas = usuarios_genero.resultado(genero)
+        assert (usuario, int(anios_usuario[0])) == esperado[:2], genero
+        assert np.isclose(horas_usuario[0], esperado[2]), genero
+        assert np.array_equal(anios, esperado[3]) and np.allclose(horas, esperado[4]), genero
+
+        a50, a99 = medir(lambda: usuario_genero_apply(df, genero), args.repeticiones)
+        p50, p99 = medir(lambda: usuarios_genero.resultado(genero), args.repeticiones)
+        print(f'{genero:<12} {a50:>8.2f}ms {a99:>8.2f}ms {p50 * 1000:>15.1f}us {p99 * 1000:>7.1f}us')
+
+    print('\nMismo usuario, año y horas con ambos caminos')
+
+
+if __name__ == '__main__':
+    main()
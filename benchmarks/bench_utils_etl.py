@@ -0,0 +1,114 @@
+'''
+Compara las funciones ETL de JupyterNotebooks/utils.py aplicadas fila por fila (.apply) contra sus
+versiones vectorizadas (extract_anio_release_series, replace_float_series, date_converter_series).
+
+Primero verifica que ambas versiones devuelvan exactamente lo mismo sobre casos borde y sobre los
+datos sintéticos (termina con error si no), y después mide las filas por segundo de cada una. Como
+date_converter fila por fila tarda varios minutos con un millón de filas, el .apply se mide sobre
+las primeras --filas-apply filas y la versión vectorizada sobre todas.
+
+Uso:
+    python benchmarks/bench_utils_etl.py --filas 1000000
+'''
+# Importaciones
+import argparse
+import os
+import sys
+import time
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'JupyterNotebooks'))
+
+import utils
+
+
+# Casos borde de cada función (los nulos de date_converter se prueban aparte: la versión escalar falla con ellos)
+casos_fechas = ['2017-01-04', '1998-12-31', '2017-1-4', 'Jan 2018', 'Soon..', '', '2019-01-01\n', '2019-01-01 ',
+                '20190-01-01', '٢٠١٩-01-01', None, np.nan, pd.NaT, pd.Timestamp('2020-05-06'), 2019]
+casos_precios = ['4.99', 'Free to Play', 'Free', ' 2.5 ', '1_000', 'nan', 'NaN', 'inf', '-Infinity', '1e3', '',
+                 '   ', '٣', 'Starting at $449.00', '+1.', '.5', 'e5', '_', 3, 7.5, True, Decimal('1.25'),
+                 None, np.nan, float('inf')]
+casos_posteos = ['Posted November 5, 2011.', 'Posted July 15, 2011.', 'Posted Nov 5, 2014.', 'Posted May 20.',
+                 'Posted Sept 5, 2014.', 'Posted Foo 5, 2014.', 'Posted February 30, 2014.', 'Posted June 1, 1500.',
+                 'Posted april 3, 2013.', 'november 05, 2012', 'Posted 12 5, 2014.', '', 'sin fecha']
+
+meses = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October',
+         'November', 'December']
+
+
+def datos_sinteticos(filas, semilla=0):
+    '''
+    Genera columnas parecidas a release_date y price de steam_games y a reviews_posted de user_reviews.
+    '''
+    rng = np.random.default_rng(semilla)
+    anios, mes, dias = rng.integers(1990, 2019, filas), rng.integers(1, 13, filas), rng.integers(1, 29, filas)
+
+    fechas = pd.Series([f'{a}-{m:02d}-{d:02d}' for a, m, d in zip(anios, mes, dias)], dtype=object)
+    fechas[rng.random(filas) < 0.05] = 'Soon..'
+    fechas[rng.random(filas) < 0.05] = None
+
+    precios = pd.Series(np.round(rng.random(filas) * 60, 2).astype(str), dtype=object)
+    precios[rng.random(filas) < 0.1] = 'Free to Play'
+    precios[rng.random(filas) < 0.05] = None
+
+    nombres = np.array(meses)[mes - 1]
+    posteos = pd.Series([f'Posted {n} {d}, {a}.' for n, d, a in zip(nombres, dias, anios)], dtype=object)
+    cortos = rng.random(filas) < 0.1
+    posteos[cortos] = [f'Posted {n[:3]} {d}, {a}.' for n, d, a in zip(nombres[cortos], dias[cortos], anios[cortos])]
+    posteos[rng.random(filas) < 0.1] = 'Posted May 20.'
+
+    return fechas, precios, posteos
+
+
+def verificar(nombre, escalar, vectorizada, serie):
+    esperado = serie.apply(escalar)
+    obtenido = vectorizada(serie)
+    if esperado.dtype == object:
+        # apply puede devolver float NaN donde la función escalar devuelve None
+        esperado = esperado.astype(object).where(esperado.notna(), None)
+    pd.testing.assert_series_equal(obtenido, esperado, check_dtype=esperado.dtype != object)
+    if esperado.dtype == object:
+        assert list(obtenido.map(type)) == list(esperado.map(type)), f'{nombre}: tipos distintos'
+
+
+def medir(funcion, serie):
+    inicio = time.perf_counter()
+    funcion(serie)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--filas-apply', type=int, default=100_000, help='Filas para verificar y medir el .apply')
+    args = parser.parse_args()
+
+    verificar('extract_anio_release', utils.extract_anio_release, utils.extract_anio_release_series,
+              pd.Series(casos_fechas, dtype=object))
+    verificar('replace_float', utils.replace_float, utils.replace_float_series, pd.Series(casos_precios, dtype=object))
+    verificar('date_converter', utils.date_converter, utils.date_converter_series, pd.Series(casos_posteos, dtype=object))
+    assert utils.date_converter_series(pd.Series([None, np.nan], dtype=object)).tolist() == [None, None]
+    print('Casos borde: iguales')
+
+    fechas, precios, posteos = datos_sinteticos(args.filas)
+    pruebas = [
+        ('extract_anio_release', utils.extract_anio_release, utils.extract_anio_release_series, fechas),
+        ('replace_float', utils.replace_float, utils.replace_float_series, precios),
+        ('date_converter', utils.date_converter, utils.date_converter_series, posteos),
+    ]
+
+    parcial = min(args.filas, args.filas_apply)
+    print(f'\n.apply sobre {parcial} filas, vectorizada sobre {args.filas} filas')
+    print(f"{'función':<22} {'apply filas/s':>14} {'serie filas/s':>14} {'aceleración':>12}")
+    for nombre, escalar, vectorizada, serie in pruebas:
+        verificar(nombre, escalar, vectorizada, serie.iloc[:parcial])
+        fila_por_fila = parcial / medir(lambda s: s.apply(escalar), serie.iloc[:parcial])
+        vectorizado = len(serie) / medir(vectorizada, serie)
+        print(f'{nombre:<22} {fila_por_fila:>14,.0f} {vectorizado:>14,.0f} {vectorizado / fila_por_fila:>11.1f}x')
+
+
+if __name__ == '__main__':
+    main()
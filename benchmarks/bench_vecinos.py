@@ -0,0 +1,100 @@
+'''
+Compara las búsquedas de vecinos de vecinos.py (exacta contra IVF aproximada) sobre catálogos
+sintéticos de distintos tamaños: recall@5 respecto de la búsqueda exacta, consultas por segundo
+y tiempo de construcción del índice.
+
+Cada catálogo es una matriz dispersa parecida a la TF-IDF del recomendador: cada juego tiene unos
+pocos términos, la mayoría de un tema (grupo de términos) y algunos al azar, con filas de norma 1.
+El recall se mide sobre una muestra de consultas cuya respuesta exacta se calcula aparte.
+
+Uso:
+    python benchmarks/bench_vecinos.py --juegos 10000 100000 1000000 --configuraciones 256:8 1024:16
+'''
+# Importaciones
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from scipy import sparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vecinos
+
+
+def catalogo_sintetico(juegos, terminos=20_000, temas=500, terminos_por_tema=40, terminos_por_juego=8, semilla=0):
+    '''
+    Genera una matriz dispersa (juegos x terminos) con filas de norma 1.
+    '''
+    rng = np.random.default_rng(semilla)
+    vocabulario_tema = rng.integers(0, terminos, size=(temas, terminos_por_tema))
+
+    tema = rng.integers(0, temas, size=juegos)
+    de_tema = vocabulario_tema[tema[:, None], rng.integers(0, terminos_por_tema, size=(juegos, terminos_por_juego))]
+    al_azar = rng.integers(0, terminos, size=(juegos, terminos_por_juego))
+    columnas = np.where(rng.random((juegos, terminos_por_juego)) < 0.75, de_tema, al_azar)
+
+    filas = np.repeat(np.arange(juegos), terminos_por_juego)
+    pesos = rng.random(juegos * terminos_por_juego).astype(np.float32) + 0.5
+    matriz = sparse.csr_matrix((pesos, (filas, columnas.ravel())), shape=(juegos, terminos), dtype=np.float32)
+    matriz.sum_duplicates()
+
+    normas = np.sqrt(np.asarray(matriz.multiply(matriz).sum(axis=1)).ravel())
+    return sparse.diags(1 / np.maximum(normas, 1e-12)).astype(np.float32) @ matriz
+
+
+def recall(aproximados, exactos):
+    '''
+    Fracción de los vecinos exactos (sin contar los lugares vacíos) que encontró la búsqueda aproximada.
+    '''
+    aciertos = total = 0
+    for fila_aprox, fila_exacta in zip(aproximados, exactos):
+        esperados = set(fila_exacta[fila_exacta >= 0].tolist())
+        aciertos += len(esperados & set(fila_aprox.tolist()))
+        total += len(esperados)
+    return aciertos / total if total else 1.0
+
+
+def medir(busqueda, consultas, k, bloque):
+    inicio = time.perf_counter()
+    resultados = [busqueda.buscar(consultas[i:i + bloque], k)[0] for i in range(0, len(consultas), bloque)]
+    segundos = time.perf_counter() - inicio
+    return np.vstack(resultados), len(consultas) / segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--juegos', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--configuraciones', nargs='+', default=['64:4', '256:8', '256:16', '1024:16'],
+                        help='Configuraciones IVF como listas:sondeos')
+    parser.add_argument('--consultas', type=int, default=500, help='Consultas por medición')
+    parser.add_argument('--lote', type=int, default=100, help='Consultas por llamada a buscar')
+    parser.add_argument('--k', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    print(f"{'juegos':>9} {'búsqueda':<14} {'índice (s)':>10} {'recall@5':>9} {'consultas/s':>12}")
+
+    for juegos in args.juegos:
+        matriz = catalogo_sintetico(juegos)
+        consultas = np.sort(rng.choice(juegos, min(args.consultas, juegos), replace=False))
+
+        inicio = time.perf_counter()
+        exacta = vecinos.BusquedaExacta(matriz)
+        construccion = time.perf_counter() - inicio
+        exactos, qps = medir(exacta, consultas, args.k, args.lote)
+        print(f'{juegos:>9} {"exacta":<14} {construccion:>10.2f} {1.0:>9.3f} {qps:>12.0f}')
+
+        for configuracion in args.configuraciones:
+            listas, sondeos = (int(v) for v in configuracion.split(':'))
+            inicio = time.perf_counter()
+            ivf = vecinos.BusquedaIVF(matriz, listas=listas, sondeos=sondeos)
+            construccion = time.perf_counter() - inicio
+            aproximados, qps = medir(ivf, consultas, args.k, args.lote)
+            print(f'{juegos:>9} {"ivf " + configuracion:<14} {construccion:>10.2f} {recall(aproximados, exactos):>9.3f} {qps:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+'''
+Compara levantar la API con varios procesos de dos formas, sobre un Parquet sintético:
+
+- uvicorn --workers N: cada proceso importa main.py y carga los datos por su cuenta;
+- servidor.py --workers N: el proceso principal carga los datos una vez y crea los procesos con
+  fork, que comparten esas páginas copy-on-write.
+
+Para cada forma reporta el tiempo hasta que los N procesos atienden consultas y la memoria del
+árbol de procesos (RSS, PSS y USS sumados, leídos de /proc) al terminar de iniciar y después de una
+ronda de consultas a todos los endpoints, que reparte conexiones nuevas entre los procesos.
+Verifica que las respuestas sean las mismas con ambas formas.
+
+Uso:
+    python benchmarks/bench_workers.py --filas 1000000 --workers 4
+'''
+# Importaciones
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, raiz)
+
+import servidor
+from datos_sinteticos import generar_datos
+
+
+def urls_consultas():
+    generos = ['Action', 'Indie', 'Rpg', 'Strategy']
+    anios = range(2010, 2016)
+    return ([f'/PlayTimeGenre/{g}' for g in generos] + [f'/UserForGenre/{g}' for g in generos] +
+            [f'/UsersRecommend/{a}' for a in anios] + [f'/UsersNotRecommend/{a}' for a in anios] +
+            [f'/sentiment_analysis/{a}' for a in anios])
+
+
+def descendientes(pid):
+    '''
+    Devuelve los pids de los procesos hijos de 'pid', recursivamente.
+    '''
+    hijos = []
+    try:
+        for tarea in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{tarea}/children') as f:
+                hijos.extend(int(hijo) for hijo in f.read().split())
+    except FileNotFoundError:
+        return []
+    return hijos + [nieto for hijo in hijos for nieto in descendientes(hijo)]
+
+
+def memoria_arbol(pid):
+    '''
+    Devuelve la memoria total (MiB) del proceso y sus descendientes: RSS, PSS y USS.
+    '''
+    total = {'rss': 0.0, 'pss': 0.0, 'uss': 0.0}
+    for proceso in [pid] + descendientes(pid):
+        medidas = servidor.memoria_proceso(proceso)
+        if medidas is not None:
+            for clave in total:
+                total[clave] += medidas[clave]
+    return total
+
+
+def esperar_log(log_path, texto, cantidad, proceso, limite):
+    '''
+    Espera a que el log tenga 'cantidad' líneas con 'texto' y devuelve los segundos que tardó.
+    '''
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f'El servidor terminó con estado {proceso.returncode}, ver {log_path}')
+        with open(log_path) as f:
+            if f.read().count(texto) >= cantidad:
+                return time.perf_counter() - inicio
+        time.sleep(0.05)
+    raise RuntimeError(f'El servidor no inició en {limite} s, ver {log_path}')
+
+
+def medir(nombre, comando, texto_listo, workers, directorio, puerto, urls, rondas):
+    '''
+    Levanta el servidor con 'comando', mide el inicio y la memoria, y devuelve las respuestas.
+    '''
+    log_path = os.path.join(directorio, f'{nombre.split()[0]}.log')
+    entorno = {**os.environ, 'PYTHONPATH': raiz, 'CACHE_MAX_ENTRADAS': '0'}
+    with open(log_path, 'w') as log:
+        proceso = subprocess.Popen(comando, cwd=directorio, env=entorno, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        segundos = esperar_log(log_path, texto_listo, workers, proceso, limite=600)
+        time.sleep(1)
+        memoria_inicio = memoria_arbol(proceso.pid)
+
+        respuestas = {}
+        for _ in range(rondas):
+            for url in urls:
+                # Una conexión nueva por consulta, para repartirlas entre los procesos
+                respuesta = httpx.get(f'http://127.0.0.1:{puerto}{url}', timeout=60)
+                assert respuesta.status_code == 200, (nombre, url, respuesta.status_code)
+                respuestas.setdefault(url, respuesta.content)
+                assert respuestas[url] == respuesta.content, (nombre, url)
+        memoria_consultas = memoria_arbol(proceso.pid)
+    finally:
+        proceso.send_signal(signal.SIGTERM)
+        proceso.wait(timeout=60)
+
+    print(f"{nombre:<24} {segundos:>8.1f}s {memoria_inicio['rss']:>9.0f} {memoria_inicio['pss']:>9.0f} "
+          f"{memoria_inicio['uss']:>9.0f} {memoria_consultas['rss']:>9.0f} {memoria_consultas['pss']:>9.0f} "
+          f"{memoria_consultas['uss']:>9.0f}")
+    return respuestas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rondas', type=int, default=10)
+    parser.add_argument('--puerto', type=int, default=8767)
+    args = parser.parse_args()
+
+    urls = urls_consultas()
+    with tempfile.TemporaryDirectory() as directorio:
+        # main.py lee data/data_export_api_gzip.parquet relativo al directorio de trabajo; sin
+        # snapshot, tabla de vecinos ni modelo usuario-juego precalculados
+        os.makedirs(os.path.join(directorio, 'data'))
+        generar_datos(args.filas).to_parquet(os.path.join(directorio, 'data', 'data_export_api_gzip.parquet'),
+                                             compression='gzip', row_group_size=100_000)
+
+        print(f'{args.filas} filas, {args.workers} procesos, {args.rondas} rondas de {len(urls)} consultas')
+        print('Memoria en MiB, suma del proceso principal y sus hijos\n')
+        print(f"{'':<24} {'':>9} {'al iniciar':>29} {'después de las consultas':>29}")
+        print(f"{'servidor':<24} {'inicio':>9} {'RSS':>9} {'PSS':>9} {'USS':>9} {'RSS':>9} {'PSS':>9} {'USS':>9}")
+
+        comunes = ['--host', '127.0.0.1', '--port', str(args.puerto), '--workers', str(args.workers), '--log-level', 'info']
+        uvicorn_workers = medir(f'uvicorn --workers {args.workers}', [sys.executable, '-m', 'uvicorn', 'main:app'] + comunes,
+                                'Datos cargados', args.workers, directorio, args.puerto, urls, args.rondas)
+        precargado = medir(f'servidor.py --workers {args.workers}',
+                           [sys.executable, os.path.join(raiz, 'servidor.py'), '--reporte-segundos', '0'] + comunes,
+                           'Application startup complete.', args.workers, directorio, args.puerto, urls, args.rondas)
+
+    assert uvicorn_workers == precargado
+    print('\nMismas respuestas con ambas formas')
+
+
+if __name__ == '__main__':
+    main()
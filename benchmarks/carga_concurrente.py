@@ -0,0 +1,105 @@
+'''
+Prueba de carga: mide la latencia de las consultas baratas (cacheadas) mientras hay
+recomendaciones lentas en curso, para verificar que el trabajo de CPU no bloquea el event loop.
+
+Levanta la API con uvicorn en un hilo (puerto local), espera a que /ready devuelva 200 y hace
+dos rondas de consultas baratas: una sola y otra con recomendaciones lentas en paralelo. La
+demora de cada recomendación se simula con time.sleep, que como NumPy/SciPy libera el GIL.
+
+Uso:
+    python benchmarks/carga_concurrente.py --workers 4      # con el pool de ejecutor_cpu
+    python benchmarks/carga_concurrente.py --workers 0      # bloqueante, para comparar
+'''
+# Importaciones
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import httpx
+import numpy as np
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def consultas_baratas(cliente, urls, duracion, latencias):
+    fin = time.monotonic() + duracion
+    i = 0
+    while time.monotonic() < fin:
+        inicio = time.perf_counter()
+        await cliente.get(urls[i % len(urls)])
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        i += 1
+
+
+async def recomendaciones_lentas(cliente, product_ids, duracion, estados):
+    fin = time.monotonic() + duracion
+    i = 0
+    while time.monotonic() < fin:
+        respuesta = await cliente.get(f'/recomendacion_juego/{product_ids[i % len(product_ids)]}')
+        estados.append(respuesta.status_code)
+        i += 1
+
+
+async def ronda(base_url, urls, product_ids, duracion, clientes, lentos):
+    latencias, estados = [], []
+    limites = httpx.Limits(max_connections=clientes + lentos + 4)
+    async with httpx.AsyncClient(base_url=base_url, limits=limites, timeout=60) as cliente:
+        tareas = [consultas_baratas(cliente, urls, duracion, latencias) for _ in range(clientes)]
+        tareas += [recomendaciones_lentas(cliente, product_ids, duracion, estados) for _ in range(lentos)]
+        await asyncio.gather(*tareas)
+    return latencias, estados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4, help='Hilos de ejecutor_cpu (0 = bloqueante)')
+    parser.add_argument('--demora-ms', type=float, default=200, help='Demora simulada de cada recomendación')
+    parser.add_argument('--duracion', type=float, default=5, help='Segundos por ronda')
+    parser.add_argument('--clientes', type=int, default=8, help='Clientes de consultas baratas')
+    parser.add_argument('--lentos', type=int, default=4, help='Clientes de recomendaciones lentas')
+    parser.add_argument('--puerto', type=int, default=8765)
+    args = parser.parse_args()
+
+    os.environ['CPU_WORKERS'] = str(args.workers)
+    os.environ['CPU_TIMEOUT_SEGUNDOS'] = '60'
+    import main as api
+
+    servidor = uvicorn.Server(uvicorn.Config(api.app, port=args.puerto, log_level='warning'))
+    threading.Thread(target=servidor.run, daemon=True).start()
+    base_url = f'http://127.0.0.1:{args.puerto}'
+
+    while True:
+        try:
+            if httpx.get(f'{base_url}/ready').status_code == 200:
+                break
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+
+    # Recomendación lenta: misma respuesta, con la demora indicada
+    recomendar = api.datos_api.tabla_vecinos.recomendar
+    def recomendar_lento(*a, **kw):
+        time.sleep(args.demora_ms / 1000)
+        return recomendar(*a, **kw)
+    api.datos_api.tabla_vecinos.recomendar = recomendar_lento
+
+    anios = range(2010, 2016)
+    urls = [f'/UsersRecommend/{a}' for a in anios] + [f'/sentiment_analysis/{a}' for a in anios]
+    product_ids = api.datos_api.tabla_vecinos.item_ids[:50].tolist()
+
+    print(f'workers={args.workers} demora={args.demora_ms:g}ms clientes={args.clientes} lentos={args.lentos}\n')
+    print(f"{'ronda':<28} {'consultas':>9} {'p50':>9} {'p99':>9} {'recomendaciones':>16}")
+    for nombre, lentos in [('sólo consultas baratas', 0), ('con recomendaciones lentas', args.lentos)]:
+        latencias, estados = asyncio.run(ronda(base_url, urls, product_ids, args.duracion, args.clientes, lentos))
+        p50, p99 = np.percentile(latencias, [50, 99])
+        print(f'{nombre:<28} {len(latencias):>9} {p50:>7.2f}ms {p99:>7.2f}ms {len(estados):>16}')
+
+    servidor.should_exit = True
+
+
+if __name__ == '__main__':
+    main()
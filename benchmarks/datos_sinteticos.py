@@ -0,0 +1,117 @@
+# Importaciones
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+# Géneros del catálogo (formato del ETL) con su frecuencia relativa en steam_games_limpo.parquet
+generos_frecuencia = {
+    'Indie': 15858, 'Action': 11319, 'Casual': 8282, 'Adventure': 8242, 'Strategy': 6957,
+    'Simulation': 6699, 'Rpg': 5479, 'Free To Play': 2031, 'Early Access': 1462, 'Sports': 1257,
+    'Massively Multiplayer': 1108, 'Racing': 1083, 'Design &Amp; Illustration': 460, 'Utilities': 340,
+    'Web Publishing': 268, 'Animation &Amp; Modeling': 183, 'Education': 125, 'Video Production': 116,
+    'Software Training': 105, 'Audio Production': 93, 'Photo Editing': 77, 'Accounting': 7,
+}
+
+palabras = ('dark star war quest legend city racer simulator farm space tale hero night zombie world '
+            'tycoon puzzle battle empire shadow kingdom dragon island soul fury hunter knight').split()
+
+
+# Filas de data_export_api_gzip.parquet generado por 02_Feature_Enginner.ipynb (escala 1x)
+filas_originales = 4_069_444
+
+
+def generar_datos(filas=200_000, juegos=3_000, usuarios=20_000, semilla=0, semilla_filas=None):
+    '''
+    Genera un DataFrame sintético con el mismo esquema que data_export_api_gzip.parquet.
+
+    Los géneros siguen la frecuencia del catálogo real, los juegos y usuarios siguen una
+    distribución de Zipf (pocos juegos y usuarios concentran muchas filas) y los años de
+    lanzamiento se concentran en los años recientes.
+
+    Parameters:
+        filas (int): Cantidad de filas a generar.
+        juegos (int): Cantidad de juegos distintos.
+        usuarios (int): Cantidad de usuarios distintos.
+        semilla (int): Semilla del generador aleatorio.
+        semilla_filas (int or None): Semilla aparte para las filas; con la misma 'semilla' y distintas
+            'semilla_filas' se generan lotes distintos sobre el mismo catálogo de juegos.
+
+    Returns:
+        pandas.DataFrame: Columnas release_anio, genres, playtime_forever, user_id, item_id, item_name,
+        sentiment_analysis, reviews_recommend y reviews_anio.
+    '''
+    rng = np.random.default_rng(semilla)
+
+    generos = np.array(list(generos_frecuencia))
+    pesos = np.array(list(generos_frecuencia.values()), dtype=float)
+    pesos /= pesos.sum()
+
+    # Atributos de cada juego: nombre, año de lanzamiento y un género principal
+    nombres = np.array([' '.join(rng.choice(palabras, rng.integers(1, 4))).title() for _ in range(juegos)])
+    anios_lanzamiento = np.clip(2017 - rng.exponential(3.0, juegos).astype(int), 1983, 2018)
+    genero_principal = rng.choice(len(generos), juegos, p=pesos)
+
+    if semilla_filas is not None:
+        rng = np.random.default_rng([semilla, semilla_filas])
+
+    juego = (rng.zipf(1.3, filas) - 1) % juegos
+    usuario = (rng.zipf(1.2, filas) - 1) % usuarios
+
+    # Cada fila es un género del juego: el principal o uno adicional según la frecuencia del catálogo
+    genero = np.where(rng.random(filas) < 0.5, genero_principal[juego], rng.choice(len(generos), filas, p=pesos))
+
+    return pd.DataFrame({
+        'release_anio': pd.array(anios_lanzamiento[juego], dtype='Int64'),
+        'genres': generos[genero],
+        'playtime_forever': rng.exponential(600, filas).round(),
+        'user_id': np.char.add('usuario_', usuario.astype(str)),
+        'item_id': (juego + 10).astype('int64'),
+        'item_name': nombres[juego],
+        'sentiment_analysis': rng.choice([0, 1, 2], filas, p=[0.15, 0.35, 0.5]),
+        'reviews_recommend': rng.random(filas) < 0.85,
+        'reviews_anio': pd.array(2010 + rng.binomial(5, 0.6, filas), dtype='Int64'),
+    })
+
+
+def escribir_datos(destino, filas, juegos=3_000, usuarios=20_000, semilla=0, filas_lote=1_000_000,
+                   row_group_size=100_000):
+    '''
+    Escribe un archivo Parquet sintético de 'filas' filas generándolo por lotes, para que la memoria
+    no dependa del tamaño del archivo. Todos los lotes comparten el catálogo de juegos.
+
+    Returns:
+        int: Cantidad de filas escritas.
+    '''
+    escritor = None
+    try:
+        for lote, inicio in enumerate(range(0, filas, filas_lote)):
+            df = generar_datos(min(filas_lote, filas - inicio), juegos, usuarios, semilla, semilla_filas=lote)
+            tabla = pa.Table.from_pandas(df, preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(destino, tabla.schema, compression='gzip')
+            escritor.write_table(tabla, row_group_size=row_group_size)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera un archivo Parquet sintético con el esquema de la API.')
+    parser.add_argument('destino', help='Archivo Parquet de salida')
+    parser.add_argument('--filas', type=int, default=200_000)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--row-group-size', type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = generar_datos(args.filas, semilla=args.semilla)
+    df.to_parquet(args.destino, engine='pyarrow', compression='gzip', row_group_size=args.row_group_size)
+    print(f'{len(df)} filas guardadas en {args.destino}')
+
+
+if __name__ == '__main__':
+    main()
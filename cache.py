@@ -0,0 +1,122 @@
+# Importaciones
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheRespuestas:
+    '''
+    Cache de respuestas con desalojo LRU, vencimiento opcional (TTL) e invalidación por versión de datos.
+
+    Cada entrada guarda la versión de los datos con la que se calculó; si la versión actual es otra,
+    la entrada se descarta al consultarla. Los contadores se consultan con estadisticas().
+
+    Parameters:
+        max_entradas (int): Cantidad máxima de respuestas guardadas.
+        ttl (float or None): Segundos que vive cada entrada; None para que no venzan.
+        version (callable): Función sin argumentos que devuelve la versión actual de los datos.
+    '''
+
+    def __init__(self, max_entradas=1024, ttl=None, version=lambda: None):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.version = version
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self._contadores = {'aciertos': 0, 'fallos': 0, 'desalojos': 0, 'vencidas': 0, 'invalidadas': 0}
+
+    def obtener(self, clave):
+        '''
+        Devuelve (True, valor) si la clave está en la cache y es válida, o (False, None) si no.
+        '''
+        version = self.version()
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self._contadores['fallos'] += 1
+                return False, None
+
+            valor, version_entrada, vence = entrada
+            if version_entrada != version:
+                del self._entradas[clave]
+                self._contadores['invalidadas'] += 1
+                self._contadores['fallos'] += 1
+                return False, None
+            if vence is not None and vence <= time.monotonic():
+                del self._entradas[clave]
+                self._contadores['vencidas'] += 1
+                self._contadores['fallos'] += 1
+                return False, None
+
+            self._entradas.move_to_end(clave)
+            self._contadores['aciertos'] += 1
+            return True, valor
+
+    def guardar(self, clave, valor, version):
+        '''
+        Guarda el valor para la clave junto con la versión de los datos con la que se calculó,
+        desalojando la entrada usada hace más tiempo si hace falta.
+        '''
+        vence = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entradas[clave] = (valor, version, vence)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self._contadores['desalojos'] += 1
+
+    def invalidar(self):
+        '''
+        Descarta todas las entradas.
+        '''
+        with self._lock:
+            self._contadores['invalidadas'] += len(self._entradas)
+            self._entradas.clear()
+
+    def estadisticas(self):
+        '''
+        Devuelve los contadores de la cache como diccionario.
+        '''
+        with self._lock:
+            consultas = self._contadores['aciertos'] + self._contadores['fallos']
+            return {
+                **self._contadores,
+                'tasa_aciertos': self._contadores['aciertos'] / consultas if consultas else None,
+                'entradas': len(self._entradas),
+                'max_entradas': self.max_entradas,
+                'ttl': self.ttl,
+                'version': self.version(),
+            }
+
+    def cachear(self, endpoint, normalizar=lambda argumento: argumento, respuesta=None):
+        '''
+        Decorador que guarda en la cache el resultado de un endpoint de un solo argumento.
+
+        La clave es (endpoint, normalizar(argumento)). Sólo se guardan las respuestas exitosas:
+        si el endpoint lanza una excepción (por ejemplo HTTPException 404 o 503) no se guarda nada.
+
+        Parameters:
+            endpoint (str): Nombre del endpoint, parte de la clave.
+            normalizar (callable): Convierte el argumento a su forma canónica (por ejemplo int para los años).
+            respuesta (callable or None): Si se indica, el endpoint devuelve el cuerpo ya serializado
+                (bytes), que es lo que se guarda, y cada consulta responde respuesta(cuerpo): los
+                aciertos no vuelven a serializar.
+        '''
+        armar = respuesta or (lambda valor: valor)
+
+        def decorador(funcion):
+            @functools.wraps(funcion)
+            def envoltura(*args, **kwargs):
+                argumento = args[0] if args else next(iter(kwargs.values()))
+                clave = (endpoint, normalizar(argumento))
+                encontrado, valor = self.obtener(clave)
+                if encontrado:
+                    return armar(valor)
+                # La versión se toma antes de calcular: si los datos cambian mientras tanto, la entrada queda vieja
+                version = self.version()
+                valor = funcion(*args, **kwargs)
+                self.guardar(clave, valor, version)
+                return armar(valor)
+            return envoltura
+        return decorador
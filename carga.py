@@ -0,0 +1,243 @@
+# Importaciones
+import argparse
+import hashlib
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+
+# Columnas que usan las consultas de la API
+columnas_api = ['genres', 'release_anio', 'playtime_forever', 'user_id', 'item_id', 'item_name',
+                'sentiment_analysis', 'reviews_recommend', 'reviews_anio']
+
+# Columnas de texto que se leen codificadas por diccionario (pandas.Categorical)
+columnas_categoricas = ['genres', 'item_name', 'user_id']
+
+# Tipos enteros candidatos, del más angosto al más ancho
+_tipos_enteros = [pa.int8(), pa.int16(), pa.int32(), pa.int64()]
+
+# Mayor entero que float32 representa de forma exacta
+_max_entero_float32 = 2 ** 24
+
+
+def _tipo_entero(minimo, maximo):
+    '''
+    Devuelve el tipo entero más angosto que contiene el rango [minimo, maximo].
+    '''
+    for tipo in _tipos_enteros:
+        limites = np.iinfo(tipo.to_pandas_dtype())
+        if limites.min <= minimo and maximo <= limites.max:
+            return tipo
+    return pa.int64()
+
+
+def _tipo_reducido(columna):
+    '''
+    Elige el tipo numérico más angosto que conserva exactamente los valores de la columna.
+
+    - Enteros (o flotantes con valores enteros) sin nulos: el entero más angosto que contiene el rango.
+    - Con nulos: float32 si los valores son enteros representables de forma exacta, si no se deja como está.
+    - Flotantes con decimales: float32 si la conversión no cambia ningún valor.
+
+    Parameters:
+        columna (pyarrow.ChunkedArray): Columna numérica.
+
+    Returns:
+        pyarrow.DataType: El tipo elegido (el original si no hay uno más angosto seguro).
+    '''
+    rango = pc.min_max(columna)
+    minimo, maximo = rango['min'].as_py(), rango['max'].as_py()
+    if minimo is None:
+        return columna.type
+
+    es_flotante = pa.types.is_floating(columna.type)
+    valores_enteros = not es_flotante or pc.all(pc.equal(pc.floor(columna), columna)).as_py() is not False
+
+    if valores_enteros and columna.null_count == 0:
+        return _tipo_entero(minimo, maximo)
+
+    if valores_enteros and -_max_entero_float32 <= minimo and maximo <= _max_entero_float32:
+        return pa.float32()
+
+    if es_flotante and columna.type != pa.float32():
+        reducida = columna.cast(pa.float32()).cast(columna.type)
+        if pc.all(pc.equal(reducida, columna)).as_py() is not False:
+            return pa.float32()
+
+    return columna.type
+
+
+def reducir_tipos(tabla):
+    '''
+    Convierte cada columna numérica de la tabla al tipo más angosto que conserva sus valores.
+
+    Parameters:
+        tabla (pyarrow.Table): Tabla leída del archivo Parquet.
+
+    Returns:
+        pyarrow.Table: La tabla con las columnas numéricas reducidas.
+    '''
+    for i, nombre in enumerate(tabla.column_names):
+        columna = tabla.column(i)
+        if not (pa.types.is_integer(columna.type) or pa.types.is_floating(columna.type)):
+            continue
+        tipo = _tipo_reducido(columna)
+        if tipo != columna.type:
+            tabla = tabla.set_column(i, nombre, columna.cast(tipo))
+    return tabla
+
+
+def abrir_parquet(path, columnas=columnas_api):
+    '''
+    Abre el archivo Parquet de forma que las columnas de texto de 'columnas_categoricas' se lean
+    codificadas por diccionario.
+
+    Parameters:
+        path (str): Ruta del archivo Parquet.
+        columnas (list): Columnas que se van a leer.
+
+    Returns:
+        pyarrow.parquet.ParquetFile: El archivo abierto (todavía sin leer datos).
+    '''
+    return pq.ParquetFile(path, read_dictionary=[c for c in columnas_categoricas if c in columnas])
+
+
+def tabla_a_pandas(tabla):
+    '''
+    Reduce los tipos numéricos de una tabla de Arrow y la convierte a pandas.DataFrame.
+    '''
+    # Se ignoran los metadatos de pandas para que los tipos reducidos no se vuelvan a ampliar, y con
+    # split_blocks cada columna numérica de un solo bloque queda como vista de la memoria de Arrow
+    # (sin copiar, por ejemplo sobre un snapshot mapeado en memoria)
+    return reducir_tipos(tabla).to_pandas(ignore_metadata=True, split_blocks=True)
+
+
+def cargar_parquet(path, columnas=columnas_api, row_groups=None):
+    '''
+    Lee el archivo Parquet de la API con tipos compactos.
+
+    Sólo se leen las columnas indicadas, las columnas de texto de 'columnas_categoricas' se leen
+    codificadas por diccionario (quedan como pandas.Categorical) y las numéricas se reducen al tipo
+    más angosto que conserva sus valores.
+
+    Parameters:
+        path (str): Ruta del archivo Parquet.
+        columnas (list): Columnas a leer.
+        row_groups (list or None): Grupos de filas a leer; None lee el archivo completo.
+
+    Returns:
+        pandas.DataFrame: Los datos con tipos compactos.
+    '''
+    parquet_file = abrir_parquet(path, columnas)
+
+    if row_groups is None:
+        tabla = parquet_file.read(columns=columnas)
+    else:
+        tabla = parquet_file.read_row_groups(row_groups=row_groups, columns=columnas)
+
+    return tabla_a_pandas(tabla)
+
+
+def version_archivo(path):
+    '''
+    Devuelve un identificador corto de la versión del archivo de datos (ruta, tamaño y fecha de modificación).
+    '''
+    info = os.stat(path)
+    firma = f'{os.path.abspath(path)}:{info.st_size}:{info.st_mtime_ns}'
+    return hashlib.sha1(firma.encode()).hexdigest()[:12]
+
+
+class EstadoCarga:
+    '''
+    Progreso de la carga de datos en segundo plano, consultable desde los endpoints.
+
+    La carga informa los grupos de filas leídos y marca como listo cada componente
+    (por ejemplo 'agregados' o 'recomendador') a medida que termina de construirlo.
+    '''
+
+    def __init__(self, componentes):
+        self.componentes = list(componentes)
+        self.grupos_leidos = 0
+        self.grupos_totales = None
+        self.error = None
+        self._listos = set()
+        self._lock = threading.Lock()
+
+    def iniciar(self, grupos_totales):
+        with self._lock:
+            self.grupos_totales = grupos_totales
+            self.grupos_leidos = 0
+
+    def avanzar(self):
+        with self._lock:
+            self.grupos_leidos += 1
+
+    def marcar_listo(self, componente):
+        with self._lock:
+            self._listos.add(componente)
+
+    def fallar(self, error):
+        with self._lock:
+            self.error = error
+
+    def listo(self, componente=None):
+        '''
+        Indica si el componente dado (o todos, si es None) terminó de cargarse.
+        '''
+        if componente is None:
+            return all(c in self._listos for c in self.componentes)
+        return componente in self._listos
+
+    def progreso(self):
+        '''
+        Devuelve el estado de la carga como diccionario.
+        '''
+        with self._lock:
+            return {
+                "listo": all(c in self._listos for c in self.componentes),
+                "grupos_leidos": self.grupos_leidos,
+                "grupos_totales": self.grupos_totales,
+                "componentes": {c: c in self._listos for c in self.componentes},
+                "error": self.error,
+            }
+
+
+def reporte_memoria(df):
+    '''
+    Devuelve los bytes que ocupa en memoria cada columna del DataFrame.
+
+    Parameters:
+        df (pandas.DataFrame): El DataFrame a analizar.
+
+    Returns:
+        pandas.DataFrame: Una fila por columna con 'columna', 'tipo' y 'bytes', más una fila 'TOTAL'.
+    '''
+    bytes_columnas = df.memory_usage(deep=True, index=False)
+    reporte = pd.DataFrame({
+        'columna': bytes_columnas.index,
+        'tipo': [str(df[c].dtype) for c in bytes_columnas.index],
+        'bytes': bytes_columnas.to_numpy(),
+    })
+    total = pd.DataFrame({'columna': ['TOTAL'], 'tipo': [''], 'bytes': [int(bytes_columnas.sum())]})
+    return pd.concat([reporte, total], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara la memoria de la carga por defecto contra la carga con tipos compactos.')
+    parser.add_argument('origen', nargs='?', default='data/data_export_api_gzip.parquet', help='Archivo Parquet de la API')
+    args = parser.parse_args()
+
+    por_defecto = reporte_memoria(pq.read_table(args.origen, columns=columnas_api).to_pandas())
+    compacta = reporte_memoria(cargar_parquet(args.origen))
+
+    comparacion = por_defecto.merge(compacta, on='columna', suffixes=('_defecto', '_compacta'))
+    print(comparacion.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+# Importaciones
+import argparse
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.utils.extmath import randomized_svd
+
+import carga
+
+
+# Rutas por defecto del paso offline
+parquet_gzip_file_path = 'data/data_export_api_gzip.parquet'
+modelo_path = 'data/colaborativo'
+
+# Columnas que usa el entrenamiento
+columnas_colaborativo = ['user_id', 'item_id', 'item_name', 'playtime_forever']
+
+# Cantidad de factores latentes por defecto
+factores_por_defecto = 64
+
+# Arreglos del modelo, un archivo .npy por arreglo para poder mapearlos en memoria
+archivos_modelo = ['usuarios', 'juegos', 'nombres', 'factores_usuarios', 'factores_juegos',
+                   'poseidos_indptr', 'poseidos_indices']
+
+
+################################### ENTRENAMIENTO ################################################
+
+def matriz_usuarios_juegos(df):
+    '''
+    Arma la matriz dispersa usuarios x juegos con log(1 + playtime_forever) como valor.
+
+    Un par (usuario, juego) aparece en muchas filas (una por género del juego) con las mismas horas,
+    así que se toma una sola vez. Los pares con 0 horas quedan como ceros explícitos: no aportan a
+    los factores pero cuentan como juegos que el usuario ya tiene.
+
+    Parameters:
+        df (pandas.DataFrame): DataFrame con las columnas 'user_id', 'item_id', 'item_name' y 'playtime_forever'.
+
+    Returns:
+        tuple: (user_ids ordenados, item_ids ordenados, nombres de los juegos, scipy.sparse.csr_matrix float32).
+    '''
+    datos = pd.DataFrame({
+        # astype(object) primero: las columnas pueden venir como categóricas (ver carga.py)
+        'user_id': df['user_id'].astype(object),
+        'item_id': pd.to_numeric(df['item_id'], errors='coerce'),
+        'item_name': df['item_name'].astype(object).fillna('').astype(str),
+        'playtime_forever': pd.to_numeric(df['playtime_forever'], errors='coerce').fillna(0).clip(lower=0),
+    }).dropna(subset=['user_id', 'item_id'])
+    datos['user_id'] = datos['user_id'].astype(str)
+    datos['item_id'] = datos['item_id'].astype('int64')
+
+    pares = datos.groupby(['user_id', 'item_id'])['playtime_forever'].max().reset_index()
+    nombres = datos.drop_duplicates(subset='item_id').set_index('item_id')['item_name']
+
+    codigos_usuario, user_ids = pd.factorize(pares['user_id'], sort=True)
+    codigos_juego, item_ids = pd.factorize(pares['item_id'], sort=True)
+
+    matriz = sparse.csr_matrix(
+        (np.log1p(pares['playtime_forever'].to_numpy()).astype(np.float32), (codigos_usuario, codigos_juego)),
+        shape=(len(user_ids), len(item_ids)))
+    matriz.sort_indices()
+
+    return (np.asarray(user_ids, dtype=str), np.asarray(item_ids, dtype=np.int64),
+            nombres.loc[item_ids].to_numpy(dtype=str), matriz)
+
+
+def entrenar(df, factores=factores_por_defecto, semilla=0):
+    '''
+    Entrena el modelo de filtrado colaborativo: SVD truncada (aleatorizada) de la matriz
+    usuarios x juegos con las horas jugadas en escala logarítmica como señal implícita.
+
+    El puntaje de un juego para un usuario es el producto de sus factores, es decir, la
+    reconstrucción de rango 'factores' de la fila del usuario.
+
+    Parameters:
+        df (pandas.DataFrame): DataFrame con las columnas de 'columnas_colaborativo'.
+        factores (int): Cantidad de factores latentes.
+        semilla (int): Semilla de la SVD aleatorizada.
+
+    Returns:
+        ModeloColaborativo: El modelo listo para recomendar.
+    '''
+    return entrenar_matriz(*matriz_usuarios_juegos(df), factores=factores, semilla=semilla)
+
+
+def entrenar_matriz(user_ids, item_ids, nombres, matriz, factores=factores_por_defecto, semilla=0):
+    '''
+    Entrena el modelo sobre una matriz ya armada con matriz_usuarios_juegos.
+    '''
+    factores = max(1, min(factores, min(matriz.shape) - 1))
+
+    u, s, vt = randomized_svd(matriz, n_components=factores, random_state=semilla)
+
+    return ModeloColaborativo(user_ids, item_ids, nombres, (u * s).astype(np.float32), vt.T.astype(np.float32),
+                              matriz.indptr.astype(np.int64), matriz.indices.astype(np.int32))
+
+
+####################################### MODELO ####################################################
+
+class ModeloColaborativo:
+    '''
+    Recomendador usuario-juego con factores precalculados, guardados en arreglos float32.
+
+    Para el usuario en la posición u, los juegos que ya tiene son
+    poseidos_indices[poseidos_indptr[u]:poseidos_indptr[u + 1]] (la estructura de una fila CSR).
+
+    Attributes:
+        user_ids (numpy.ndarray): IDs de los usuarios, ordenados.
+        item_ids (numpy.ndarray): IDs de los juegos (int64), ordenados.
+        item_names (numpy.ndarray): Nombres de los juegos, alineados con item_ids.
+        factores_usuarios (numpy.ndarray): Matriz (usuarios x factores) float32.
+        factores_juegos (numpy.ndarray): Matriz (juegos x factores) float32.
+        poseidos_indptr, poseidos_indices (numpy.ndarray): Juegos de cada usuario, en formato CSR.
+    '''
+
+    def __init__(self, user_ids, item_ids, item_names, factores_usuarios, factores_juegos, poseidos_indptr,
+                 poseidos_indices):
+        self.user_ids = user_ids
+        self.item_ids = item_ids
+        self.item_names = item_names
+        self.factores_usuarios = factores_usuarios
+        self.factores_juegos = factores_juegos
+        self.poseidos_indptr = poseidos_indptr
+        self.poseidos_indices = poseidos_indices
+        self._posiciones = dict(zip(user_ids.tolist(), range(len(user_ids))))
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def __contains__(self, user_id):
+        return user_id in self._posiciones
+
+    def poseidos(self, user_id):
+        '''
+        Devuelve las posiciones (en item_ids) de los juegos que el usuario ya tiene.
+        '''
+        posicion = self._posiciones[user_id]
+        return self.poseidos_indices[self.poseidos_indptr[posicion]:self.poseidos_indptr[posicion + 1]]
+
+    def recomendar(self, user_id, cantidad=5):
+        '''
+        Devuelve los juegos con mayor puntaje para el usuario, sin los que ya tiene.
+
+        El puntaje de todos los juegos es un solo producto matriz-vector (factores_juegos por los
+        factores del usuario) y los mejores se eligen con argpartition, sin ordenar todo el catálogo.
+
+        Parameters:
+            user_id (str): ID del usuario.
+            cantidad (int): Cantidad máxima de juegos.
+
+        Returns:
+            list or None: Lista de (item_id, item_name, puntaje) de mayor a menor puntaje, o None si
+            el usuario no existe.
+        '''
+        posicion = self._posiciones.get(user_id)
+        if posicion is None:
+            return None
+
+        puntajes = self.factores_juegos @ self.factores_usuarios[posicion]
+        poseidos = self.poseidos(user_id)
+        puntajes[poseidos] = -np.inf
+
+        cantidad = min(cantidad, len(puntajes) - len(poseidos))
+        if cantidad <= 0:
+            return []
+        mejores = np.argpartition(-puntajes, cantidad - 1)[:cantidad]
+        # De mayor a menor puntaje; ante empates, el juego con menor item_id
+        mejores = mejores[np.lexsort((mejores, -puntajes[mejores]))]
+
+        return [(int(self.item_ids[i]), str(self.item_names[i]), float(puntajes[i])) for i in mejores]
+
+    def guardar(self, path=modelo_path):
+        '''
+        Guarda el modelo en el directorio 'path', un archivo .npy (sin pickle) por arreglo.
+
+        Se escribe en un directorio temporal que después reemplaza al anterior, para que una
+        recarga no lea un modelo a medio escribir.
+        '''
+        temporal = f'{path}.tmp'
+        shutil.rmtree(temporal, ignore_errors=True)
+        os.makedirs(temporal)
+        arreglos = {'usuarios': self.user_ids, 'juegos': self.item_ids, 'nombres': self.item_names,
+                    'factores_usuarios': self.factores_usuarios, 'factores_juegos': self.factores_juegos,
+                    'poseidos_indptr': self.poseidos_indptr, 'poseidos_indices': self.poseidos_indices}
+        for nombre in archivos_modelo:
+            np.save(os.path.join(temporal, f'{nombre}.npy'), arreglos[nombre], allow_pickle=False)
+
+        anterior = f'{path}.anterior'
+        shutil.rmtree(anterior, ignore_errors=True)
+        if os.path.exists(path):
+            os.rename(path, anterior)
+        os.rename(temporal, path)
+        shutil.rmtree(anterior, ignore_errors=True)
+
+
+def cargar_modelo(path=modelo_path):
+    '''
+    Carga un modelo guardado con ModeloColaborativo.guardar, con los arreglos mapeados en memoria:
+    no se copian al iniciar y los procesos que abren el mismo modelo comparten esas páginas a
+    través de la cache del sistema operativo.
+
+    Raises:
+        FileNotFoundError: Si no existe el modelo.
+    '''
+    arreglos = {nombre: np.load(os.path.join(path, f'{nombre}.npy'), mmap_mode='r', allow_pickle=False)
+                for nombre in archivos_modelo}
+    return ModeloColaborativo(arreglos['usuarios'], arreglos['juegos'], arreglos['nombres'],
+                              arreglos['factores_usuarios'], arreglos['factores_juegos'],
+                              arreglos['poseidos_indptr'], arreglos['poseidos_indices'])
+
+
+######################################### CLI #####################################################
+
+def main():
+    parser = argparse.ArgumentParser(description='Entrena el modelo usuario-juego para /recomendacion_usuario.')
+    parser.add_argument('--origen', default=parquet_gzip_file_path, help='Archivo Parquet con los datos de la API')
+    parser.add_argument('--destino', default=modelo_path, help='Directorio de salida del modelo')
+    parser.add_argument('--factores', type=int, default=factores_por_defecto, help='Cantidad de factores latentes')
+    args = parser.parse_args()
+
+    df = carga.cargar_parquet(args.origen, columnas=columnas_colaborativo)
+    inicio = time.perf_counter()
+    modelo = entrenar(df, factores=args.factores)
+    segundos = time.perf_counter() - inicio
+    modelo.guardar(args.destino)
+
+    print(f'Modelo guardado en {args.destino}: {len(modelo)} usuarios, {len(modelo.item_ids)} juegos, '
+          f'{modelo.factores_juegos.shape[1]} factores (entrenamiento {segundos:.1f} s)')
+
+
+if __name__ == '__main__':
+    main()
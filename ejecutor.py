@@ -0,0 +1,70 @@
+# Importaciones
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+
+class EjecutorCPU:
+    '''
+    Ejecuta trabajo de CPU (pandas, NumPy, scikit-learn) fuera del event loop de uvicorn, en un
+    pool de hilos acotado, con límite de consultas simultáneas y tiempo máximo por consulta.
+
+    Se usan hilos y no procesos porque los datos ya están en la memoria del proceso y NumPy/SciPy
+    liberan el GIL durante las operaciones pesadas.
+
+    Parameters:
+        workers (int): Hilos del pool. Con 0 el trabajo se ejecuta en el mismo event loop
+            (bloqueante), útil sólo para comparar.
+        max_concurrentes (int): Consultas que pueden estar en el pool o esperando lugar a la vez;
+            el resto espera un lugar dentro de su tiempo máximo.
+        timeout (float): Segundos máximos por consulta, contando la espera por un lugar.
+    '''
+
+    def __init__(self, workers=4, max_concurrentes=8, timeout=10.0):
+        self.workers = workers
+        self.max_concurrentes = max_concurrentes
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='cpu') if workers > 0 else None
+        self._semaforo = asyncio.Semaphore(max_concurrentes)
+
+    async def ejecutar(self, funcion, *args, **kwargs):
+        '''
+        Ejecuta funcion(*args, **kwargs) en el pool y devuelve su resultado.
+
+        Raises:
+            HTTPException: 503 si no se consiguió lugar dentro del tiempo máximo,
+                504 si la función no terminó a tiempo.
+        '''
+        if self._pool is None:
+            return funcion(*args, **kwargs)
+
+        limite = time.monotonic() + self.timeout
+
+        try:
+            await asyncio.wait_for(self._semaforo.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="El servidor está ocupado, intente nuevamente",
+                                headers={"Retry-After": "1"})
+
+        loop = asyncio.get_running_loop()
+        # El contexto se copia al hilo (como en run_in_threadpool), para que las métricas sepan la ruta en curso
+        futuro = loop.run_in_executor(self._pool, functools.partial(contextvars.copy_context().run, funcion, *args, **kwargs))
+
+        # El lugar se libera cuando el hilo termina, aunque la consulta ya haya vencido
+        futuro.add_done_callback(lambda _: self._semaforo.release())
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(futuro), timeout=max(0.0, limite - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail=f"La consulta superó el tiempo máximo de {self.timeout:g} segundos")
+
+    def cerrar(self):
+        '''
+        Libera los hilos del pool sin esperar el trabajo pendiente.
+        '''
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
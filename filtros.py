@@ -0,0 +1,101 @@
+# Importaciones
+import numbers
+import threading
+
+import numpy as np
+
+
+def _validar(columna, tipo, valor):
+    '''
+    Verifica que el valor sea del tipo declarado para la columna y lo devuelve como ese tipo.
+    Los valores nunca se interpretan como texto de una expresión: se comparan tal cual.
+    '''
+    if tipo is bool:
+        ok = isinstance(valor, (bool, np.bool_))
+    elif tipo is int:
+        ok = isinstance(valor, numbers.Integral) and not isinstance(valor, (bool, np.bool_))
+    elif tipo is float:
+        ok = isinstance(valor, numbers.Real) and not isinstance(valor, (bool, np.bool_))
+    else:
+        ok = isinstance(valor, tipo)
+    if not ok:
+        raise TypeError(f"La columna {columna} se filtra por {tipo.__name__}, no por {type(valor).__name__}: {valor!r}")
+    return tipo(valor)
+
+
+def _arreglo(serie):
+    '''
+    Devuelve los valores de la columna como arreglo de NumPy; las columnas enteras con nulos de
+    pandas (Int64) sin nulos se pasan a su tipo de NumPy para compararlas sin objetos de Python.
+    '''
+    numpy_dtype = getattr(serie.dtype, 'numpy_dtype', None)
+    if numpy_dtype is not None and not serie.hasnans:
+        return serie.to_numpy(dtype=numpy_dtype)
+    return serie.to_numpy()
+
+
+class TablaFiltrable:
+    '''
+    Filtros por igualdad sobre un DataFrame en memoria, sin armar expresiones de texto
+    (reemplaza a DataFrame.query con f-strings).
+
+    Cada condición es columna=valor o columna=[valores]; los valores se validan contra el tipo
+    declarado de la columna. Para cada (columna, valor) presente se calcula una sola vez la
+    máscara booleana de sus filas y se guarda; un filtro es la combinación de esas máscaras con "o"
+    entre los valores de una columna y con "y" entre columnas. Un valor que no está en la columna
+    da una máscara vacía.
+
+    Parameters:
+        df (pandas.DataFrame): Datos a filtrar (no se copian).
+        tipos (dict): {columna: tipo} de las columnas por las que se puede filtrar (int, float, str o bool).
+    '''
+
+    def __init__(self, df, tipos):
+        self.df = df
+        self.tipos = dict(tipos)
+        self._valores = {columna: _arreglo(df[columna]) for columna in self.tipos}
+        self._mascaras = {}
+        self._lock = threading.Lock()
+
+    def _mascara_valor(self, columna, valor):
+        clave = (columna, valor)
+        mascara = self._mascaras.get(clave)
+        if mascara is None:
+            mascara = self._valores[columna] == valor
+            mascara.flags.writeable = False
+            # Sólo se guardan las máscaras de valores presentes, para que valores arbitrarios
+            # pedidos por los usuarios no hagan crecer la memoria
+            if mascara.any():
+                with self._lock:
+                    self._mascaras[clave] = mascara
+        return mascara
+
+    def mascara(self, **condiciones):
+        '''
+        Devuelve la máscara booleana (numpy) de las filas que cumplen todas las condiciones.
+
+        Raises:
+            KeyError: Si se filtra por una columna no declarada.
+            TypeError: Si un valor no es del tipo declarado de su columna.
+        '''
+        resultado = np.ones(len(self.df), dtype=bool)
+        for columna, valores in condiciones.items():
+            if columna not in self.tipos:
+                raise KeyError(f"No se puede filtrar por la columna {columna}")
+            if not isinstance(valores, (list, tuple, set, frozenset)):
+                valores = [valores]
+            valores = [_validar(columna, self.tipos[columna], valor) for valor in valores]
+
+            por_columna = np.zeros(len(self.df), dtype=bool)
+            for valor in valores:
+                np.logical_or(por_columna, self._mascara_valor(columna, valor), out=por_columna)
+            np.logical_and(resultado, por_columna, out=resultado)
+        return resultado
+
+    def filtrar(self, columnas=None, **condiciones):
+        '''
+        Devuelve las filas que cumplen las condiciones (sólo las columnas pedidas, si se indican).
+        '''
+        posiciones = np.flatnonzero(self.mascara(**condiciones))
+        df = self.df if columnas is None else self.df[columnas]
+        return df.take(posiciones)
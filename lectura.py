@@ -0,0 +1,193 @@
+# Importaciones
+import argparse
+import json
+import threading
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+import carga
+
+
+# Columnas con índice auxiliar valor -> grupos de filas (las estadísticas mínimo/máximo de un texto
+# sólo sirven si el archivo está ordenado por esa columna)
+columnas_indexadas = ['genres']
+
+
+def path_indice(path):
+    '''
+    Devuelve la ruta del índice auxiliar de un archivo Parquet (se guarda al lado del archivo).
+    '''
+    return f'{path}.indice.json'
+
+
+class LectorParquet:
+    '''
+    Lectura bajo demanda del archivo Parquet de la API: dado un filtro por igualdad
+    (por ejemplo {'reviews_anio': 2012} o {'genres': 'Action'}) lee sólo los grupos de filas
+    que pueden tener filas que lo cumplan y sólo las columnas pedidas.
+
+    Para descartar grupos se usan las estadísticas mínimo/máximo de cada grupo (guardadas en los
+    metadatos del archivo) y, para las columnas de 'columnas_indexadas', un índice auxiliar
+    valor -> grupos de filas que se construye una vez y se guarda junto al archivo.
+
+    Cada lectura devuelve un reporte con los grupos leídos y salteados; los totales se consultan
+    con estadisticas().
+
+    Parameters:
+        path (str): Ruta del archivo Parquet.
+        indexadas (list): Columnas con índice auxiliar.
+    '''
+
+    def __init__(self, path, indexadas=columnas_indexadas):
+        self.path = path
+        self.archivo = pq.ParquetFile(path)
+        self.grupos_totales = self.archivo.num_row_groups
+        self.version = carga.version_archivo(path)
+        self.indices = self._cargar_indices(indexadas)
+        self._rangos = {}
+        self._lock = threading.Lock()
+        self._contadores = {'lecturas': 0, 'grupos_leidos': 0, 'grupos_salteados': 0, 'filas_leidas': 0}
+
+    def _cargar_indices(self, indexadas):
+        '''
+        Lee el índice auxiliar si corresponde a esta versión del archivo; si no, lo construye y lo guarda.
+        '''
+        try:
+            with open(path_indice(self.path), encoding='utf-8') as f:
+                guardado = json.load(f)
+            if guardado['version'] == self.version and all(c in guardado['columnas'] for c in indexadas):
+                return {c: {valor: set(grupos) for valor, grupos in guardado['columnas'][c].items()} for c in indexadas}
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+
+        indices = {c: self._construir_indice(c) for c in indexadas}
+        try:
+            with open(path_indice(self.path), 'w', encoding='utf-8') as f:
+                json.dump({'version': self.version,
+                           'columnas': {c: {valor: sorted(grupos) for valor, grupos in indice.items()}
+                                        for c, indice in indices.items()}}, f)
+        except OSError:
+            # Sin permiso de escritura el índice se usa sólo en memoria
+            pass
+        return indices
+
+    def _construir_indice(self, columna):
+        indice = {}
+        for i in range(self.grupos_totales):
+            valores = pc.unique(self.archivo.read_row_group(i, columns=[columna]).column(0))
+            for valor in valores.to_pylist():
+                if valor is not None:
+                    indice.setdefault(str(valor), set()).add(i)
+        return indice
+
+    def _rango(self, columna):
+        '''
+        Devuelve [(mínimo, máximo) o None por grupo] para la columna, desde los metadatos del archivo.
+        '''
+        if columna not in self._rangos:
+            posicion = self.archivo.schema_arrow.get_field_index(columna)
+            if posicion < 0:
+                raise KeyError(f'La columna {columna} no existe en {self.path}')
+            rangos = []
+            for i in range(self.grupos_totales):
+                estadisticas = self.archivo.metadata.row_group(i).column(posicion).statistics
+                rangos.append((estadisticas.min, estadisticas.max) if estadisticas is not None and estadisticas.has_min_max else None)
+            self._rangos[columna] = rangos
+        return self._rangos[columna]
+
+    def grupos(self, filtro):
+        '''
+        Devuelve los grupos de filas (ordenados) que pueden tener filas que cumplan todas las igualdades del filtro.
+        '''
+        candidatos = set(range(self.grupos_totales))
+        for columna, valor in filtro.items():
+            if columna in self.indices:
+                candidatos &= self.indices[columna].get(str(valor), set())
+                continue
+            for i, rango in enumerate(self._rango(columna)):
+                if rango is not None and not (rango[0] <= valor <= rango[1]):
+                    candidatos.discard(i)
+        return sorted(candidatos)
+
+    def leer(self, filtro, columnas):
+        '''
+        Lee las filas que cumplen el filtro, sólo con las columnas pedidas.
+
+        Parameters:
+            filtro (dict): {columna: valor} que deben cumplir las filas (igualdades unidas con "y").
+            columnas (list): Columnas a devolver.
+
+        Returns:
+            tuple: (pandas.DataFrame con tipos compactos, reporte) donde el reporte es un diccionario
+            con 'grupos_totales', 'grupos_leidos', 'grupos_salteados', 'filas_leidas' y 'filas'.
+        '''
+        grupos = self.grupos(filtro)
+        leer = list(dict.fromkeys(list(columnas) + list(filtro)))
+        tabla = self.archivo.read_row_groups(grupos, columns=leer) if grupos else self.archivo.schema_arrow.empty_table().select(leer)
+        filas_leidas = tabla.num_rows
+
+        if filtro and tabla.num_rows:
+            mascara = None
+            for columna, valor in filtro.items():
+                try:
+                    condicion = pc.equal(tabla[columna], pa.scalar(valor, type=tabla.schema.field(columna).type))
+                except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+                    # El valor no entra en el tipo de la columna (por ejemplo un año fuera de rango): ninguna fila
+                    condicion = pa.array([False] * tabla.num_rows)
+                mascara = condicion if mascara is None else pc.and_(mascara, condicion)
+            tabla = tabla.filter(mascara)
+
+        reporte = {
+            'grupos_totales': self.grupos_totales,
+            'grupos_leidos': len(grupos),
+            'grupos_salteados': self.grupos_totales - len(grupos),
+            'filas_leidas': filas_leidas,
+            'filas': tabla.num_rows,
+        }
+        with self._lock:
+            self._contadores['lecturas'] += 1
+            self._contadores['grupos_leidos'] += reporte['grupos_leidos']
+            self._contadores['grupos_salteados'] += reporte['grupos_salteados']
+            self._contadores['filas_leidas'] += filas_leidas
+
+        return carga.tabla_a_pandas(tabla.select(list(columnas))), reporte
+
+    def estadisticas(self):
+        '''
+        Devuelve los totales de las lecturas hechas como diccionario.
+        '''
+        with self._lock:
+            grupos = self._contadores['grupos_leidos'] + self._contadores['grupos_salteados']
+            return {
+                **self._contadores,
+                'grupos_totales': self.grupos_totales,
+                'fraccion_salteada': self._contadores['grupos_salteados'] / grupos if grupos else None,
+                'version': self.version,
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Construye el índice auxiliar del archivo Parquet y muestra '
+                                                 'los grupos de filas que se leen para un filtro.')
+    parser.add_argument('origen', nargs='?', default='data/data_export_api_gzip.parquet', help='Archivo Parquet de la API')
+    parser.add_argument('--filtro', nargs='*', default=[], help='Igualdades columna=valor, por ejemplo reviews_anio=2012')
+    args = parser.parse_args()
+
+    lector = LectorParquet(args.origen)
+    print(f'Índice auxiliar: {path_indice(args.origen)} ({", ".join(lector.indices)})')
+
+    filtro = {}
+    for condicion in args.filtro:
+        columna, valor = condicion.split('=', 1)
+        tipo = lector.archivo.schema_arrow.field(columna).type
+        filtro[columna] = int(valor) if pa.types.is_integer(tipo) else float(valor) if pa.types.is_floating(tipo) else valor
+
+    if filtro:
+        df, reporte = lector.leer(filtro, list(filtro))
+        print(f'{filtro}: {reporte}')
+
+
+if __name__ == '__main__':
+    main()
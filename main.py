@@ -1,49 +1,429 @@
 # Importaciones
-from fastapi import FastAPI, Path, HTTPException
-from fastapi.responses import HTMLResponse
-import asyncio
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Path, HTTPException, Header
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
+from pydantic import BaseModel
+from typing import List
+import logging
 import pandas as pd
-import pyarrow.parquet as pq
+import pyarrow as pa
 import os
+import secrets
+import threading
+import weakref
 
+import agregados
+import cache
+import carga
+import colaborativo
+import ejecutor
+import lectura
+import metricas
+import recarga
+import recomendador
+import respuestas
+import snapshot
 
-# Se instancia la aplicación
-app = FastAPI()
+
+# Logger de uvicorn, para que los mensajes de la carga salgan junto a los del servidor
+logger = logging.getLogger('uvicorn.error')
+
+# Latencia por ruta, tiempos por etapa y filas leídas, expuestos en /metrics (ver metricas.py)
+metricas_api = metricas.Metricas()
 
 ####################################### CARGA DE DATOS ##########################################
 
 # Ruta del archivo Parquet Gzip
 parquet_gzip_file_path = 'data/data_export_api_gzip.parquet'
 
-try:
-    # Especificar el porcentaje de datos a cargar
-    sample_percent = 5  # Ajusta según tus necesidades
+# Snapshot Arrow IPC de los datos (python snapshot.py): si corresponde a la versión del Parquet se
+# usa en su lugar, mapeado en memoria y sin descomprimir
+snapshot_file_path = os.environ.get('SNAPSHOT_PATH', snapshot.snapshot_file_path)
+
+# Tabla de vecinos del sistema de recomendación, precalculada con: python recomendador.py
+topk_file_path = recomendador.topk_file_path
+
+# Modelo usuario-juego de /recomendacion_usuario, entrenado con: python colaborativo.py
+colaborativo_path = os.environ.get('COLABORATIVO_PATH', colaborativo.modelo_path)
+
+# Búsqueda de vecinos para las consultas por lote: 'exacta' o 'ivf' (aproximada, ver vecinos.py)
+busqueda_vecinos = os.environ.get('BUSQUEDA_VECINOS', 'exacta')
+parametros_busqueda = {'listas': int(os.environ.get('IVF_LISTAS', 256)),
+                       'sondeos': int(os.environ.get('IVF_SONDEOS', 8))} if busqueda_vecinos == 'ivf' else {}
+
+# Columnas que usan UserForGenre y la construcción en memoria de los recomendadores;
+# el resto de las consultas se responde desde los agregados sobre el archivo completo.
+columnas_muestra = ['genres', 'release_anio', 'playtime_forever', 'user_id', 'item_id', 'item_name']
+
+# Especificar el porcentaje de datos a cargar. Con la carga de tipos compactos (carga.py)
+# el archivo completo entra en la memoria del despliegue.
+sample_percent = int(os.environ.get('SAMPLE_PERCENT', 100))  # Ajusta según tus necesidades
+if not 1 <= sample_percent <= 100:
+    raise ValueError(f"SAMPLE_PERCENT debe estar entre 1 y 100 (se recibió {sample_percent})")
+
+# Modo de las consultas: 'memoria' responde desde agregados calculados al iniciar; 'bajo_demanda'
+# lee en cada consulta sólo los grupos de filas que corresponden al filtro (ver lectura.py), sin
+# tener los datos en memoria
+modo_consultas = os.environ.get('MODO_CONSULTAS', 'memoria')
+
+# Segundos que se sugiere esperar (cabecera Retry-After) mientras los datos se cargan
+retry_after_segundos = 5
+
+# Componentes de los datos: cada consulta devuelve 503 hasta que el componente del que depende esté listo
+componentes_datos = ['agregados', 'usuarios_genero', 'recomendador', 'colaborativo']
+
+# Versiones de los datos que siguen en memoria (la actual y las que todavía usa alguna consulta)
+versiones_vivas = weakref.WeakSet()
+
+
+class DatosAPI:
+    '''
+    Una versión de los datos con los que se responden las consultas: la muestra, los agregados, la
+    tabla de UserForGenre, la tabla de vecinos del recomendador, el modelo usuario-juego y, en el
+    modo 'bajo_demanda', el lector del archivo, junto con el avance de su construcción (estado).
+
+    La versión en uso es datos_api. Al recargar se construye una versión nueva completa y se
+    reemplaza la referencia de una vez; cada consulta toma la referencia al empezar (en requiere) y
+    termina con esa versión, que se libera cuando ninguna consulta la usa.
+    '''
+
+    def __init__(self):
+        self.estado = carga.EstadoCarga(componentes_datos)
+        # Versión del archivo de datos (invalida la cache de respuestas cuando cambia)
+        self.version = None
+        self.df_data_muestra = None
+        self.agregados_api = None
+        self.usuarios_genero = None
+        self.tabla_vecinos = None
+        self.modelo_colaborativo = None
+        # Lector del archivo Parquet para el modo 'bajo_demanda'
+        self.lector_api = None
+        versiones_vivas.add(self)
+
+
+# Los datos se cargan en segundo plano: la API empieza a responder enseguida con la primera
+# versión, que se va completando a medida que se cargan sus componentes.
+datos_api = DatosAPI()
+
+# Versión que se está construyendo en una recarga (para informar su avance)
+datos_en_construccion = None
+
+# Cache de respuestas para las consultas por año y por género
+cache_respuestas = cache.CacheRespuestas(
+    max_entradas=int(os.environ.get('CACHE_MAX_ENTRADAS', 1024)),
+    ttl=float(os.environ['CACHE_TTL_SEGUNDOS']) if os.environ.get('CACHE_TTL_SEGUNDOS') else None,
+    version=lambda: datos_api.version,
+)
+
+
+def construir_datos(datos):
+    '''
+    Carga los datos de la API y construye en 'datos' las estructuras que usan las consultas,
+    informando el avance en datos.estado.
+
+    Cada grupo de filas del archivo se lee una sola vez: se suma a los agregados y, si forma parte
+    de la muestra, se guardan sus columnas para UserForGenre y los recomendadores.
+    '''
+    estado = datos.estado
+
+    # Sin el Parquet (sólo con el snapshot) la versión se toma de los metadatos del snapshot
+    datos.version = carga.version_archivo(parquet_gzip_file_path) if os.path.exists(parquet_gzip_file_path) else None
+
+    try:
+        datos.tabla_vecinos = recomendador.cargar_topk(topk_file_path, busqueda_vecinos, **parametros_busqueda)
+        estado.marcar_listo('recomendador')
+    except FileNotFoundError:
+        # Sin la tabla precalculada se construye en memoria al terminar la carga
+        logger.info(f"No se encontró {topk_file_path}, la tabla de vecinos se construirá en memoria")
+
+    try:
+        datos.modelo_colaborativo = colaborativo.cargar_modelo(colaborativo_path)
+        estado.marcar_listo('colaborativo')
+    except FileNotFoundError:
+        # Sin el modelo entrenado se entrena en memoria al terminar la carga
+        logger.info(f"No se encontró el modelo {colaborativo_path}, se entrenará en memoria")
+
+    if modo_consultas == 'bajo_demanda':
+        cargar_bajo_demanda(datos)
+        return
+
+    tabla_snapshot = None
+    if snapshot.snapshot_vigente(snapshot_file_path, parquet_gzip_file_path):
+        # Snapshot mapeado en memoria: se recorre en partes del tamaño de los grupos de filas del Parquet
+        tabla_snapshot = snapshot.abrir_snapshot(snapshot_file_path)
+        metadatos_snapshot = snapshot.metadatos(snapshot_file_path)
+        datos.version = metadatos_snapshot.get('version_origen', datos.version)
+        grupos = snapshot.particiones(tabla_snapshot, int(metadatos_snapshot.get('grupos_origen', 1)))
+        leer_grupo = grupos.__getitem__
+        total_row_groups = len(grupos)
+        logger.info(f"Usando el snapshot {snapshot_file_path}")
+    else:
+        # Abrir el archivo Parquet con las columnas de texto codificadas por diccionario
+        parquet_file = carga.abrir_parquet(parquet_gzip_file_path)
+        leer_grupo = lambda i: parquet_file.read_row_group(i, columns=carga.columnas_api)
+
+        # Obtener la cantidad total de grupos de filas en el archivo
+        total_row_groups = parquet_file.num_row_groups
+
+    estado.iniciar(total_row_groups)
+
+    # Calcular los grupos de filas a incluir en la muestra
+    sample_row_groups = {i for i in range(total_row_groups) if i % (100 // sample_percent) == 0}
+
+    acumulador = agregados.AcumuladorAgregados()
+    tablas_muestra = []
+
+    for i in range(total_row_groups):
+        with metricas_api.etapa('leer', ruta='carga'):
+            tabla = leer_grupo(i)
+        metricas_api.sumar_filas(tabla.num_rows, ruta='carga')
+
+        # Agregados sobre el archivo completo para PlayTimeGenre, UsersRecommend, UsersNotRecommend y sentiment_analysis
+        with metricas_api.etapa('agregar', ruta='carga'):
+            acumulador.agregar(tabla.select(agregados.columnas_agregados).to_pandas())
+
+        if i in sample_row_groups:
+            tablas_muestra.append(tabla.select(columnas_muestra))
+
+        estado.avanzar()
+
+    datos.agregados_api = acumulador.resultado()
+    estado.marcar_listo('agregados')
+
+    if tabla_snapshot is not None and len(tablas_muestra) == total_row_groups:
+        # Snapshot completo: las columnas numéricas quedan respaldadas por el archivo mapeado, sin copiar
+        tablas_muestra = [tabla_snapshot.select(columnas_muestra)]
+
+    # Muestra con tipos compactos
+    with metricas_api.etapa('muestra', ruta='carga'):
+        datos.df_data_muestra = carga.tabla_a_pandas(pa.concat_tables(tablas_muestra))
+    del tablas_muestra
+
+    # Informar la memoria que ocupa cada columna
+    for _, fila in carga.reporte_memoria(datos.df_data_muestra).iterrows():
+        logger.info(f"Memoria de {fila['columna']} ({fila['tipo']}): {fila['bytes'] / 2**20:.1f} MiB")
+
+    # Resultado de UserForGenre precalculado para todos los géneros en una sola pasada
+    with metricas_api.etapa('usuarios_genero', ruta='carga'):
+        datos.usuarios_genero = agregados.construir_usuarios_genero(datos.df_data_muestra)
+    estado.marcar_listo('usuarios_genero')
+
+    if datos.tabla_vecinos is None:
+        # Ajuste del TF-IDF y búsqueda de los vecinos de todos los juegos
+        with metricas_api.etapa('similitud', ruta='carga'):
+            datos.tabla_vecinos = recomendador.construir_topk(datos.df_data_muestra, busqueda=busqueda_vecinos, **parametros_busqueda)
+        estado.marcar_listo('recomendador')
+
+    if datos.modelo_colaborativo is None:
+        # SVD de la matriz usuarios x juegos
+        with metricas_api.etapa('colaborativo', ruta='carga'):
+            datos.modelo_colaborativo = colaborativo.entrenar(datos.df_data_muestra)
+        estado.marcar_listo('colaborativo')
+
+    logger.info(f"Datos cargados: {total_row_groups} grupos de filas (versión {datos.version})")
+
+
+def cargar_datos():
+    '''
+    Primera carga de los datos, sobre la versión ya publicada en datos_api: las consultas se
+    habilitan a medida que cada componente queda listo.
+    '''
+    try:
+        construir_datos(datos_api)
+    except Exception as e:
+        logger.exception("Error al cargar los datos de la API")
+        datos_api.estado.fallar(f"Error al cargar el archivo de datos comprimido con Gzip: {e}")
+
+
+def reconstruir_datos():
+    '''
+    Construye una versión nueva de los datos, sin publicarla. La usa el recargador en su hilo.
+    '''
+    global datos_en_construccion
+
+    datos = DatosAPI()
+    datos_en_construccion = datos
+    try:
+        construir_datos(datos)
+    finally:
+        datos_en_construccion = None
+    return datos
+
 
-    # Leer una muestra del archivo Parquet directamente con pyarrow
-    parquet_file = pq.ParquetFile(parquet_gzip_file_path)
+def publicar_datos(datos):
+    '''
+    Pone en uso una versión ya construida. Las consultas en curso terminan con la versión anterior.
+    '''
+    global datos_api
 
-    # Obtener la cantidad total de grupos de filas en el archivo
-    total_row_groups = parquet_file.num_row_groups
+    version_anterior = datos_api.version
+    datos_api = datos
+    logger.info(f"Datos recargados: versión {version_anterior} -> {datos.version}")
 
-    # Calcular la cantidad de grupos de filas a incluir en la muestra
-    sample_row_groups = [i for i in range(total_row_groups) if i % (100 // sample_percent) == 0]
 
-    # Leer solo los grupos de filas incluidos en la muestra
-    df_data_muestra = parquet_file.read_row_groups(row_groups=sample_row_groups).to_pandas()
+# Recarga de los datos sin reiniciar el servidor: con POST /admin/recargar (si ADMIN_TOKEN está
+# definido) o, si RECARGA_INTERVALO_SEGUNDOS es mayor que 0, cuando cambia alguno de los archivos de datos
+recargador = recarga.Recargador(reconstruir_datos, publicar_datos)
+admin_token = os.environ.get('ADMIN_TOKEN')
+recarga_intervalo = float(os.environ.get('RECARGA_INTERVALO_SEGUNDOS', 0))
+vigilante = recarga.VigilanteArchivos([parquet_gzip_file_path, snapshot_file_path, topk_file_path,
+                                       os.path.join(colaborativo_path, 'factores_juegos.npy')],
+                                      recarga_intervalo, recargador.iniciar) if recarga_intervalo > 0 else None
+
+
+def cargar_bajo_demanda(datos):
+    '''
+    Prepara el modo 'bajo_demanda': abre el archivo con sus estadísticas e índice auxiliar, sin leer
+    los datos. Las consultas leen en cada pedido los grupos de filas que necesitan.
+    '''
+    estado = datos.estado
+
+    datos.lector_api = lectura.LectorParquet(parquet_gzip_file_path)
+    estado.iniciar(datos.lector_api.grupos_totales)
+    estado.marcar_listo('agregados')
+    estado.marcar_listo('usuarios_genero')
 
+    if datos.tabla_vecinos is None:
+        # Sólo las columnas del recomendador
+        df_juegos, _ = datos.lector_api.leer({}, ['item_id', 'item_name', 'genres'])
+        datos.tabla_vecinos = recomendador.construir_topk(df_juegos, busqueda=busqueda_vecinos, **parametros_busqueda)
+        estado.marcar_listo('recomendador')
 
-except FileNotFoundError:
-    # Si el archivo no se encuentra, maneja la excepción
-    raise HTTPException(status_code=500, detail="Error al cargar el archivo de datos comprimido con Gzip")
+    if datos.modelo_colaborativo is None:
+        df_usuarios, _ = datos.lector_api.leer({}, colaborativo.columnas_colaborativo)
+        datos.modelo_colaborativo = colaborativo.entrenar(df_usuarios)
+        estado.marcar_listo('colaborativo')
 
+    logger.info(f"Consultas bajo demanda sobre {parquet_gzip_file_path}: {datos.lector_api.grupos_totales} grupos de filas")
+
+
+def leer_filtrado(datos, endpoint, filtro, columnas):
+    '''
+    Lee las filas del filtro en el modo 'bajo_demanda' e informa los grupos de filas leídos y salteados.
+    '''
+    with metricas_api.etapa('filtrar'):
+        df, reporte = datos.lector_api.leer(filtro, columnas)
+    metricas_api.sumar_filas(reporte['filas_leidas'])
+    logger.info(f"{endpoint} {filtro}: {reporte['grupos_leidos']} grupos de filas leídos, "
+                f"{reporte['grupos_salteados']} salteados de {reporte['grupos_totales']} ({reporte['filas']} filas)")
+    return df
+
+
+def agregados_para(datos, endpoint, filtro):
+    '''
+    Devuelve los agregados con los que se responde la consulta: los calculados al cargar o, en el
+    modo 'bajo_demanda', los de las filas que cumplen el filtro.
+    '''
+    if datos.lector_api is None:
+        return datos.agregados_api
+    df = leer_filtrado(datos, endpoint, filtro, agregados.columnas_agregados)
+    with metricas_api.etapa('agregar_filas'):
+        acumulador = agregados.AcumuladorAgregados()
+        acumulador.agregar(df)
+        return acumulador.resultado()
+
+
+def usuarios_genero_para(datos, genero):
+    '''
+    Devuelve la tabla de UserForGenre precalculada o, en el modo 'bajo_demanda', la del género leído del archivo.
+    '''
+    if datos.lector_api is None:
+        return datos.usuarios_genero
+    df = leer_filtrado(datos, 'UserForGenre', {'genres': genero}, ['genres', 'user_id', 'release_anio', 'playtime_forever'])
+    with metricas_api.etapa('agregar_filas'):
+        return agregados.construir_usuarios_genero(df)
+
+
+def requiere(componente):
+    '''
+    Devuelve la versión de los datos en uso si su componente está cargado; si no, corta la consulta
+    con 503 (o 500 si la carga falló). La consulta usa esa versión hasta el final aunque mientras
+    tanto una recarga publique otra.
+    '''
+    datos = datos_api
+    if datos.estado.listo(componente):
+        return datos
+    progreso = datos.estado.progreso()
+    if progreso["error"] is not None:
+        raise HTTPException(status_code=500, detail=progreso["error"])
+    raise HTTPException(status_code=503,
+                        detail=f"Los datos se están cargando ({progreso['grupos_leidos']}/{progreso['grupos_totales']} grupos de filas)",
+                        headers={"Retry-After": str(retry_after_segundos)})
+
+
+# Pool acotado para el trabajo de CPU de los endpoints async (cantidad de hilos, consultas
+# simultáneas y tiempo máximo por consulta configurables por variables de entorno)
+cpu_workers = int(os.environ.get('CPU_WORKERS', min(4, os.cpu_count() or 1)))
+ejecutor_cpu = ejecutor.EjecutorCPU(
+    workers=cpu_workers,
+    max_concurrentes=int(os.environ.get('CPU_MAX_CONCURRENTES', 2 * cpu_workers)),
+    timeout=float(os.environ.get('CPU_TIMEOUT_SEGUNDOS', 10)),
+)
+
+
+# Perfilador por muestreo (ver metricas.py): con PERFILADOR=1 se activa al iniciar, para ver
+# también la carga de datos; si no, se activa con POST /admin/perfilador
+perfilador = metricas.Perfilador(intervalo=float(os.environ.get('PERFILADOR_INTERVALO_SEGUNDOS', 0.005)))
+perfil_file_path = os.environ.get('PERFIL_PATH', 'perfil_api.folded')
+
+
+def detener_perfilador():
+    '''
+    Detiene el perfilador y guarda las pilas muestreadas en perfil_file_path.
+    '''
+    muestras = perfilador.detener()
+    perfilador.guardar(perfil_file_path)
+    logger.info(f"Perfil guardado en {perfil_file_path} ({muestras} muestras)")
+    return {"archivo": perfil_file_path, "muestras": muestras}
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if os.environ.get('PERFILADOR') == '1':
+        perfilador.iniciar()
+    # La carga corre en un hilo aparte para que uvicorn acepte conexiones desde el inicio. Con
+    # servidor.py los datos ya vienen cargados del proceso principal y no se vuelven a cargar.
+    if not datos_api.estado.listo():
+        threading.Thread(target=cargar_datos, name='carga-datos', daemon=True).start()
+    if vigilante is not None:
+        vigilante.iniciar()
+    yield
+    if vigilante is not None:
+        vigilante.detener()
+    if perfilador.activo():
+        detener_perfilador()
+    ejecutor_cpu.cerrar()
+
+
+class RespuestaJSON(JSONResponse):
+    '''
+    Respuesta JSON por defecto de la API: mide la serialización como la etapa 'serializar_json'.
+    '''
+
+    def render(self, content):
+        with metricas_api.etapa('serializar_json'):
+            return super().render(content)
+
+
+def serializar(contenido):
+    '''
+    Devuelve los bytes JSON del contenido, midiendo la etapa 'serializar_json'. Los endpoints que
+    la usan responden con respuestas.RespuestaPrecodificada, sin pasar por jsonable_encoder.
+    '''
+    with metricas_api.etapa('serializar_json'):
+        return respuestas.codificar(contenido)
+
+
+# Se instancia la aplicación
+app = FastAPI(lifespan=lifespan, default_response_class=RespuestaJSON)
+app.add_middleware(metricas.MiddlewareMetricas, metricas=metricas_api)
 
 
 ############################################ FUNCIONES ######################################
 
-@app.get('/PlayTimeGenre/{genero}')
-def PlayTimeGenre(genero: str):
+@app.get('/PlayTimeGenre/{genero}', tags=["Consultas Generales"])
+@cache_respuestas.cachear('PlayTimeGenre', normalizar=str, respuesta=respuestas.RespuestaPrecodificada)
+def PlayTimeGenre(genero: str = Path(..., description="Género para el cual se busca el año con más horas jugadas(Ingresar formato 'Mxxx')")):
     '''
     Datos:
     - genero (str): Género para el cual se busca el año con más horas jugadas.
@@ -54,22 +434,28 @@ def PlayTimeGenre(genero: str):
     Return:
     - Dict: {"Año de lanzamiento con más horas jugadas para Género X": int}
     '''
+    datos = requiere('agregados')
 
     try:
-        # Filtrar el DataFrame por el género
-        genero_filtrado = df_data_muestra.query(f"genres=='{genero}'")
+        # Obtener el año con más horas jugadas desde los agregados por (género, año)
+        agregados_genero = agregados_para(datos, 'PlayTimeGenre', {'genres': genero})
+        with metricas_api.etapa('agregar'):
+            max_hours_year = agregados_genero.anio_mas_jugado(genero)
 
-        # Obtener el año con más horas jugadas
-        max_hours_year = genero_filtrado.groupby('release_anio')['playtime_forever'].sum().idxmax()
+        if max_hours_year is None:
+            raise HTTPException(status_code=404, detail=f"No hay datos para el género {genero}")
 
-        return {"Año de lanzamiento con más horas jugadas para el Género " + genero: int(max_hours_year)}
+        return serializar({"Año de lanzamiento con más horas jugadas para el Género " + genero: max_hours_year})
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
 
-@app.get('/UserForGenre/{genero}')
-def UserForGenre(genero:str):
+@app.get('/UserForGenre/{genero}', tags=["Consultas Generales"])
+@cache_respuestas.cachear('UserForGenre', normalizar=str, respuesta=respuestas.RespuestaPrecodificada)
+def UserForGenre(genero: str = Path(..., description="Género para el cual se busca el usuario con más horas jugadas y la acumulación de horas por año")):
     '''
     Datos:
     - genero (str): Género para el cual se busca el usuario con más horas jugadas y la acumulación de horas por año.
@@ -80,46 +466,46 @@ def UserForGenre(genero:str):
     Return:
     - Dict: {"Usuario con más horas jugadas para Género X": List, "Horas jugadas": List}
     '''
+    datos = requiere('usuarios_genero')
 
     try:
-        # Cargar solo las columnas necesarias para esta función
-        juegos_genero = df_data_muestra[['genres', 'release_anio', 'playtime_forever', 'user_id']].copy()
-
-        condition = juegos_genero['genres'].apply(lambda x: genero in x)
-        juegos_genero = juegos_genero[condition]
-
-        juegos_genero['playtime_forever'] = juegos_genero['playtime_forever'] / 60
-        juegos_genero['release_anio'] = pd.to_numeric(juegos_genero['release_anio'], errors='coerce')
-        juegos_genero = juegos_genero[juegos_genero['release_anio'] >= 100]
-        juegos_genero['Año'] = juegos_genero['release_anio']
+        # Obtener el resultado precalculado del género
+        tabla_genero = usuarios_genero_para(datos, genero)
+        with metricas_api.etapa('agregar'):
+            resultado_genero = tabla_genero.resultado(genero)
 
-        horas_por_usuario = juegos_genero.groupby(['user_id', 'Año'])['playtime_forever'].sum().reset_index()
+        if resultado_genero is None:
+            raise HTTPException(status_code=404, detail=f"No hay datos para el género {genero}")
 
-        if not horas_por_usuario.empty:
-            usuario_max_horas = horas_por_usuario.groupby('user_id')['playtime_forever'].sum().idxmax()
-            usuario_max_horas = horas_por_usuario[horas_por_usuario['user_id'] == usuario_max_horas]
-        else:
-            usuario_max_horas = None
-
-        acumulacion_horas = horas_por_usuario.groupby(['Año'])['playtime_forever'].sum().reset_index()
-        acumulacion_horas = acumulacion_horas.rename(columns={'Año': 'Año', 'playtime_forever': 'Horas'})
-
-        resultado = {
-            "Usuario con más horas jugadas para " + genero: {"user_id": usuario_max_horas.iloc[0]['user_id'], "Año": int(usuario_max_horas.iloc[0]['Año']), "playtime_forever": usuario_max_horas.iloc[0]['playtime_forever']},
-            "Horas jugadas": [{"Año": int(row['Año']), "Horas": row['Horas']} for _, row in acumulacion_horas.iterrows()]
-        }
-
-        return resultado
+        return cuerpo_usuario_genero(genero, resultado_genero)
 
+    except HTTPException:
+        raise
     except FileNotFoundError:
         raise HTTPException(status_code=500, detail="Error al cargar los archivos de datos")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
  
+
+def cuerpo_usuario_genero(genero, resultado_genero):
+    '''
+    Arma los bytes JSON de la respuesta de UserForGenre a partir del resultado guardado del género:
+    la lista de horas por año sale directamente de los arreglos de años y horas, sin un diccionario por año.
+    '''
+    usuario_max_horas, anios_usuario, horas_usuario, anios, horas = resultado_genero
+
+    with metricas_api.etapa('serializar_json'):
+        return respuestas.objeto([
+            ("Usuario con más horas jugadas para " + genero,
+             {"user_id": usuario_max_horas, "Año": int(anios_usuario[0]), "playtime_forever": float(horas_usuario[0])}),
+            ("Horas jugadas", respuestas.registros({"Año": anios, "Horas": horas})),
+        ]).encode('utf-8')
+
    
-@app.get('/UsersRecommend/{anio}')
-def UsersRecommend(anio: int):
+@app.get('/UsersRecommend/{anio}', tags=["Consultas Generales"])
+@cache_respuestas.cachear('UsersRecommend', normalizar=int, respuesta=respuestas.RespuestaPrecodificada)
+def UsersRecommend(anio: int = Path(..., description="Año para el cual se busca el top 3 de juegos más recomendados")):
     '''
     Datos:
     - anio (int): Año para el cual se busca el top 3 de juegos más recomendados.
@@ -130,25 +516,19 @@ def UsersRecommend(anio: int):
     Return:
     - List: [{"Puesto 1": str}, {"Puesto 2": str}, {"Puesto 3": str}]
     '''
+    datos = requiere('agregados')
 
 
     try:
-        # Filtrar el DataFrame por el año
-        filtered_df = df_data_muestra.query(f"reviews_anio == {anio}")
-
-        # Filtrar el DataFrame por reseñas recomendadas
-        filtered_df = filtered_df[filtered_df['reviews_recommend'] == True]
-
-        # Filtrar el DataFrame por reseñas con sentimiento positivo o neutral
-        filtered_df = filtered_df[filtered_df['sentiment_analysis'].isin([1, 2])]
+        # Obtener el top 3 de juegos con reseñas recomendadas y sentimiento positivo o neutral en el año
+        agregados_anio = agregados_para(datos, 'UsersRecommend', {'reviews_anio': anio})
+        with metricas_api.etapa('agregar'):
+            recommend_counts = agregados_anio.top_resenas(anio, recomendado=True, sentimientos=[1, 2])
 
-        # Obtener el top 3 de juegos más recomendados
-        recommend_counts = filtered_df.groupby('item_name')['item_name'].count().reset_index(name="count").sort_values(by="count", ascending=False).head(3)
-
-        # Convertir el DataFrame a una lista
-        top_3_dict = {f"Puesto {i+1}": juego for i, juego in enumerate(recommend_counts['item_name'])}
+        # Convertir la lista a un diccionario
+        top_3_dict = {f"Puesto {i+1}": juego for i, juego in enumerate(recommend_counts)}
         
-        return top_3_dict
+        return serializar(top_3_dict)
 
     except FileNotFoundError:
         raise HTTPException(status_code=500, detail="Error al cargar los archivos de datos")
@@ -157,8 +537,9 @@ def UsersRecommend(anio: int):
     
    
 
-@app.get('/UsersNotRecommend/{anio}')
-def UsersNotRecommend(anio: int):
+@app.get('/UsersNotRecommend/{anio}', tags=["Consultas Generales"])
+@cache_respuestas.cachear('UsersNotRecommend', normalizar=int, respuesta=respuestas.RespuestaPrecodificada)
+def UsersNotRecommend(anio: int = Path(..., description="Año para el cual se busca el top 3 de juegos menos recomendados")):
     '''
   Devuelve el top 3 de juegos MENOS recomendados por usuarios para el año dado.
 
@@ -168,34 +549,25 @@ def UsersNotRecommend(anio: int):
   Returns:
     dict: Diccionario con el top 3 de juegos menos recomendados, con la estructura {posición: juego}.
     '''
+    datos = requiere('agregados')
     try:
-        # Filtrar el DataFrame por el año
-        filtered_df = df_data_muestra.query(f"reviews_anio == {anio}")
-        
-
-        # Filtrar el DataFrame por reseñas no recomendadas
-        filtered_df = filtered_df[filtered_df['reviews_recommend'] == False]
-        
-
-        # Filtrar el DataFrame por reseñas con sentimiento negativo
-        filtered_df = filtered_df[filtered_df['sentiment_analysis'] == 0]
-        
-
-        # Obtener el top 3 de juegos menos recomendados
-        not_recommend_counts = filtered_df.groupby('item_name')['item_name'].count().reset_index(name="count").sort_values(by="count", ascending=False).head(3)
-        
+        # Obtener el top 3 de juegos con reseñas no recomendadas y sentimiento negativo en el año
+        agregados_anio = agregados_para(datos, 'UsersNotRecommend', {'reviews_anio': anio})
+        with metricas_api.etapa('agregar'):
+            not_recommend_counts = agregados_anio.top_resenas(anio, recomendado=False, sentimientos=[0])
 
-        # Convertir el DataFrame a una lista
-        top_3_dict = {f"Puesto {i+1}": juego for i, juego in enumerate(not_recommend_counts['item_name'])}
+        # Convertir la lista a un diccionario
+        top_3_dict = {f"Puesto {i+1}": juego for i, juego in enumerate(not_recommend_counts)}
         
-        return top_3_dict
+        return serializar(top_3_dict)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error al obtener los juegos menos recomendados.")
 
 
-@app.get('/sentiment_analysis/{anio}')
-def sentiment_analysis(anio: int):
+@app.get('/sentiment_analysis/{anio}', tags=["Consultas Generales"])
+@cache_respuestas.cachear('sentiment_analysis', normalizar=int, respuesta=respuestas.RespuestaPrecodificada)
+def sentiment_analysis(anio: int = Path(..., description="Año para el cual se busca el análisis de sentimiento")):
 
     '''
     Según el año de lanzamiento, se devuelve una lista con la cantidad de registros de reseñas de usuarios que se encuentren categorizados con un análisis de sentimiento.
@@ -206,19 +578,19 @@ def sentiment_analysis(anio: int):
     Returns:
         dict: Diccionario con la cantidad de reseñas por sentimiento.
     '''
+    datos = requiere('agregados')
   
     try:    
-        # Filtrar el DataFrame por el año
-        filtered_df = df_data_muestra.query(f"release_anio == {anio}")
-
-        # Contar las reseñas por sentimiento
-        sentiment_counts = filtered_df.groupby("sentiment_analysis")["sentiment_analysis"].size()
+        # Contar las reseñas por sentimiento desde los agregados por (año de lanzamiento, sentimiento)
+        agregados_anio = agregados_para(datos, 'sentiment_analysis', {'release_anio': anio})
+        with metricas_api.etapa('agregar'):
+            sentiment_counts = agregados_anio.sentimiento_por_anio(anio)
 
         # Mapear las categorías a los nombres esperados
         sentiment_mapping = {2: "Positive", 1: "Neutral", 0: "Negative"}
         sentiment_counts_mapped = {sentiment_mapping[key]: value for key, value in sentiment_counts.items()}
 
-        return sentiment_counts_mapped
+        return serializar(sentiment_counts_mapped)
     except pd.errors.EmptyDataError:
         raise HTTPException(status_code=404, detail=f"No hay datos para el año {anio}")
     except Exception as e:
@@ -273,13 +645,101 @@ def presentacion():
 ##################################### ML ###########################################################
 
 # Sistema de Recomendación Item-Item
-@app.get("/recomendacion_juego/{product_id}")
+def respuesta_recomendaciones(recommendations_list, num_recommendations):
+    '''
+    Arma la respuesta de /recomendacion_juego a partir de la lista de nombres recomendados.
+    '''
+    if not recommendations_list:
+        # Si no hay juegos similares, mostrar un mensaje
+        return {"message": "No se encontraron juegos similares."}
+
+    if len(recommendations_list) < num_recommendations:
+        # Si la cantidad de recomendaciones es menor a num_recommendations, llenar con valores nulos
+        message = f"Se encontraron {len(recommendations_list)} recomendaciones para este ID."
+        recommendations_list = recommendations_list + [None] * (num_recommendations - len(recommendations_list))
+    else:
+        message = None
+
+    return {"recomendaciones": recommendations_list, "message": message}
+
+
+def recomendar_juego(tabla_vecinos, product_id, num_recommendations=5):
+    '''
+    Busca las recomendaciones de un juego en la tabla de vecinos y arma la respuesta de /recomendacion_juego.
+    Se ejecuta en el pool de ejecutor_cpu.
+    '''
+    with metricas_api.etapa('similitud'):
+        recommendations_list = tabla_vecinos.recomendar(product_id, num_recommendations)
+
+    if recommendations_list is None:
+        raise HTTPException(status_code=404, detail=f"No se encontró el juego con ID {product_id}")
+
+    return serializar(respuesta_recomendaciones(recommendations_list, num_recommendations))
+
+
+def recomendar_lote(tabla_vecinos, item_ids, num_recommendations=5):
+    '''
+    Calcula las recomendaciones de varios juegos con un solo producto de matrices y arma una
+    respuesta por ID (o un error por ID si el juego no existe). Se ejecuta en el pool de ejecutor_cpu.
+    '''
+    with metricas_api.etapa('similitud'):
+        listas = tabla_vecinos.recomendar_lote(item_ids, num_recommendations)
+
+    resultados = []
+    for item_id, recommendations_list in zip(item_ids, listas):
+        if recommendations_list is None:
+            resultados.append({"item_id": item_id, "error": f"No se encontró el juego con ID {item_id}"})
+        else:
+            resultados.append({"item_id": item_id, **respuesta_recomendaciones(recommendations_list, num_recommendations)})
+    return serializar({"resultados": resultados})
+
+
+# Cantidad máxima de IDs por consulta de /recomendacion_juego/batch
+lote_max_items = int(os.environ.get('LOTE_MAX_ITEMS', 1000))
+
+
+class LoteRecomendacion(BaseModel):
+    item_ids: List[int]
+
+
+@app.post("/recomendacion_juego/batch", tags=["Sistema de Recomendación Item-Item"])
+async def recomendacion_juego_batch(lote: LoteRecomendacion):
+    '''
+    Devuelve las recomendaciones de varios juegos en una sola consulta.
+
+    Las similitudes de todos los juegos pedidos se calculan juntas con un producto de matrices
+    dispersas sobre la matriz TF-IDF compartida, por lo que el costo crece con el tamaño del lote
+    y no con la cantidad de consultas.
+
+    Args:
+    lote: {"item_ids": [int, ...]} con hasta LOTE_MAX_ITEMS IDs.
+
+    Return:
+    Un diccionario {"resultados": [...]} con un elemento por ID, en el mismo orden:
+    {"item_id", "recomendaciones", "message"} o {"item_id", "error"} si el juego no existe.
+    '''
+    datos = requiere('recomendador')
+
+    if len(lote.item_ids) > lote_max_items:
+        raise HTTPException(status_code=413, detail=f"El lote admite hasta {lote_max_items} IDs")
+
+    try:
+        return respuestas.RespuestaPrecodificada(await ejecutor_cpu.ejecutar(recomendar_lote, datos.tabla_vecinos, lote.item_ids))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}") from e
+
+
+@app.get("/recomendacion_juego/{product_id}", tags=["Sistema de Recomendación Item-Item"])
 async def recomendacion_juego(product_id: int = Path(..., description="ID del producto para obtener recomendaciones")):
     '''
     Esta función devuelve una lista de recomendaciones de juegos para un juego dado. 
-    La función utiliza un algoritmo de recomendación de similitud coseno para calcular la similitud entre el juego dado 
-    y todos los demás juegos en el conjunto de datos. 
-    Los juegos más similares al juego dado se devuelven como recomendaciones.
+    Las recomendaciones salen de la tabla de vecinos precalculada (similitud coseno de TF-IDF
+    sobre item_name + genres, ver recomendador.py), por lo que cada consulta es una búsqueda
+    en un diccionario y no depende del tamaño del conjunto de datos.
+    El cálculo corre en el pool de hilos de ejecutor_cpu, sin bloquear el event loop.
 
     Args:
     product_id: El ID del juego para el que se desean las recomendaciones.
@@ -289,60 +749,59 @@ async def recomendacion_juego(product_id: int = Path(..., description="ID del pr
     recomendaciones: Una lista de los nombres de los juegos recomendados.
     message: Un mensaje que indica si se encontraron recomendaciones o no.
     '''
+    datos = requiere('recomendador')
 
-   
     try:
-        porcentaje_muestra = 50  # Definir el porcentaje de registros a seleccionar (ajusta según tus necesidades)
-
-        # Obtener el número total de registros en el conjunto de datos
-        total_registros = len(df_data_muestra)
-
-        # Calcular el número de registros a seleccionar como un porcentaje del total
-        num_registros = int(total_registros * (porcentaje_muestra / 100))
-
-        # Limitar el conjunto de datos al porcentaje especificado de forma aleatoria
-        df_subset = df_data_muestra.sample(n=num_registros, random_state=42).reset_index(drop=True)
+        return respuestas.RespuestaPrecodificada(await ejecutor_cpu.ejecutar(recomendar_juego, datos.tabla_vecinos, product_id))
 
-        num_recommendations = 5  # Definir el número de recomendaciones como variable local
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}") from e
 
-        juego_seleccionado = df_subset[df_subset['item_id'] == product_id]
 
-        if juego_seleccionado.empty:
-            raise HTTPException(status_code=404, detail=f"No se encontró el juego con ID {product_id}")
 
-        title_game_and_genres = ' '.join(juego_seleccionado['item_name'].fillna('').astype(str) + ' ' + juego_seleccionado['genres'].fillna('').astype(str))
+# Sistema de Recomendación User-Item
+def recomendar_usuario(modelo, user_id, num_recommendations=5):
+    '''
+    Calcula los juegos recomendados para un usuario con el modelo usuario-juego y arma la
+    respuesta de /recomendacion_usuario. Se ejecuta en el pool de ejecutor_cpu.
+    '''
+    with metricas_api.etapa('similitud'):
+        recomendaciones = modelo.recomendar(user_id, num_recommendations)
 
-        # Obtener la matriz TF-IDF para todos los juegos en la muestra
-        tfidf_vectorizer = TfidfVectorizer()
-        tfidf_matrix = tfidf_vectorizer.fit_transform(df_subset['item_name'].fillna('').astype(str) + ' ' + df_subset['genres'].fillna('').astype(str))
+    if recomendaciones is None:
+        raise HTTPException(status_code=404, detail=f"No se encontró el usuario {user_id}")
 
-        # Calcular la similitud solo para el juego seleccionado
-        juego_tfidf = tfidf_vectorizer.transform([title_game_and_genres])
-        similarity_scores = cosine_similarity(juego_tfidf, tfidf_matrix)
+    if not recomendaciones:
+        return serializar({"message": "El usuario ya tiene todos los juegos del catálogo."})
 
-        if similarity_scores is not None:
-            similar_games_indices = similarity_scores[0].argsort()[::-1]
+    return serializar({"recomendaciones": [{"item_id": item_id, "item_name": item_name, "puntaje": round(puntaje, 4)}
+                                           for item_id, item_name, puntaje in recomendaciones]})
 
-            # Excluir el juego seleccionado de la lista de recomendaciones
-            recommended_games = df_subset.loc[similar_games_indices[1:]]
 
-            # Asegurarse de que los juegos recomendados estén presentes en el DataFrame original y sean distintos
-            recommended_games = recommended_games[~recommended_games['item_id'].isin([product_id])].drop_duplicates(subset='item_name')
+@app.get("/recomendacion_usuario/{user_id}", tags=["Sistema de Recomendación User-Item"])
+async def recomendacion_usuario(user_id: str = Path(..., description="ID del usuario para obtener recomendaciones")):
+    '''
+    Devuelve 5 juegos recomendados para el usuario, que todavía no tiene, según las horas jugadas
+    por todos los usuarios (filtrado colaborativo). Los factores de usuarios y juegos salen de una
+    SVD truncada de la matriz usuarios x juegos con log(1 + playtime_forever), entrenada offline
+    (ver colaborativo.py), así que cada consulta es un producto matriz-vector sobre el catálogo.
+    El cálculo corre en el pool de hilos de ejecutor_cpu, sin bloquear el event loop.
 
-            recommendations_list = recommended_games.head(num_recommendations)['item_name'].tolist()
+    Args:
+    user_id: El ID del usuario para el que se desean las recomendaciones.
 
-            if len(recommendations_list) < num_recommendations:
-                # Si la cantidad de recomendaciones es menor a num_recommendations, llenar con valores nulos
-                message = f"Se encontraron {len(recommendations_list)} recomendaciones para este ID."
-                recommendations_list += [None] * (num_recommendations - len(recommendations_list))
-            else:
-                message = None
+    Return:
+    Un diccionario {"recomendaciones": [{"item_id", "item_name", "puntaje"}, ...]} de mayor a menor puntaje.
+    '''
+    datos = requiere('colaborativo')
 
-            return {"recomendaciones": recommendations_list, "message": message}
-        else:
-            # Si no hay similitud_scores, mostrar un mensaje
-            return {"message": "No se encontraron juegos similares."}
+    try:
+        return respuestas.RespuestaPrecodificada(await ejecutor_cpu.ejecutar(recomendar_usuario, datos.modelo_colaborativo, user_id))
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}") from e
 
@@ -355,33 +814,71 @@ async def recomendacion_juego(product_id: int = Path(..., description="ID del pr
 def home():
     return presentacion()
 
-# Consultas Generales
-
-@app.get(path='/PlayTimeGenre/{genero}', tags=["Consultas Generales"])
-def play_time_genre(genero: str = Path(..., description="Género para el cual se busca el año con más horas jugadas(Ingresar formato 'Mxxx')")):
-    return PlayTimeGenre(genero)
-
-@app.get(path='/UserForGenre/{genero}', tags=["Consultas Generales"])
-def user_for_genre(genero: str = Path(..., description="Género para el cual se busca el usuario con más horas jugadas y la acumulación de horas por año")):
-    return UserForGenre(genero)
-
-
-@app.get("/UsersRecommend/{anio}", tags=["Consultas Generales"])
-def users_recommend(anio: int = Path(..., description="Año para el cual se busca el top 3 de juegos más recomendados")):
-        try:
-            result = UsersRecommend(anio)
-            return result
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
-
-@app.get(path='/UsersNotRecommend/{anio}', tags=["Consultas Generales"])
-def users_not_recommend(anio: int = Path(..., description="Año para el cual se busca el top 3 de juegos menos recomendados")):
-    return UsersNotRecommend(anio)
-
-@app.get(path='/sentiment_analysis/{anio}', tags=["Consultas Generales"])
-def sentiment_analysis(anio: int = Path(..., description="Año para el cual se busca el análisis de sentimiento")):
-    return sentiment_analysis(anio)
-
-@app.get(path='/recomendacion_juego/{product_id}', tags=["Sistema de Recomendación Item-Item"])
-async def recomendacion_juego(product_id: int):
-    return recomendacion_juego(product_id)
\ No newline at end of file
+# Estado de la carga de datos: 200 cuando todo está listo, 503 mientras se carga (500 si falló)
+@app.get(path="/ready", tags=["Estado"])
+def ready():
+    progreso = {**datos_api.estado.progreso(), "version": datos_api.version}
+    if progreso["error"] is not None:
+        return JSONResponse(status_code=500, content=progreso)
+    if not progreso["listo"]:
+        return JSONResponse(status_code=503, content=progreso, headers={"Retry-After": str(retry_after_segundos)})
+    return progreso
+
+# Contadores de la cache de respuestas
+@app.get(path="/cache/stats", tags=["Estado"])
+def cache_stats():
+    return cache_respuestas.estadisticas()
+
+# Grupos de filas leídos y salteados por las consultas del modo 'bajo_demanda'
+@app.get(path="/lectura/stats", tags=["Estado"])
+def lectura_stats():
+    lector_api = datos_api.lector_api
+    if lector_api is None:
+        return {"modo": modo_consultas}
+    return {"modo": modo_consultas, **lector_api.estadisticas()}
+
+# Estado de las recargas de datos: versión en uso, versiones que siguen en memoria y avance de la recarga en curso
+@app.get(path="/recarga/stats", tags=["Estado"])
+def recarga_stats():
+    construccion = datos_en_construccion
+    return {
+        **recargador.estadisticas(),
+        "version": datos_api.version,
+        "versiones_en_memoria": len(versiones_vivas),
+        "progreso": construccion.estado.progreso() if construccion is not None else None,
+        "vigilancia_segundos": recarga_intervalo or None,
+    }
+
+# Métricas de latencia por ruta, tiempos por etapa y filas leídas en el formato de texto de Prometheus
+@app.get(path="/metrics", response_class=PlainTextResponse, tags=["Estado"])
+def metrics():
+    return PlainTextResponse(metricas_api.exponer(), media_type="text/plain; version=0.0.4")
+
+def verificar_admin(x_admin_token):
+    '''
+    Corta la consulta si la cabecera X-Admin-Token no coincide con ADMIN_TOKEN (sin ADMIN_TOKEN
+    los endpoints de administración están deshabilitados).
+    '''
+    if admin_token is None:
+        raise HTTPException(status_code=403, detail="Los endpoints de administración están deshabilitados (definir ADMIN_TOKEN)")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=401, detail="Token de administración inválido")
+
+# Recarga los datos en segundo plano y los reemplaza al terminar, sin reiniciar el servidor.
+# Requiere la cabecera X-Admin-Token con el valor de ADMIN_TOKEN.
+@app.post(path="/admin/recargar", status_code=202, tags=["Administración"])
+def admin_recargar(x_admin_token: str = Header(None)):
+    verificar_admin(x_admin_token)
+    if not recargador.iniciar('admin'):
+        raise HTTPException(status_code=409, detail="Ya hay una recarga en curso")
+    return recarga_stats()
+
+# Activa o detiene el perfilador por muestreo; al detenerlo guarda las pilas en PERFIL_PATH
+# (formato plegado, para flamegraph.pl o speedscope). Requiere la cabecera X-Admin-Token.
+@app.post(path="/admin/perfilador", tags=["Administración"])
+def admin_perfilador(activo: bool, x_admin_token: str = Header(None)):
+    verificar_admin(x_admin_token)
+    if activo:
+        perfilador.iniciar()
+        return {"activo": True, "intervalo": perfilador.intervalo}
+    return {"activo": False, **detener_perfilador()}
@@ -0,0 +1,299 @@
+'''
+Métricas de la API sin servicios externos: latencia por ruta, tiempos por etapa dentro de las
+consultas y filas leídas, expuestos en el formato de texto de Prometheus, más un perfilador por
+muestreo que guarda las pilas en el formato "plegado" de los flamegraphs.
+
+Las etapas se miden con:
+
+    with metricas_api.etapa('agregar'):
+        ...
+
+y se asignan a la ruta de la consulta en curso (el middleware la guarda en una variable de
+contexto, que se copia a los hilos de run_in_threadpool y de ejecutor.py).
+'''
+# Importaciones
+import contextvars
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+# Límites de los buckets de los histogramas, en segundos
+limites_latencia = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                    1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Cuantiles que se informan, calculados sobre las últimas observaciones de cada histograma
+cuantiles = (0.5, 0.95, 0.99)
+
+# Scope ASGI de la consulta en curso: después del ruteo tiene la ruta en scope['route']
+consulta_actual = contextvars.ContextVar('consulta_actual', default=None)
+
+
+def ruta_actual():
+    '''
+    Devuelve el patrón de la ruta de la consulta en curso (por ejemplo '/UsersRecommend/{anio}'),
+    'sin_ruta' si no coincidió con ninguna o None fuera de una consulta.
+    '''
+    scope = consulta_actual.get()
+    if scope is None:
+        return None
+    ruta = scope.get('route')
+    return getattr(ruta, 'path', 'sin_ruta')
+
+
+class Histograma:
+    '''
+    Histograma acumulado con buckets fijos (como los de Prometheus) y una muestra circular de las
+    últimas observaciones para calcular cuantiles sin guardar todas.
+
+    Parameters:
+        limites (tuple): Límites superiores de los buckets.
+        tamanio_muestra (int): Observaciones recientes que se guardan para los cuantiles.
+    '''
+
+    def __init__(self, limites=limites_latencia, tamanio_muestra=2048):
+        self.limites = np.asarray(limites, dtype=float)
+        self.buckets = np.zeros(len(limites) + 1, dtype=np.int64)
+        self.suma = 0.0
+        self.cantidad = 0
+        self._muestra = np.empty(tamanio_muestra)
+
+    def observar(self, valor):
+        self.buckets[np.searchsorted(self.limites, valor)] += 1
+        self._muestra[self.cantidad % len(self._muestra)] = valor
+        self.suma += valor
+        self.cantidad += 1
+
+    def cuantiles(self, qs=cuantiles):
+        if self.cantidad == 0:
+            return [float('nan')] * len(qs)
+        return np.quantile(self._muestra[:min(self.cantidad, len(self._muestra))], qs).tolist()
+
+
+def _etiquetas(**etiquetas):
+    '''
+    Arma el texto {clave="valor",...} de una serie de Prometheus, escapando los valores.
+    '''
+    partes = []
+    for clave, valor in etiquetas.items():
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        partes.append(f'{clave}="{valor}"')
+    return '{' + ','.join(partes) + '}'
+
+
+def _numero(valor):
+    return 'NaN' if valor != valor else repr(float(valor))
+
+
+class Metricas:
+    '''
+    Registro de las métricas de la API.
+
+    - Latencia de cada consulta por ruta, método y estado HTTP (MiddlewareMetricas).
+    - Tiempo de cada etapa de una consulta o de la carga de datos (etapa()).
+    - Filas leídas por ruta (sumar_filas()).
+
+    exponer() devuelve todo en el formato de texto de Prometheus.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencias = {}
+        self._consultas = {}
+        self._etapas = {}
+        self._filas = {}
+
+    def observar_consulta(self, ruta, metodo, estado, segundos):
+        with self._lock:
+            clave = (ruta, metodo)
+            if clave not in self._latencias:
+                self._latencias[clave] = Histograma()
+            self._latencias[clave].observar(segundos)
+            clave = (ruta, metodo, estado)
+            self._consultas[clave] = self._consultas.get(clave, 0) + 1
+
+    def observar_etapa(self, etapa, segundos, ruta=None):
+        clave = (ruta or ruta_actual() or 'sin_ruta', etapa)
+        with self._lock:
+            if clave not in self._etapas:
+                self._etapas[clave] = Histograma()
+            self._etapas[clave].observar(segundos)
+
+    @contextmanager
+    def etapa(self, nombre, ruta=None):
+        '''
+        Mide el tiempo del bloque como la etapa 'nombre' de la ruta dada o de la consulta en curso.
+        '''
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar_etapa(nombre, time.perf_counter() - inicio, ruta)
+
+    def sumar_filas(self, filas, ruta=None):
+        '''
+        Suma filas leídas a la ruta dada o a la de la consulta en curso.
+        '''
+        ruta = ruta or ruta_actual() or 'sin_ruta'
+        with self._lock:
+            self._filas[ruta] = self._filas.get(ruta, 0) + int(filas)
+
+    def exponer(self):
+        '''
+        Devuelve las métricas en el formato de texto de Prometheus (versión 0.0.4).
+        '''
+        with self._lock:
+            lineas = []
+            self._exponer_histogramas(lineas, 'api_latencia_segundos',
+                                      'Latencia de las consultas HTTP por ruta y método',
+                                      {clave: {'ruta': clave[0], 'metodo': clave[1]} for clave in self._latencias},
+                                      self._latencias)
+
+            lineas.append('# HELP api_consultas_total Consultas HTTP por ruta, método y estado')
+            lineas.append('# TYPE api_consultas_total counter')
+            for (ruta, metodo, estado), cantidad in sorted(self._consultas.items()):
+                lineas.append(f'api_consultas_total{_etiquetas(ruta=ruta, metodo=metodo, estado=estado)} {cantidad}')
+
+            self._exponer_histogramas(lineas, 'api_etapa_segundos',
+                                      'Tiempo de cada etapa de las consultas y de la carga de datos',
+                                      {clave: {'ruta': clave[0], 'etapa': clave[1]} for clave in self._etapas},
+                                      self._etapas)
+
+            lineas.append('# HELP api_filas_leidas_total Filas de datos leídas por ruta')
+            lineas.append('# TYPE api_filas_leidas_total counter')
+            for ruta, filas in sorted(self._filas.items()):
+                lineas.append(f'api_filas_leidas_total{_etiquetas(ruta=ruta)} {filas}')
+
+        return '\n'.join(lineas) + '\n'
+
+    @staticmethod
+    def _exponer_histogramas(lineas, nombre, ayuda, etiquetas, histogramas):
+        lineas.append(f'# HELP {nombre} {ayuda}')
+        lineas.append(f'# TYPE {nombre} histogram')
+        for clave in sorted(histogramas):
+            histograma = histogramas[clave]
+            acumulado = np.cumsum(histograma.buckets)
+            for limite, cantidad in zip(histograma.limites, acumulado):
+                lineas.append(f'{nombre}_bucket{_etiquetas(**etiquetas[clave], le=repr(float(limite)))} {cantidad}')
+            lineas.append(f'{nombre}_bucket{_etiquetas(**etiquetas[clave], le="+Inf")} {histograma.cantidad}')
+            lineas.append(f'{nombre}_sum{_etiquetas(**etiquetas[clave])} {_numero(histograma.suma)}')
+            lineas.append(f'{nombre}_count{_etiquetas(**etiquetas[clave])} {histograma.cantidad}')
+
+        # Los cuantiles van en una métrica aparte (el formato no admite cuantiles dentro de un histograma)
+        lineas.append(f'# HELP {nombre}_cuantil {ayuda}, cuantiles de las últimas observaciones')
+        lineas.append(f'# TYPE {nombre}_cuantil gauge')
+        for clave in sorted(histogramas):
+            for q, valor in zip(cuantiles, histogramas[clave].cuantiles()):
+                lineas.append(f'{nombre}_cuantil{_etiquetas(**etiquetas[clave], cuantil=q)} {_numero(valor)}')
+
+
+class MiddlewareMetricas:
+    '''
+    Middleware ASGI que mide la latencia de cada consulta HTTP (hasta el último byte de la
+    respuesta) y deja el scope de la consulta en consulta_actual para las etapas.
+
+    Parameters:
+        app: Aplicación ASGI envuelta.
+        metricas (Metricas): Registro donde se guardan las medidas.
+    '''
+
+    def __init__(self, app, metricas):
+        self.app = app
+        self.metricas = metricas
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        estado = 500
+
+        async def enviar(mensaje):
+            nonlocal estado
+            if mensaje['type'] == 'http.response.start':
+                estado = mensaje['status']
+            await send(mensaje)
+
+        token = consulta_actual.set(scope)
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            consulta_actual.reset(token)
+            ruta = getattr(scope.get('route'), 'path', 'sin_ruta')
+            self.metricas.observar_consulta(ruta, scope['method'], estado, time.perf_counter() - inicio)
+
+
+class Perfilador:
+    '''
+    Perfilador por muestreo: un hilo toma cada 'intervalo' segundos la pila de todos los demás
+    hilos (sys._current_frames) y cuenta cuántas veces aparece cada pila.
+
+    El resultado está en el formato "plegado" (una línea 'función;función;función cantidad' por
+    pila) que leen flamegraph.pl, speedscope o inferno. No requiere instalar nada, pero como
+    corre en Python agrega algo de carga mientras está activo: se usa sólo para diagnosticar.
+
+    Parameters:
+        intervalo (float): Segundos entre muestras.
+    '''
+
+    def __init__(self, intervalo=0.005):
+        self.intervalo = intervalo
+        self._pilas = {}
+        self._muestras = 0
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def activo(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self):
+        if self.activo():
+            return
+        self._pilas = {}
+        self._muestras = 0
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._muestrear, name='perfilador', daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        '''
+        Detiene el muestreo y devuelve la cantidad de muestras tomadas.
+        '''
+        if self._hilo is not None:
+            self._detener.set()
+            self._hilo.join()
+            self._hilo = None
+        return self._muestras
+
+    def _muestrear(self):
+        propio = threading.get_ident()
+        nombres = {}
+        while not self._detener.wait(self.intervalo):
+            nombres.update((hilo.ident, hilo.name) for hilo in threading.enumerate())
+            for ident, frame in sys._current_frames().items():
+                if ident == propio:
+                    continue
+                marcos = []
+                while frame is not None:
+                    codigo = frame.f_code
+                    marcos.append(f'{codigo.co_name} ({codigo.co_filename.rsplit("/", 1)[-1]}:{codigo.co_firstlineno})')
+                    frame = frame.f_back
+                marcos.append(nombres.get(ident, str(ident)))
+                pila = ';'.join(reversed(marcos))
+                self._pilas[pila] = self._pilas.get(pila, 0) + 1
+            self._muestras += 1
+
+    def plegado(self):
+        '''
+        Devuelve las pilas contadas en el formato plegado, de la más frecuente a la menos frecuente.
+        '''
+        pilas = sorted(dict(self._pilas).items(), key=lambda pila: -pila[1])
+        return ''.join(f'{pila} {cantidad}\n' for pila, cantidad in pilas)
+
+    def guardar(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.plegado())
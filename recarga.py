@@ -0,0 +1,134 @@
+# Importaciones
+import logging
+import os
+import threading
+import time
+
+
+# Logger de uvicorn, como en main.py
+logger = logging.getLogger('uvicorn.error')
+
+
+def firma_archivo(path):
+    '''
+    Devuelve (tamaño, fecha de modificación en ns) del archivo, o None si no existe.
+    '''
+    try:
+        info = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return info.st_size, info.st_mtime_ns
+
+
+class Recargador:
+    '''
+    Recarga de los datos en segundo plano, de a una por vez.
+
+    construir() arma la nueva versión completa en un hilo aparte mientras la API sigue respondiendo
+    con la actual; sólo si termina bien se llama a publicar() con el resultado. Si falla, la versión
+    actual sigue en uso y el error queda en estadisticas().
+
+    Parameters:
+        construir (callable): Función sin argumentos que construye y devuelve la nueva versión.
+        publicar (callable): Recibe la nueva versión ya construida y la pone en uso.
+    '''
+
+    def __init__(self, construir, publicar):
+        self.construir = construir
+        self.publicar = publicar
+        self._en_curso = threading.Lock()
+        self._lock = threading.Lock()
+        self._estado = {'en_curso': False, 'motivo': None, 'recargas': 0, 'fallidas': 0,
+                        'ultimo_error': None, 'ultima_duracion': None, 'ultima_recarga': None}
+
+    def iniciar(self, motivo):
+        '''
+        Inicia una recarga en un hilo aparte.
+
+        Returns:
+            bool: False si ya había una recarga en curso (no se inicia otra).
+        '''
+        if not self._en_curso.acquire(blocking=False):
+            return False
+        with self._lock:
+            self._estado['en_curso'] = True
+            self._estado['motivo'] = motivo
+        threading.Thread(target=self._recargar, name='recarga-datos', daemon=True).start()
+        return True
+
+    def _recargar(self):
+        inicio = time.perf_counter()
+        try:
+            self.publicar(self.construir())
+            with self._lock:
+                self._estado['recargas'] += 1
+                self._estado['ultimo_error'] = None
+                self._estado['ultima_recarga'] = time.time()
+        except Exception as e:
+            logger.exception("Error al recargar los datos, se sigue usando la versión actual")
+            with self._lock:
+                self._estado['fallidas'] += 1
+                self._estado['ultimo_error'] = str(e)
+        finally:
+            with self._lock:
+                self._estado['en_curso'] = False
+                self._estado['ultima_duracion'] = time.perf_counter() - inicio
+            self._en_curso.release()
+
+    def estadisticas(self):
+        '''
+        Devuelve el estado de las recargas como diccionario.
+        '''
+        with self._lock:
+            return dict(self._estado)
+
+
+class VigilanteArchivos:
+    '''
+    Revisa cada 'intervalo' segundos el tamaño y la fecha de modificación de los archivos y llama a
+    al_cambiar(motivo) cuando alguno cambió.
+
+    Un archivo que se está copiando cambia entre una revisión y la siguiente, así que el aviso se da
+    recién cuando la firma nueva se repite en dos revisiones seguidas. Si al_cambiar devuelve False
+    (por ejemplo porque ya hay una recarga en curso) se vuelve a avisar en la revisión siguiente.
+
+    Parameters:
+        paths (list): Archivos a vigilar (pueden no existir todavía).
+        intervalo (float): Segundos entre revisiones.
+        al_cambiar (callable): Recibe un texto con los archivos que cambiaron y devuelve si se atendió el aviso.
+    '''
+
+    def __init__(self, paths, intervalo, al_cambiar):
+        self.paths = list(paths)
+        self.intervalo = intervalo
+        self.al_cambiar = al_cambiar
+        self._detener = threading.Event()
+        self._hilo = None
+        # Firmas de los archivos con los que se cargaron los datos en uso
+        self._firmas = self._leer_firmas()
+        self._anteriores = self._firmas
+
+    def _leer_firmas(self):
+        return {path: firma_archivo(path) for path in self.paths}
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._vigilar, name='vigilante-archivos', daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+
+    def revisar(self):
+        '''
+        Hace una revisión de los archivos (el hilo de iniciar() la repite cada 'intervalo' segundos).
+        '''
+        actuales = self._leer_firmas()
+        cambiados = [path for path in self.paths if actuales[path] != self._firmas[path]]
+        estables = actuales == self._anteriores
+        self._anteriores = actuales
+        if cambiados and estables and self.al_cambiar(f"cambió {', '.join(cambiados)}"):
+            self._firmas = actuales
+
+    def _vigilar(self):
+        while not self._detener.wait(self.intervalo):
+            self.revisar()
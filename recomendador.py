@@ -0,0 +1,248 @@
+# Importaciones
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+import carga
+import vecinos as busqueda_vecinos
+
+
+# Rutas por defecto del paso offline
+parquet_gzip_file_path = 'data/data_export_api_gzip.parquet'
+topk_file_path = 'data/recomendacion_topk.npz'
+
+# Cantidad de vecinos que se guardan por juego (más de los que se devuelven, para poder
+# descartar nombres repetidos al responder)
+vecinos_por_juego = 10
+
+
+##################################### CONSTRUCCIÓN ###############################################
+
+def textos_por_item(df):
+    '''
+    Agrupa el DataFrame por item_id distinto y arma el texto que se vectoriza para cada juego.
+
+    Parameters:
+        df (pandas.DataFrame): DataFrame con las columnas 'item_id', 'item_name' y 'genres'.
+
+    Returns:
+        pandas.DataFrame: Una fila por juego con las columnas 'item_id' (int64), 'item_name' y 'texto'
+        (nombre del juego seguido de todos sus géneros).
+    '''
+    items = df[['item_id', 'item_name', 'genres']].copy()
+    items['item_id'] = pd.to_numeric(items['item_id'], errors='coerce')
+    items = items.dropna(subset=['item_id'])
+    items['item_id'] = items['item_id'].astype('int64')
+    # astype(object) primero: las columnas pueden venir como categóricas (ver carga.py)
+    items['item_name'] = items['item_name'].astype(object).fillna('').astype(str)
+    items['genres'] = items['genres'].astype(object).fillna('').astype(str)
+
+    # Un juego aparece en muchas filas (una por usuario y género): se juntan sus géneros una sola vez
+    generos = items.drop_duplicates(subset=['item_id', 'genres']).groupby('item_id')['genres'].agg(' '.join)
+    nombres = items.drop_duplicates(subset='item_id').set_index('item_id')['item_name']
+
+    textos = pd.DataFrame({'item_name': nombres, 'genres': generos}).sort_index()
+    textos['texto'] = textos['item_name'] + ' ' + textos['genres']
+
+    return textos.reset_index()[['item_id', 'item_name', 'texto']]
+
+
+def construir_topk(df, k=vecinos_por_juego, busqueda='exacta', **parametros):
+    '''
+    Calcula, para cada juego distinto, sus k juegos más similares según la similitud coseno
+    de la matriz TF-IDF (item_name + genres).
+
+    La matriz se ajusta una sola vez y los vecinos se buscan con la búsqueda indicada (ver vecinos.py):
+    'exacta' compara contra todo el catálogo por bloques de filas, 'ivf' sólo contra los juegos
+    de las listas más cercanas (aproximada, para catálogos grandes).
+
+    Parameters:
+        df (pandas.DataFrame): DataFrame con las columnas 'item_id', 'item_name' y 'genres'.
+        k (int): Cantidad de vecinos a guardar por juego.
+        busqueda (str): Nombre de la búsqueda de vecinos ('exacta' o 'ivf').
+        **parametros: Parámetros de la búsqueda (por ejemplo listas y sondeos para 'ivf').
+
+    Returns:
+        TablaVecinos: Tabla con los k vecinos y sus puntajes para cada juego.
+    '''
+    items = textos_por_item(df)
+    k = max(0, min(k, len(items) - 1))
+
+    # TfidfVectorizer normaliza cada fila (norma L2), así que el producto punto ya es la similitud coseno
+    tfidf_matrix = TfidfVectorizer(dtype=np.float32).fit_transform(items['texto']).tocsr()
+
+    buscador = busqueda_vecinos.crear_busqueda(busqueda, tfidf_matrix, **parametros)
+    vecinos, puntajes = buscador.buscar(np.arange(len(items)), k)
+
+    return TablaVecinos(items['item_id'].to_numpy(), items['item_name'].to_numpy(dtype=str), vecinos, puntajes,
+                        matriz=tfidf_matrix, busqueda=buscador)
+
+
+################################### TABLA DE VECINOS ##############################################
+
+class TablaVecinos:
+    '''
+    Tabla de vecinos precalculada: para cada juego guarda las posiciones de sus k vecinos más
+    similares y sus puntajes, en arreglos de NumPy. Opcionalmente guarda también la matriz TF-IDF
+    de los juegos, que se usa para calcular recomendaciones de muchos juegos a la vez.
+
+    Attributes:
+        item_ids (numpy.ndarray): IDs de los juegos (int64), uno por fila.
+        item_names (numpy.ndarray): Nombres de los juegos, alineados con item_ids.
+        vecinos (numpy.ndarray): Matriz (juegos x k) con la posición de cada vecino en item_ids.
+        puntajes (numpy.ndarray): Matriz (juegos x k) con la similitud coseno de cada vecino.
+        matriz (scipy.sparse.csr_matrix or None): Matriz TF-IDF (juegos x términos) con filas de norma 1.
+        busqueda (object or None): Búsqueda de vecinos sobre la matriz (ver vecinos.py); por defecto la exacta.
+    '''
+
+    def __init__(self, item_ids, item_names, vecinos, puntajes, matriz=None, busqueda=None):
+        self.item_ids = item_ids
+        self.item_names = item_names
+        self.vecinos = vecinos
+        self.puntajes = puntajes
+        self.matriz = matriz
+        if busqueda is None and matriz is not None:
+            busqueda = busqueda_vecinos.BusquedaExacta(matriz)
+        self.busqueda = busqueda
+        self._posiciones = dict(zip(item_ids.tolist(), range(len(item_ids))))
+
+    def __len__(self):
+        return len(self.item_ids)
+
+    def __contains__(self, item_id):
+        return item_id in self._posiciones
+
+    def _nombres(self, posicion, candidatos, cantidad):
+        '''
+        Convierte posiciones de vecinos (ordenadas de más a menos similar) en nombres, sin repetir
+        nombres ni incluir al propio juego. Como en la versión original del endpoint, se excluye
+        sólo el juego consultado: otro juego con el mismo nombre puede recomendarse.
+        '''
+        vistos = set()
+        recomendaciones = []
+        for vecino in candidatos:
+            if vecino < 0:
+                break
+            if vecino == posicion:
+                continue
+            nombre = self.item_names[vecino]
+            if nombre in vistos:
+                continue
+            vistos.add(nombre)
+            recomendaciones.append(str(nombre))
+            if len(recomendaciones) == cantidad:
+                break
+        return recomendaciones
+
+    def recomendar(self, item_id, cantidad=5):
+        '''
+        Devuelve los nombres de los juegos más similares al juego dado, sin repetir nombres.
+
+        Como en la versión original del endpoint, se excluye sólo el juego consultado: otro juego
+        con el mismo nombre puede recomendarse.
+
+        Parameters:
+            item_id (int): ID del juego para el que se desean recomendaciones.
+            cantidad (int): Cantidad máxima de recomendaciones.
+
+        Returns:
+            list or None: Lista con hasta 'cantidad' nombres de juegos, o None si el juego no existe.
+        '''
+        posicion = self._posiciones.get(item_id)
+        if posicion is None:
+            return None
+        return self._nombres(posicion, self.vecinos[posicion], cantidad)
+
+    def recomendar_lote(self, item_ids, cantidad=5):
+        '''
+        Devuelve las recomendaciones de muchos juegos a la vez.
+
+        Las similitudes de todos los juegos pedidos se calculan juntas con la búsqueda de vecinos
+        de la tabla (productos de matrices dispersas por bloque y argpartition para los mejores).
+        Si la tabla no tiene la matriz TF-IDF se usan los vecinos precalculados.
+
+        Parameters:
+            item_ids (list): IDs de los juegos.
+            cantidad (int): Cantidad máxima de recomendaciones por juego.
+
+        Returns:
+            list: Para cada ID, en el mismo orden, la lista de nombres o None si el juego no existe.
+        '''
+        posiciones = [self._posiciones.get(item_id) for item_id in item_ids]
+        resultados = [None] * len(posiciones)
+        encontrados = [i for i, posicion in enumerate(posiciones) if posicion is not None]
+
+        if self.busqueda is None:
+            for i in encontrados:
+                resultados[i] = self._nombres(posiciones[i], self.vecinos[posiciones[i]], cantidad)
+            return resultados
+
+        # Candidatos de más para poder descartar nombres repetidos
+        k = max(0, min(max(2 * cantidad, self.vecinos.shape[1]), len(self) - 1))
+        filas = np.array([posiciones[i] for i in encontrados], dtype=np.int64)
+        candidatos, _ = self.busqueda.buscar(filas, k)
+
+        for i, posicion, fila in zip(encontrados, filas, candidatos):
+            resultados[i] = self._nombres(posicion, fila, cantidad)
+
+        return resultados
+
+    def guardar(self, path=topk_file_path):
+        '''
+        Guarda la tabla en un archivo .npz (arreglos sin pickle), incluida la matriz TF-IDF si la hay.
+        '''
+        arreglos = {'item_ids': self.item_ids, 'item_names': self.item_names, 'vecinos': self.vecinos, 'puntajes': self.puntajes}
+        if self.matriz is not None:
+            arreglos.update(matriz_data=self.matriz.data, matriz_indices=self.matriz.indices,
+                            matriz_indptr=self.matriz.indptr, matriz_shape=np.array(self.matriz.shape))
+        np.savez(path, **arreglos)
+
+
+def cargar_topk(path=topk_file_path, busqueda='exacta', **parametros):
+    '''
+    Carga una tabla de vecinos guardada con TablaVecinos.guardar.
+
+    Parameters:
+        path (str): Ruta del archivo .npz.
+        busqueda (str): Búsqueda de vecinos para las consultas por lote ('exacta' o 'ivf').
+        **parametros: Parámetros de la búsqueda.
+
+    Returns:
+        TablaVecinos: La tabla lista para responder consultas.
+    '''
+    with np.load(path, allow_pickle=False) as archivo:
+        matriz, buscador = None, None
+        if 'matriz_data' in archivo:
+            matriz = sparse.csr_matrix((archivo['matriz_data'], archivo['matriz_indices'], archivo['matriz_indptr']),
+                                       shape=tuple(archivo['matriz_shape']))
+            buscador = busqueda_vecinos.crear_busqueda(busqueda, matriz, **parametros)
+        return TablaVecinos(archivo['item_ids'], archivo['item_names'], archivo['vecinos'], archivo['puntajes'],
+                            matriz=matriz, busqueda=buscador)
+
+
+######################################### CLI #####################################################
+
+def main():
+    parser = argparse.ArgumentParser(description='Construye la tabla de vecinos precalculada para /recomendacion_juego.')
+    parser.add_argument('--origen', default=parquet_gzip_file_path, help='Archivo Parquet con los datos de la API')
+    parser.add_argument('--destino', default=topk_file_path, help='Archivo .npz de salida')
+    parser.add_argument('--k', type=int, default=vecinos_por_juego, help='Cantidad de vecinos por juego')
+    parser.add_argument('--busqueda', choices=list(busqueda_vecinos.busquedas), default='exacta', help='Búsqueda de vecinos')
+    parser.add_argument('--listas', type=int, default=256, help='Listas del índice IVF (sólo --busqueda ivf)')
+    parser.add_argument('--sondeos', type=int, default=8, help='Listas revisadas por consulta (sólo --busqueda ivf)')
+    args = parser.parse_args()
+
+    parametros = {'listas': args.listas, 'sondeos': args.sondeos} if args.busqueda == 'ivf' else {}
+
+    df = carga.cargar_parquet(args.origen, columnas=['item_id', 'item_name', 'genres'])
+    tabla = construir_topk(df, k=args.k, busqueda=args.busqueda, **parametros)
+    tabla.guardar(args.destino)
+
+    print(f'Tabla de vecinos guardada en {args.destino}: {len(tabla)} juegos, {tabla.vecinos.shape[1]} vecinos por juego')
+
+
+if __name__ == '__main__':
+    main()
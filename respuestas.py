@@ -0,0 +1,80 @@
+'''
+Respuestas JSON ya serializadas para los endpoints de main.py.
+
+Si un endpoint devuelve un diccionario, FastAPI lo recorre entero con jsonable_encoder y después
+la respuesta lo serializa con json.dumps. Los endpoints arman en cambio los bytes del cuerpo una
+sola vez (codificar) y los devuelven en una RespuestaPrecodificada, que FastAPI envía tal cual;
+las listas largas salen directamente de las columnas de NumPy (registros), sin armar un
+diccionario por fila. Los bytes son los mismos que producía JSONResponse.
+'''
+# Importaciones
+import json
+
+import numpy as np
+from starlette.responses import Response
+
+
+class RespuestaPrecodificada(Response):
+    '''
+    Respuesta con un cuerpo JSON ya serializado (bytes), que se envía sin volver a codificarlo.
+    '''
+    media_type = 'application/json'
+
+
+class JSONCrudo(str):
+    '''
+    Texto JSON ya serializado, que objeto() inserta tal cual en lugar de codificarlo como texto.
+    '''
+
+
+def _texto(valor):
+    # Los mismos parámetros que JSONResponse.render
+    return json.dumps(valor, ensure_ascii=False, allow_nan=False, indent=None, separators=(',', ':'))
+
+
+def codificar(contenido):
+    '''
+    Devuelve los bytes JSON del contenido (tipos de Python: dict, list, str, int, float, bool o None).
+    '''
+    return _texto(contenido).encode('utf-8')
+
+
+def objeto(pares):
+    '''
+    Devuelve el texto JSON del objeto con los pares (clave, valor) dados, en ese orden. Los valores
+    JSONCrudo se insertan tal cual y el resto se codifica.
+    '''
+    partes = [f'{_texto(clave)}:{valor if isinstance(valor, JSONCrudo) else _texto(valor)}' for clave, valor in pares]
+    return JSONCrudo('{' + ','.join(partes) + '}')
+
+
+def registros(columnas):
+    '''
+    Devuelve el texto JSON de la lista de objetos [{nombre: valor, ...}, ...] armada fila por fila
+    a partir de columnas de NumPy de igual largo, en una sola pasada.
+
+    Las columnas enteras se escriben con %d y las de punto flotante con %r (la misma representación
+    que usa json.dumps); el resto de los valores se codifica con json.dumps.
+
+    Parameters:
+        columnas (dict): {nombre: numpy.ndarray} en el orden en que van las claves de cada objeto.
+
+    Raises:
+        ValueError: Si una columna de punto flotante tiene NaN o infinitos (no son JSON válido).
+    '''
+    formatos, valores = [], []
+    for nombre, columna in columnas.items():
+        columna = np.asarray(columna)
+        if np.issubdtype(columna.dtype, np.integer):
+            formato = '%d'
+        elif np.issubdtype(columna.dtype, np.floating):
+            if not np.isfinite(columna).all():
+                raise ValueError(f"La columna {nombre} tiene valores que no son JSON válido (NaN o infinito)")
+            formato = '%r'
+        else:
+            formato, columna = '%s', np.array([_texto(valor) for valor in columna.tolist()], dtype=object)
+        formatos.append(f"{_texto(nombre).replace('%', '%%')}:{formato}")
+        valores.append(columna.tolist())
+
+    plantilla = '{' + ','.join(formatos) + '}'
+    return JSONCrudo('[' + ','.join([plantilla % fila for fila in zip(*valores)]) + ']')
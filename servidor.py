@@ -0,0 +1,270 @@
+'''
+Servidor con varios procesos que comparten una sola copia de los datos.
+
+Con uvicorn --workers N cada proceso importa main.py y carga los datos por su cuenta: el tiempo
+de inicio y la memoria se multiplican por N. Este lanzador carga los datos y construye las
+estructuras de las consultas una sola vez en el proceso principal, los congela (gc.freeze, para
+que el recolector de basura no escriba en sus páginas) y después crea N procesos con fork, que
+atienden el mismo socket con uvicorn. Los procesos heredan los datos copy-on-write: mientras no
+los modifiquen, el sistema operativo no copia esas páginas y todos usan la misma memoria física.
+
+El proceso principal no atiende consultas: vuelve a crear los procesos que terminan mal, recarga
+los datos (con SIGHUP, POST /admin/recargar o, si RECARGA_INTERVALO_SEGUNDOS es mayor que 0,
+cuando cambian los archivos) una sola vez y reemplaza los procesos por otros con la versión
+nueva, e informa la memoria única (USS) y compartida (PSS) de cada proceso leída de /proc (cada
+--reporte-segundos y con SIGUSR1).
+
+Uso:
+    python servidor.py --workers 4 --host 0.0.0.0 --port 8000
+'''
+# Importaciones
+import argparse
+import gc
+import logging
+import os
+import signal
+import time
+
+import uvicorn
+
+import recarga
+
+
+logger = logging.getLogger('uvicorn.error')
+
+
+def memoria_proceso(pid):
+    '''
+    Devuelve la memoria del proceso en MiB, desde /proc/<pid>/smaps_rollup: RSS, PSS (la memoria
+    compartida repartida entre los procesos que la usan), USS (memoria privada del proceso) y
+    compartida (páginas que también usan otros procesos), o None si el proceso ya no existe.
+    '''
+    valores = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for linea in f:
+                partes = linea.split()
+                if len(partes) >= 2 and partes[0].endswith(':') and partes[1].isdigit():
+                    valores[partes[0][:-1]] = int(partes[1]) / 1024
+    except (FileNotFoundError, ProcessLookupError):
+        return None
+    return {
+        'rss': valores.get('Rss', 0.0),
+        'pss': valores.get('Pss', 0.0),
+        'uss': valores.get('Private_Clean', 0.0) + valores.get('Private_Dirty', 0.0),
+        'compartida': valores.get('Shared_Clean', 0.0) + valores.get('Shared_Dirty', 0.0),
+    }
+
+
+def reporte_memoria(procesos):
+    '''
+    Devuelve las líneas del reporte de memoria de los procesos dados ({nombre: pid}) y el total.
+    '''
+    lineas = [f"{'proceso':<12} {'pid':>8} {'RSS MiB':>9} {'PSS MiB':>9} {'USS MiB':>9} {'compartida MiB':>15}"]
+    total = {'rss': 0.0, 'pss': 0.0, 'uss': 0.0}
+    for nombre, pid in procesos.items():
+        medidas = memoria_proceso(pid)
+        if medidas is None:
+            continue
+        for clave in total:
+            total[clave] += medidas[clave]
+        lineas.append(f"{nombre:<12} {pid:>8} {medidas['rss']:>9.1f} {medidas['pss']:>9.1f} {medidas['uss']:>9.1f} "
+                      f"{medidas['compartida']:>15.1f}")
+    lineas.append(f"{'total':<12} {'':>8} {total['rss']:>9.1f} {total['pss']:>9.1f} {total['uss']:>9.1f}")
+    return lineas
+
+
+class RecargaEnPrincipal(recarga.Recargador):
+    '''
+    Recargador de los procesos hijos: en lugar de recargar los datos en el propio proceso (lo que
+    dejaría una copia privada en cada uno) le pide la recarga al proceso principal con SIGHUP.
+    '''
+
+    def __init__(self):
+        super().__init__(construir=None, publicar=None)
+
+    def iniciar(self, motivo):
+        os.kill(os.getppid(), signal.SIGHUP)
+        with self._lock:
+            self._estado['motivo'] = f'{motivo} (en el proceso principal)'
+        return True
+
+
+class Servidor:
+    '''
+    Proceso principal: carga los datos una vez, crea los procesos que atienden las consultas y los supervisa.
+
+    Parameters:
+        config (uvicorn.Config): Configuración de uvicorn de cada proceso (app, host, puerto, logs).
+        workers (int): Cantidad de procesos que atienden consultas.
+        reporte_segundos (float): Cada cuántos segundos se informa la memoria (0 para sólo con SIGUSR1).
+    '''
+
+    def __init__(self, config, workers, reporte_segundos=300.0):
+        self.config = config
+        self.workers = workers
+        self.reporte_segundos = reporte_segundos
+        self._procesos = {}
+        self._detener = False
+        self._recargar = None
+        self._reportar = False
+
+    def precargar(self):
+        '''
+        Carga los datos de la API en este proceso y los congela para compartirlos con los hijos.
+        '''
+        import main
+
+        inicio = time.perf_counter()
+        main.cargar_datos()
+        if main.datos_api.estado.error is not None:
+            raise SystemExit(f"No se pudieron cargar los datos: {main.datos_api.estado.error}")
+        logger.info(f"Datos precargados en {time.perf_counter() - inicio:.1f} s (versión {main.datos_api.version})")
+        self._congelar()
+
+    @staticmethod
+    def _congelar():
+        # Los objetos que ya existen pasan a la generación permanente: el recolector no los recorre
+        # (recorrerlos escribe en sus cabeceras y copiaría sus páginas en cada proceso)
+        gc.collect()
+        gc.freeze()
+
+    def _crear_proceso(self, socket_servidor):
+        pid = os.fork()
+        if pid > 0:
+            return pid
+
+        # Proceso hijo: nunca vuelve al código del proceso principal
+        codigo = 1
+        try:
+            import main
+
+            # SIGHUP y SIGUSR1 son para el proceso principal (por ejemplo si se envían a todo el grupo)
+            for senial in (signal.SIGHUP, signal.SIGUSR1):
+                signal.signal(senial, signal.SIG_IGN)
+            for senial in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(senial, signal.SIG_DFL)
+            # Las recargas las hace el proceso principal, una sola vez para todos
+            main.vigilante = None
+            main.recargador = RecargaEnPrincipal()
+
+            uvicorn.Server(self.config).run(sockets=[socket_servidor])
+            codigo = 0
+        except BaseException:
+            logger.exception("Error en el proceso hijo")
+        finally:
+            os._exit(codigo)
+
+    def _crear_procesos(self, socket_servidor):
+        procesos = {self._crear_proceso(socket_servidor): i for i in range(self.workers)}
+        logger.info(f"{self.workers} procesos atendiendo consultas: {', '.join(map(str, procesos))}")
+        return procesos
+
+    def _reemplazar(self, socket_servidor, motivo):
+        '''
+        Recarga los datos en este proceso, crea procesos nuevos con la versión nueva y termina los anteriores,
+        que completan las consultas en curso. Si la recarga falla, siguen los procesos actuales.
+        '''
+        import main
+
+        logger.info(f"Recargando los datos ({motivo})")
+        gc.unfreeze()
+        try:
+            datos = main.reconstruir_datos()
+        except Exception:
+            logger.exception("Error al recargar los datos, se siguen usando los procesos actuales")
+            self._congelar()
+            return
+        main.publicar_datos(datos)
+        del datos
+        self._congelar()
+
+        anteriores = self._procesos
+        self._procesos = self._crear_procesos(socket_servidor)
+        for pid in anteriores:
+            os.kill(pid, signal.SIGTERM)
+
+    def _reportar_memoria(self):
+        procesos = {'principal': os.getpid(), **{f'worker {i}': pid for pid, i in sorted(self._procesos.items(), key=lambda p: p[1])}}
+        for linea in reporte_memoria(procesos):
+            logger.info(linea)
+
+    def _recoger_terminados(self, socket_servidor):
+        '''
+        Recoge los procesos que terminaron; si era uno de los actuales y no se está deteniendo el
+        servidor, crea otro en su lugar.
+        '''
+        while True:
+            try:
+                pid, estado = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            i = self._procesos.pop(pid, None)
+            if i is not None and not self._detener:
+                logger.warning(f"El proceso {pid} terminó (estado {estado}), se crea otro")
+                self._procesos[self._crear_proceso(socket_servidor)] = i
+
+    def servir(self):
+        self.precargar()
+        socket_servidor = self.config.bind_socket()
+
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, '_detener', True))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, '_detener', True))
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, '_recargar', 'SIGHUP'))
+        signal.signal(signal.SIGUSR1, lambda *_: setattr(self, '_reportar', True))
+
+        import main
+        vigilante = None
+        if main.recarga_intervalo > 0:
+            vigilante = recarga.VigilanteArchivos(main.vigilante.paths, main.recarga_intervalo,
+                                                  lambda motivo: setattr(self, '_recargar', motivo) or True)
+
+        self._procesos = self._crear_procesos(socket_servidor)
+        proximo_reporte = time.monotonic() + min(5.0, self.reporte_segundos or 5.0)
+        proxima_revision = time.monotonic() + (vigilante.intervalo if vigilante else float('inf'))
+
+        while not self._detener:
+            self._recoger_terminados(socket_servidor)
+            if self._recargar is not None:
+                motivo, self._recargar = self._recargar, None
+                self._reemplazar(socket_servidor, motivo)
+            if vigilante is not None and time.monotonic() >= proxima_revision:
+                vigilante.revisar()
+                proxima_revision = time.monotonic() + vigilante.intervalo
+            if self._reportar or (self.reporte_segundos and time.monotonic() >= proximo_reporte):
+                self._reportar = False
+                self._reportar_memoria()
+                proximo_reporte = time.monotonic() + (self.reporte_segundos or float('inf'))
+            time.sleep(0.2)
+
+        logger.info("Deteniendo los procesos")
+        for pid in self._procesos:
+            os.kill(pid, signal.SIGTERM)
+        for pid in list(self._procesos):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        socket_servidor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WORKERS', os.cpu_count() or 1)),
+                        help='Cantidad de procesos que atienden consultas')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 8000)))
+    parser.add_argument('--reporte-segundos', type=float, default=300.0,
+                        help='Cada cuántos segundos se informa la memoria de los procesos (0: sólo con SIGUSR1)')
+    parser.add_argument('--log-level', default='info')
+    args = parser.parse_args()
+
+    # La configuración de uvicorn también prepara los logs, así que se crea antes de cargar los datos
+    config = uvicorn.Config('main:app', host=args.host, port=args.port, log_level=args.log_level)
+    Servidor(config, args.workers, args.reporte_segundos).servir()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# Importaciones
+import argparse
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+import carga
+
+
+# Snapshot de los datos de la API: Arrow IPC (Feather v2) sin comprimir, se abre con pa.memory_map
+snapshot_file_path = 'data/data_export_api.arrow'
+
+# Compresiones admitidas por el formato (None = sin comprimir)
+compresiones = {'ninguna': None, 'lz4': 'lz4'}
+
+
+def construir_snapshot(origen, destino=snapshot_file_path, compresion=None, columnas=carga.columnas_api):
+    '''
+    Escribe el snapshot de los datos de la API a partir del archivo Parquet.
+
+    Las columnas se guardan ya con los tipos compactos de carga.py (texto codificado por diccionario,
+    números con el tipo más angosto) en un solo lote, para que al abrirlo cada columna sea un único
+    bloque contiguo que pandas puede usar sin copiar. En los metadatos se guarda la versión del
+    Parquet de origen y su cantidad de grupos de filas.
+
+    Parameters:
+        origen (str): Ruta del archivo Parquet.
+        destino (str): Ruta del snapshot.
+        compresion (str or None): None (sin comprimir, se comparte entre procesos) o 'lz4'
+            (más chico, pero cada proceso descomprime su propia copia).
+        columnas (list): Columnas a guardar.
+
+    Returns:
+        pyarrow.Schema: El esquema del snapshot escrito.
+    '''
+    parquet_file = carga.abrir_parquet(origen, columnas)
+    tabla = carga.reducir_tipos(parquet_file.read(columns=columnas))
+
+    # Un solo diccionario y un solo bloque por columna
+    tabla = tabla.unify_dictionaries().combine_chunks().replace_schema_metadata({
+        'version_origen': carga.version_archivo(origen),
+        'grupos_origen': str(parquet_file.num_row_groups),
+    })
+
+    # Se escribe en un archivo temporal y se reemplaza al final, para no dejar un snapshot a medias
+    temporal = f'{destino}.tmp'
+    with pa.OSFile(temporal, 'wb') as sink:
+        with ipc.new_file(sink, tabla.schema, options=ipc.IpcWriteOptions(compression=compresion)) as escritor:
+            escritor.write_table(tabla)
+    os.replace(temporal, destino)
+
+    return tabla.schema
+
+
+def abrir_snapshot(path=snapshot_file_path):
+    '''
+    Abre el snapshot mapeado en memoria.
+
+    Sin compresión, las columnas de la tabla apuntan directamente a las páginas del archivo: no se
+    copia nada al abrirlo y los procesos que abren el mismo archivo comparten esas páginas a través
+    de la cache de páginas del sistema operativo.
+
+    Returns:
+        pyarrow.Table: Los datos del snapshot.
+    '''
+    return ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def metadatos(path=snapshot_file_path):
+    '''
+    Devuelve los metadatos del snapshot ('version_origen' y 'grupos_origen') sin leer las columnas.
+    '''
+    with pa.memory_map(path, 'r') as fuente:
+        esquema = ipc.open_file(fuente).schema
+    return {clave.decode(): valor.decode() for clave, valor in (esquema.metadata or {}).items()}
+
+
+def snapshot_vigente(path, origen):
+    '''
+    Indica si el snapshot existe y corresponde a la versión actual del Parquet de origen
+    (si el Parquet no existe, alcanza con que exista el snapshot).
+    '''
+    if not os.path.exists(path):
+        return False
+    if not os.path.exists(origen):
+        return True
+    return metadatos(path).get('version_origen') == carga.version_archivo(origen)
+
+
+def particiones(tabla, cantidad):
+    '''
+    Divide la tabla en 'cantidad' partes consecutivas (vistas, sin copiar), para recorrerla como
+    si fueran los grupos de filas del Parquet de origen.
+    '''
+    tamanio = max(1, -(-tabla.num_rows // max(1, cantidad)))
+    return [tabla.slice(inicio, tamanio) for inicio in range(0, tabla.num_rows, tamanio)] or [tabla]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Construye el snapshot Arrow IPC de los datos de la API a partir del Parquet.')
+    parser.add_argument('origen', nargs='?', default='data/data_export_api_gzip.parquet', help='Archivo Parquet de la API')
+    parser.add_argument('destino', nargs='?', default=snapshot_file_path, help='Archivo del snapshot')
+    parser.add_argument('--compresion', choices=list(compresiones), default='ninguna')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    construir_snapshot(args.origen, args.destino, compresiones[args.compresion])
+    print(f'Snapshot guardado en {args.destino} ({os.path.getsize(args.destino) / 2**20:.1f} MiB) '
+          f'en {time.perf_counter() - inicio:.2f} s')
+
+    inicio = time.perf_counter()
+    tabla = abrir_snapshot(args.destino)
+    print(f'Apertura: {tabla.num_rows} filas en {1000 * (time.perf_counter() - inicio):.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+'''
+Búsqueda de vecinos para el sistema de recomendación.
+
+Todas las búsquedas reciben la matriz de juegos (scipy.sparse CSR, una fila de norma 1 por juego,
+de modo que el producto punto es la similitud coseno) y responden con la misma interfaz:
+
+    busqueda.buscar(posiciones, k) -> (vecinos, puntajes)
+
+donde 'posiciones' son filas de la matriz (los juegos consultados), 'vecinos' es una matriz
+(consultas x k) con las posiciones de los k juegos más similares, sin incluir al propio juego,
+y 'puntajes' tiene sus similitudes. Si hay menos de k candidatos, los lugares sobrantes quedan
+con posición -1 y puntaje -inf.
+'''
+# Importaciones
+import numpy as np
+from scipy import sparse
+
+
+def _mejores(similitud, k):
+    '''
+    Devuelve las columnas y los puntajes de los k mayores valores de cada fila, ordenados de mayor a menor.
+    '''
+    columnas = similitud.shape[1]
+    if columnas <= k:
+        candidatos = np.broadcast_to(np.arange(columnas), similitud.shape).copy()
+    else:
+        # Los k mayores quedan al final; sin negar la matriz, que sería otra copia del mismo tamaño
+        candidatos = np.argpartition(similitud, columnas - k, axis=1)[:, columnas - k:]
+    puntajes = np.take_along_axis(similitud, candidatos, axis=1)
+    # De mayor a menor puntaje; ante empates, la columna menor
+    orden = np.lexsort((candidatos, -puntajes), axis=1)
+    return np.take_along_axis(candidatos, orden, axis=1), np.take_along_axis(puntajes, orden, axis=1)
+
+
+def _completar(vecinos, puntajes, k):
+    '''
+    Completa con -1 / -inf las filas que tienen menos de k candidatos (o puntajes -inf).
+    '''
+    faltan = k - vecinos.shape[1]
+    if faltan > 0:
+        vecinos = np.pad(vecinos, ((0, 0), (0, faltan)), constant_values=-1)
+        puntajes = np.pad(puntajes, ((0, 0), (0, faltan)), constant_values=-np.inf)
+    vecinos = np.where(np.isneginf(puntajes), -1, vecinos)
+    return vecinos, puntajes
+
+
+class BusquedaExacta:
+    '''
+    Búsqueda exacta: compara cada consulta contra todos los juegos, por bloques de consultas.
+
+    Parameters:
+        matriz (scipy.sparse.csr_matrix): Matriz de juegos con filas de norma 1.
+        bloque (int): Consultas por producto de matrices (la memoria usada es bloque x juegos). Por
+            defecto se acota la matriz densa de similitudes a ~32M valores, como en BusquedaIVF.
+    '''
+
+    nombre = 'exacta'
+
+    def __init__(self, matriz, bloque=None):
+        self.matriz = matriz.tocsr()
+        self.bloque = bloque or max(1, 2 ** 25 // max(1, self.matriz.shape[0]))
+        self._transpuesta = self.matriz.T
+
+    def buscar(self, posiciones, k):
+        posiciones = np.asarray(posiciones, dtype=np.int64)
+        vecinos = np.full((len(posiciones), k), -1, dtype=np.int32)
+        puntajes = np.full((len(posiciones), k), -np.inf, dtype=np.float32)
+        if k == 0:
+            return vecinos, puntajes
+
+        for inicio in range(0, len(posiciones), self.bloque):
+            filas = posiciones[inicio:inicio + self.bloque]
+            similitud = (self.matriz[filas] @ self._transpuesta).toarray()
+
+            # Excluir al propio juego de sus vecinos
+            similitud[np.arange(len(filas)), filas] = -np.inf
+
+            v, p = _completar(*_mejores(similitud, k), k)
+            vecinos[inicio:inicio + len(filas)] = v[:, :k]
+            puntajes[inicio:inicio + len(filas)] = p[:, :k]
+
+        return vecinos, puntajes
+
+
+class BusquedaIVF:
+    '''
+    Búsqueda aproximada con índice de listas invertidas (IVF): los juegos se agrupan con k-means
+    esférico y cada consulta sólo se compara contra los juegos de las 'sondeos' listas cuyos
+    centroides son más parecidos al centroide de su propia lista.
+
+    Más listas hacen cada comparación más chica (más rápido); más sondeos revisan más candidatos
+    (mejor recall). Con sondeos == listas la búsqueda es exacta.
+
+    Parameters:
+        matriz (scipy.sparse.csr_matrix): Matriz de juegos con filas de norma 1.
+        listas (int): Cantidad de listas (centroides de k-means).
+        sondeos (int): Listas que se revisan por consulta.
+        iteraciones (int): Iteraciones de k-means.
+        muestra (int): Juegos usados para entrenar los centroides.
+        semilla (int): Semilla del generador aleatorio.
+    '''
+
+    nombre = 'ivf'
+
+    def __init__(self, matriz, listas=256, sondeos=8, iteraciones=10, muestra=100_000, semilla=0):
+        self.matriz = matriz.tocsr()
+        cantidad = self.matriz.shape[0]
+        self.listas = max(1, min(listas, cantidad))
+        self.sondeos = max(1, min(sondeos, self.listas))
+
+        rng = np.random.default_rng(semilla)
+        entrenamiento = self.matriz
+        if cantidad > muestra:
+            entrenamiento = self.matriz[np.sort(rng.choice(cantidad, muestra, replace=False))]
+
+        self.centroides = self._kmeans(entrenamiento, iteraciones, rng)
+        self.asignacion = self._asignar(self.matriz)
+
+        # Juegos de cada lista, contiguos en 'orden'
+        self._orden = np.argsort(self.asignacion, kind='stable').astype(np.int64)
+        self._limites = np.searchsorted(self.asignacion[self._orden], np.arange(self.listas + 1))
+
+        # Matriz transpuesta de cada lista, para no volver a extraer los candidatos en cada consulta
+        self._transpuestas = [self.matriz[self._miembros(lista)].T.tocsr() for lista in range(self.listas)]
+
+        # Listas a revisar para las consultas de cada lista (la propia lista queda primera)
+        parecido = self.centroides @ self.centroides.T
+        np.fill_diagonal(parecido, np.inf)
+        self._sondeos = _mejores(parecido, self.sondeos)[0]
+
+    def _asignar(self, matriz, bloque=65536):
+        asignacion = np.empty(matriz.shape[0], dtype=np.int32)
+        for inicio in range(0, matriz.shape[0], bloque):
+            asignacion[inicio:inicio + bloque] = np.asarray((matriz[inicio:inicio + bloque] @ self.centroides.T).argmax(axis=1)).ravel()
+        return asignacion
+
+    def _kmeans(self, matriz, iteraciones, rng):
+        cantidad = matriz.shape[0]
+        self.centroides = matriz[rng.choice(cantidad, self.listas, replace=False)].toarray().astype(np.float32)
+
+        for _ in range(iteraciones):
+            asignacion = self._asignar(matriz)
+            pertenencia = sparse.csr_matrix((np.ones(cantidad, dtype=np.float32), (asignacion, np.arange(cantidad))),
+                                            shape=(self.listas, cantidad))
+            centroides = np.asarray((pertenencia @ matriz).todense(), dtype=np.float32)
+
+            # Las listas vacías se reinician con un juego al azar
+            normas = np.linalg.norm(centroides, axis=1)
+            vacias = normas == 0
+            if vacias.any():
+                centroides[vacias] = matriz[rng.choice(cantidad, int(vacias.sum()), replace=False)].toarray()
+                normas[vacias] = np.linalg.norm(centroides[vacias], axis=1)
+            self.centroides = centroides / np.maximum(normas, 1e-12)[:, None]
+
+        return self.centroides
+
+    def _miembros(self, lista):
+        return self._orden[self._limites[lista]:self._limites[lista + 1]]
+
+    def buscar(self, posiciones, k):
+        posiciones = np.asarray(posiciones, dtype=np.int64)
+        vecinos = np.full((len(posiciones), k), -1, dtype=np.int32)
+        puntajes = np.full((len(posiciones), k), -np.inf, dtype=np.float32)
+        if k == 0:
+            return vecinos, puntajes
+
+        # Las consultas de una misma lista comparten candidatos: se resuelven juntas
+        listas_consulta = self.asignacion[posiciones]
+        orden = np.argsort(listas_consulta, kind='stable')
+        cortes = np.flatnonzero(np.diff(listas_consulta[orden])) + 1
+
+        for indices in np.split(orden, cortes):
+            if len(indices) == 0:
+                continue
+            sondeadas = self._sondeos[listas_consulta[indices[0]]]
+            candidatos = np.concatenate([self._miembros(lista) for lista in sondeadas])
+
+            # Consultas por producto, para acotar la matriz densa de similitudes a ~32M valores
+            bloque = max(1, 2 ** 25 // max(1, len(candidatos)))
+            for inicio in range(0, len(indices), bloque):
+                parte = indices[inicio:inicio + bloque]
+                filas = posiciones[parte]
+                consultas = self.matriz[filas]
+                similitud = np.hstack([(consultas @ self._transpuestas[lista]).toarray() for lista in sondeadas])
+
+                # Excluir al propio juego (siempre está en su lista, la primera sondeada)
+                propia = self._miembros(sondeadas[0])
+                similitud[np.arange(len(filas)), np.searchsorted(propia, filas)] = -np.inf
+
+                columnas, p = _mejores(similitud, k)
+                v, p = _completar(candidatos[columnas].astype(np.int32), p, k)
+                vecinos[parte] = v
+                puntajes[parte] = p
+
+        return vecinos, puntajes
+
+
+# Búsquedas disponibles por nombre
+busquedas = {BusquedaExacta.nombre: BusquedaExacta, BusquedaIVF.nombre: BusquedaIVF}
+
+
+def crear_busqueda(nombre, matriz, **parametros):
+    '''
+    Crea la búsqueda de vecinos indicada por nombre ('exacta' o 'ivf') sobre la matriz de juegos.
+
+    Parameters:
+        nombre (str): Nombre de la búsqueda.
+        matriz (scipy.sparse.csr_matrix): Matriz de juegos con filas de norma 1.
+        **parametros: Parámetros propios de la búsqueda (por ejemplo listas y sondeos para 'ivf').
+
+    Returns:
+        BusquedaExacta or BusquedaIVF: La búsqueda lista para usar.
+    '''
+    if nombre not in busquedas:
+        raise ValueError(f"Búsqueda de vecinos desconocida: {nombre} (opciones: {', '.join(busquedas)})")
+    return busquedas[nombre](matriz, **parametros)